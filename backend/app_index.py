@@ -0,0 +1,255 @@
+# backend/app_index.py
+"""
+Persistent index of installed applications for the Launcher.
+
+The index maps every .desktop file in the XDG application directories to
+its parsed entry, keyed by path with the file's mtime and size. A refresh
+runs in a worker thread, stats every file and re-parses only the ones that
+changed. It is kept fresh by inotify on the application directories (via
+libc, no extra package), or by periodic polling where inotify isn't
+available, and saved to a cache file so a cold start serves the last
+known list immediately and only re-parses what changed since.
+"""
+import asyncio
+import ctypes
+import ctypes.util
+import json
+import os
+import time
+from typing import Dict, List, Optional, Tuple
+
+from desktop_entry import parse_desktop_files
+
+# Configuration
+APP_CACHE_PATH = os.environ.get("JARVIS_APP_CACHE") or os.path.join(
+    os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache"), "jarvis", "apps.json")
+APP_POLL_INTERVAL = float(os.environ.get("JARVIS_APP_POLL_INTERVAL", "30"))
+# Wait this long after the last change event before re-scanning, so a package install is one refresh
+APP_DEBOUNCE = 0.5
+# Bump whenever parse_desktop_entry output changes shape, so old caches get re-parsed
+CACHE_VERSION = 3
+
+# inotify through libc, if this platform has it
+try:
+    _libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+    _libc.inotify_init1
+    INOTIFY_AVAILABLE = True
+except (OSError, AttributeError):
+    INOTIFY_AVAILABLE = False
+
+IN_MODIFY = 0x002
+IN_ATTRIB = 0x004
+IN_CLOSE_WRITE = 0x008
+IN_MOVED_FROM = 0x040
+IN_MOVED_TO = 0x080
+IN_CREATE = 0x100
+IN_DELETE = 0x200
+IN_DELETE_SELF = 0x400
+IN_MOVE_SELF = 0x800
+WATCH_MASK = (IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO
+              | IN_CREATE | IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF)
+
+def application_dirs() -> List[str]:
+    """XDG application directories, highest precedence first, plus flatpak and snap exports"""
+    data_home = os.environ.get("XDG_DATA_HOME") or os.path.expanduser("~/.local/share")
+    data_dirs = (os.environ.get("XDG_DATA_DIRS") or "/usr/local/share:/usr/share").split(":")
+    roots = [data_home, os.path.join(data_home, "flatpak/exports/share"), *data_dirs,
+             "/var/lib/flatpak/exports/share"]
+    dirs = [os.path.join(root, "applications") for root in roots if root]
+    dirs.append("/var/lib/snapd/desktop/applications")
+    seen = set()
+    return [d for d in dirs if not (d in seen or seen.add(d))]
+
+def desktop_file_id(path: str, base: Optional[str]) -> str:
+    """The XDG desktop file ID: the path below applications/ with '/' replaced by '-'"""
+    if base is None:
+        return os.path.basename(path)
+    return os.path.relpath(path, base).replace(os.sep, "-")
+
+class AppIndex:
+    """Parsed .desktop entries, refreshed incrementally and cached on disk"""
+
+    def __init__(self, cache_path: str = APP_CACHE_PATH):
+        self.cache_path = cache_path
+        # path -> (mtime_ns, size, parsed entry or None if hidden/invalid)
+        self._files: Dict[str, Tuple[int, int, Optional[dict]]] = {}
+        self._apps: List[dict] = []
+        self._by_id: Dict[str, dict] = {}
+        self.generation = 0
+        self.built_at: Optional[float] = None
+        self.source = "empty"
+        self._inflight: Optional[asyncio.Future] = None
+        self._task: Optional[asyncio.Task] = None
+        self._inotify_fd: Optional[int] = None
+        self._watched: Dict[str, int] = {}
+        self._dirty = asyncio.Event()
+
+    def apps(self) -> List[dict]:
+        """The current application list; a memory read"""
+        return self._apps
+
+    def get(self, app_id: str) -> Optional[dict]:
+        """The app with this desktop file ID, if it is in the current list"""
+        return self._by_id.get(app_id)
+
+    def _scan(self) -> Tuple[Dict[str, Tuple[int, int, Optional[dict]]], int, List[str]]:
+        """Stat every .desktop file and re-parse the changed ones in bulk. Runs in a worker thread."""
+        files = {}
+        changed = {}
+        dirs = []
+        for base in application_dirs():
+            for root, subdirs, names in os.walk(base):
+                dirs.append(root)
+                for name in names:
+                    if not name.endswith(".desktop"):
+                        continue
+                    path = os.path.join(root, name)
+                    try:
+                        stat = os.stat(path)
+                    except OSError:
+                        continue
+                    cached = self._files.get(path)
+                    if cached and cached[0] == stat.st_mtime_ns and cached[1] == stat.st_size:
+                        files[path] = cached
+                    else:
+                        changed[path] = (stat.st_mtime_ns, stat.st_size)
+        for path, app_info in parse_desktop_files(list(changed)).items():
+            files[path] = (*changed[path], app_info)
+        return files, len(changed), dirs
+
+    def _publish(self, files: Dict[str, Tuple[int, int, Optional[dict]]]):
+        """Build the app list: one entry per desktop file ID, the file in the highest-precedence dir wins"""
+        dirs = application_dirs()
+        def located(path):
+            return next(((i, d) for i, d in enumerate(dirs) if path.startswith(d + os.sep)), (len(dirs), None))
+        apps = []
+        found_ids = set()
+        for path in sorted(files, key=lambda path: (located(path)[0], path)):
+            app_info = files[path][2]
+            if not app_info:
+                continue
+            app_id = desktop_file_id(path, located(path)[1])
+            if app_id not in found_ids:
+                apps.append({**app_info, "id": app_id})
+                found_ids.add(app_id)
+        self._files = files
+        self._apps = apps
+        self._by_id = {app["id"]: app for app in apps}
+        self.generation += 1
+        self.built_at = time.time()
+
+    async def refresh(self) -> List[dict]:
+        """Re-scan in a worker; concurrent callers share one scan"""
+        if self._inflight is None:
+            self._inflight = asyncio.ensure_future(self._refresh())
+        return await asyncio.shield(self._inflight)
+
+    async def _refresh(self) -> List[dict]:
+        try:
+            started = time.perf_counter()
+            files, parsed, dirs = await asyncio.to_thread(self._scan)
+            changed = parsed or files.keys() != self._files.keys()
+            if changed or self.generation == 0:
+                self._publish(files)
+                self.source = "scan"
+                await asyncio.to_thread(self.save)
+                print(f"App index: {len(self._apps)} apps, re-parsed {parsed} of {len(files)} files "
+                      f"in {(time.perf_counter() - started) * 1000:.0f} ms")
+            self._watch(dirs)
+            return self._apps
+        finally:
+            self._inflight = None
+
+    def load(self) -> bool:
+        """Serve the cached index until the first refresh completes"""
+        try:
+            with open(self.cache_path, "r", encoding="utf-8") as f:
+                cache = json.load(f)
+            if cache.get("version") != CACHE_VERSION:
+                return False
+            self._publish({path: tuple(value) for path, value in cache["files"].items()})
+            self.source = "cache"
+            return True
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            if not isinstance(e, FileNotFoundError):
+                print(f"Ignoring app index cache: {e}")
+            return False
+
+    def save(self):
+        try:
+            os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+            tmp = f"{self.cache_path}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump({"version": CACHE_VERSION, "files": self._files}, f)
+            os.replace(tmp, self.cache_path)
+        except OSError as e:
+            print(f"Error saving app index cache: {e}")
+
+    def _watch(self, dirs: List[str]):
+        """Add inotify watches for application dirs we aren't watching yet"""
+        if self._inotify_fd is None:
+            return
+        for path in dirs:
+            if path in self._watched:
+                continue
+            wd = _libc.inotify_add_watch(self._inotify_fd, os.fsencode(path), WATCH_MASK)
+            if wd >= 0:
+                self._watched[path] = wd
+        # Dirs that went away drop their watch by themselves (IN_IGNORED)
+        for path in [p for p in self._watched if p not in dirs]:
+            del self._watched[path]
+
+    def _on_inotify(self):
+        try:
+            os.read(self._inotify_fd, 64 * 1024)  # The events themselves don't matter, only that something changed
+        except BlockingIOError:
+            return
+        self._dirty.set()
+
+    def start(self):
+        if self._task is not None and not self._task.done():
+            return
+        if self.generation == 0:
+            self.load()
+        if INOTIFY_AVAILABLE and self._inotify_fd is None:
+            fd = _libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+            if fd >= 0:
+                self._inotify_fd = fd
+                asyncio.get_running_loop().add_reader(fd, self._on_inotify)
+            else:
+                print(f"inotify unavailable ({os.strerror(ctypes.get_errno())}), polling application dirs")
+        self._task = asyncio.create_task(self._run())
+
+    async def _run(self):
+        while True:
+            # Clear before scanning: a change that lands mid-scan must trigger another one
+            self._dirty.clear()
+            try:
+                await self.refresh()
+            except Exception as e:
+                print(f"Error refreshing app index: {e}")
+            if self._inotify_fd is not None:
+                # New dirs (e.g. the first flatpak install) only show up on a poll, so still poll, rarely
+                try:
+                    await asyncio.wait_for(self._dirty.wait(), timeout=APP_POLL_INTERVAL * 10)
+                except asyncio.TimeoutError:
+                    pass
+                await asyncio.sleep(APP_DEBOUNCE)
+            else:
+                await asyncio.sleep(APP_POLL_INTERVAL)
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._inotify_fd is not None:
+            asyncio.get_running_loop().remove_reader(self._inotify_fd)
+            os.close(self._inotify_fd)
+            self._inotify_fd = None
+            self._watched.clear()
+
+app_index = AppIndex()
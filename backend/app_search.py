@@ -0,0 +1,248 @@
+# backend/app_search.py
+"""
+Fuzzy, ranked search over installed applications.
+
+An AppSearchIndex is built from the app index's list and rebuilt whenever
+that list changes. Each app's searchable fields (Name, localized and
+untranslated, GenericName, Keywords and the Exec basename) are
+lower-cased once; a trigram index and a word-prefix index narrow a query
+down to candidates, which are then scored by match quality per field
+(exact, prefix, word prefix, substring, in-order subsequence) plus a boost
+for how often the app was launched.
+Only the top K results go back to the client.
+"""
+import asyncio
+import heapq
+import json
+import math
+import os
+import re
+import time
+from collections import Counter
+from typing import Dict, List, Optional, Set, Tuple
+
+from app_index import app_index
+
+# Configuration
+DEFAULT_SEARCH_LIMIT = 10
+MAX_SEARCH_LIMIT = 100
+LAUNCH_COUNTS_PATH = os.environ.get("JARVIS_LAUNCH_COUNTS") or os.path.join(
+    os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache"), "jarvis", "launches.json")
+
+# Field weights: a name match beats the same match in keywords or the command
+FIELD_WEIGHTS = (("name", 1.0), ("untranslated_name", 0.9), ("generic_name", 0.7), ("keywords", 0.6), ("exec", 0.5))
+# Match quality, before the field weight
+SCORE_EXACT = 100.0
+SCORE_PREFIX = 80.0
+SCORE_WORD_PREFIX = 60.0
+SCORE_SUBSTRING = 40.0
+SCORE_SUBSEQUENCE = 20.0
+SCORE_TYPO = 30.0
+# Added per e-fold of launches, so frequency reorders close matches but can't rescue a poor one
+LAUNCH_BOOST = 8.0
+
+_WORD = re.compile(r"[a-z0-9]+")
+
+def trigrams(text: str) -> Set[str]:
+    padded = f" {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+def _subsequence_score(query: str, text: str) -> float:
+    """In-order character match ('ffx' in 'firefox'), scaled down by the gaps between matched characters"""
+    pos = -1
+    gaps = 0
+    for ch in query:
+        found = text.find(ch, pos + 1)
+        if found < 0:
+            return 0.0
+        if pos >= 0:
+            gaps += found - pos - 1
+        pos = found
+    return SCORE_SUBSEQUENCE / (1 + gaps / len(query))
+
+def _edit_distance(a: str, b: str, limit: int) -> int:
+    """Optimal string alignment distance (a transposition counts as one edit), capped at limit + 1"""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous2, previous = None, list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i] + [0] * len(b)
+        for j, cb in enumerate(b, 1):
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb))
+            if i > 1 and j > 1 and ca == b[j - 2] and a[i - 2] == cb:
+                current[j] = min(current[j], previous2[j - 2] + 1)
+        if min(current) > limit:
+            return limit + 1
+        previous2, previous = previous, current
+    return previous[-1]
+
+def _typo_score(query: str, text: str) -> float:
+    """A word of text starts with the query give or take a typo or two ('firfeox' for 'firefox')"""
+    limit = 1 if len(query) < 8 else 2
+    best = limit + 1
+    for word in _WORD.findall(text):
+        if word[0] != query[0]:
+            continue  # First letters are rarely mistyped, and this keeps the pass cheap
+        for n in range(len(query) - 1, len(query) + 2):
+            best = min(best, _edit_distance(query, word[:n], limit))
+    return SCORE_TYPO / best if best <= limit else 0.0
+
+def match_score(query: str, text: str) -> float:
+    if not text:
+        return 0.0
+    if text == query:
+        return SCORE_EXACT
+    if text.startswith(query):
+        return SCORE_PREFIX
+    index = text.find(query)
+    if index > 0:
+        # A match at a word boundary ("code" in "visual studio code") beats one mid-word
+        return SCORE_WORD_PREFIX if not text[index - 1].isalnum() else SCORE_SUBSTRING
+    return _subsequence_score(query, text)
+
+class LaunchCounts:
+    """How often each executable was launched from the Launcher, persisted as JSON"""
+
+    def __init__(self, path: str = LAUNCH_COUNTS_PATH):
+        self.path = path
+        self.counts: Counter = Counter()
+        # One save at a time, so an older snapshot can't land after a newer one
+        self._saving = asyncio.Lock()
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                self.counts.update(json.load(f))
+        except (OSError, ValueError, TypeError):
+            pass
+
+    def _save(self, counts: Dict[str, int]):
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            tmp = f"{self.path}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(counts, f)
+            os.replace(tmp, self.path)
+        except OSError as e:
+            print(f"Error saving launch counts: {e}")
+
+    async def record(self, executable: str):
+        """Count a launch and persist the counts in a worker thread"""
+        self.counts[executable] += 1
+        async with self._saving:
+            await asyncio.to_thread(self._save, dict(self.counts))
+
+class AppSearchIndex:
+    """Trigram and word-prefix indexes over one generation of the app list"""
+
+    def __init__(self, apps: List[dict], generation: int = 0):
+        self.apps = apps
+        self.generation = generation
+        self.fields: List[Dict[str, str]] = []
+        self.by_trigram: Dict[str, Set[int]] = {}
+        self.by_prefix: Dict[str, Set[int]] = {}
+        for i, app in enumerate(apps):
+            fields = {
+                "name": (app.get("name") or "").lower(),
+                "untranslated_name": (app.get("untranslated_name") or "").lower(),
+                "generic_name": (app.get("generic_name") or "").lower(),
+                "keywords": " ".join(app.get("keywords") or []).lower(),
+                "exec": os.path.basename(app.get("executable") or "").lower(),
+            }
+            self.fields.append(fields)
+            for text in fields.values():
+                for gram in trigrams(text):
+                    self.by_trigram.setdefault(gram, set()).add(i)
+                for word in _WORD.findall(text):
+                    for n in range(1, min(len(word), 3) + 1):
+                        self.by_prefix.setdefault(word[:n], set()).add(i)
+
+    def _candidates(self, query: str) -> Tuple[Set[int], Set[int]]:
+        """Apps worth scoring, and the smaller set worth a typo-tolerant second look"""
+        if len(query) < 3:
+            # Too short for trigrams: apps with a word starting with the query, topped up with
+            # those with a word starting with its first letter (a subsequence like "vc" can still match)
+            prefixed = self.by_prefix.get(query, set())
+            if len(prefixed) >= DEFAULT_SEARCH_LIMIT or len(query) == 1:
+                return prefixed, set()
+            return prefixed | self.by_prefix.get(query[0], set()), set()
+        grams = trigrams(query) - {f" {query[:2]}", f"{query[-2:]} "}
+        hits = Counter()
+        for gram in grams:
+            hits.update(self.by_trigram.get(gram, ()))
+        # Most of the query's trigrams must be there; a typo knocks out up to three of them
+        needed = max(1, len(grams) // 2)
+        candidates = {i for i, count in hits.items() if count >= needed}
+        if len(candidates) < DEFAULT_SEARCH_LIMIT:
+            # Abbreviations ("gimp" -> "GNU Image Manipulation Program") share no trigrams
+            candidates |= self.by_prefix.get(query[0], set())
+        return candidates, set(hits)
+
+    def _score(self, query: str, candidates, scorer, launches: Counter) -> List[tuple]:
+        """(score, tie-break, app) for every candidate that matches at all"""
+        scored = []
+        for i in candidates:
+            fields = self.fields[i]
+            best = 0.0
+            for name, weight in FIELD_WEIGHTS:
+                score = scorer(query, fields[name]) * weight
+                if score > best:
+                    best = score
+            if best <= 0:
+                continue
+            count = launches.get(self.apps[i].get("executable"), 0)
+            if count:
+                best += LAUNCH_BOOST * math.log1p(count)
+            scored.append((best, -len(fields["name"]), i))
+        return scored
+
+    def search(self, query: str, limit: int = DEFAULT_SEARCH_LIMIT,
+               launches: Optional[Counter] = None) -> List[dict]:
+        query = " ".join(query.lower().split())
+        limit = max(1, min(limit, MAX_SEARCH_LIMIT))
+        launches = launches or Counter()
+        if not query:
+            # No query: most launched first, then alphabetical
+            ranked = sorted(range(len(self.apps)),
+                            key=lambda i: (-launches.get(self.apps[i].get("executable"), 0), self.fields[i]["name"]))
+            return [{**self.apps[i], "score": 0.0} for i in ranked[:limit]]
+
+        candidates, near = self._candidates(query)
+        scored = self._score(query, candidates, match_score, launches)
+        if len(scored) < limit and len(query) >= 4:
+            # Not enough real matches: give apps sharing some trigram a second look allowing for a typo
+            matched = {i for _, _, i in scored}
+            scored += self._score(query, near - matched, _typo_score, launches)
+        top = heapq.nlargest(limit, scored)
+        return [{**self.apps[i], "score": round(score, 1)} for score, _, i in top]
+
+class AppSearch:
+    """Searches whatever the app index currently holds, rebuilding its indexes when that changes"""
+
+    def __init__(self, app_index, launch_counts: Optional[LaunchCounts] = None):
+        self.app_index = app_index
+        self.launch_counts = launch_counts or LaunchCounts()
+        self._index: Optional[AppSearchIndex] = None
+
+    async def index(self) -> AppSearchIndex:
+        """The indexes for the current app list, rebuilt in a worker thread after it changes"""
+        if self.app_index.generation == 0:
+            await self.app_index.refresh()
+        generation = self.app_index.generation
+        if self._index is None or self._index.generation != generation:
+            self._index = await asyncio.to_thread(AppSearchIndex, self.app_index.apps(), generation)
+        return self._index
+
+    async def search(self, query: str, limit: int = DEFAULT_SEARCH_LIMIT) -> dict:
+        index = await self.index()
+        started = time.perf_counter()
+        results = index.search(query, limit, self.launch_counts.counts)
+        return {
+            "query": query,
+            "results": results,
+            "count": len(index.apps),
+            "took_ms": round((time.perf_counter() - started) * 1000, 3)
+        }
+
+    async def record_launch(self, executable: str):
+        await self.launch_counts.record(executable)
+
+app_search = AppSearch(app_index)
@@ -0,0 +1,84 @@
+# backend/audio_ring.py
+"""
+Single-producer, single-consumer ring buffer for raw PCM audio.
+
+The capture thread writes and the recognizer thread reads; neither takes a
+lock. Each side only ever advances its own position (a running byte
+count), and a reader that has fallen more than a buffer behind skips
+ahead to the oldest audio still held, counting what it lost, so a slow
+recognizer never stalls capture.
+"""
+import threading
+from typing import Optional
+
+class AudioRing:
+    """Fixed-size byte ring; write() never blocks, read() waits up to a timeout for audio"""
+
+    def __init__(self, capacity: int, align: int = 2):
+        # Keep positions on sample boundaries (16-bit mono by default)
+        self.align = align
+        self.capacity = capacity - capacity % align
+        self._buf = bytearray(self.capacity)
+        self._written = 0   # Total bytes ever written; only the producer changes it
+        self._writing = 0   # Where the write in progress will end; also producer-only
+        self._read = 0      # Total bytes ever consumed; only the consumer changes it
+        self._ready = threading.Event()
+        self.dropped = 0
+        self.closed = False
+
+    def __len__(self) -> int:
+        return min(self._written - self._read, self.capacity)
+
+    def write(self, data: bytes):
+        n = len(data)
+        written = self._written
+        if n > self.capacity:
+            data = data[n - self.capacity:]
+            written += n - self.capacity
+            n = self.capacity
+        # Announce the bytes about to be overwritten before touching them
+        self._writing = written + n
+        pos = written % self.capacity
+        first = min(n, self.capacity - pos)
+        self._buf[pos:pos + first] = data[:first]
+        if first < n:
+            self._buf[:n - first] = data[first:]
+        # Publish only after the bytes are in place
+        self._written = written + n
+        self._ready.set()
+
+    def read(self, max_bytes: int, timeout: Optional[float] = None) -> bytes:
+        """Up to max_bytes of the oldest unread audio; b"" on timeout or once closed"""
+        max_bytes -= max_bytes % self.align
+        while True:
+            if self._written == self._read:
+                if self.closed:
+                    return b""
+                self._ready.clear()
+                # Re-check after clearing, or a write in between would be slept through
+                if self._written == self._read and not self._ready.wait(timeout):
+                    return b""
+                continue
+            start = self._read
+            written = self._written
+            if written - start > self.capacity:
+                self.dropped += written - self.capacity - start
+                start = written - self.capacity
+            n = min(written - start, max_bytes)
+            pos = start % self.capacity
+            first = min(n, self.capacity - pos)
+            chunk = bytes(self._buf[pos:pos + first]) + bytes(self._buf[:n - first])
+            if self._writing - start > self.capacity:
+                # The producer lapped us while copying; what we copied may be torn
+                self._read = start
+                continue
+            self._read = start + n
+            return chunk
+
+    def clear(self):
+        """Discard unread audio (consumer side)"""
+        self._read = self._written
+
+    def close(self):
+        self.closed = True
+        self._ready.set()
@@ -0,0 +1,80 @@
+# backend/benchmarks/bench_app_search.py
+"""
+Latency of Launcher app search as a user types.
+
+Builds a search index over synthetic apps, then replays every prefix of a
+set of realistic queries (one search per keystroke), with and without a
+typo, and reports p50/p99/max. Run from the backend directory:
+
+    python benchmarks/bench_app_search.py [--apps 1000] [--rounds 20]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from collections import Counter
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from app_search import AppSearchIndex
+
+REAL_APPS = [
+    ("Firefox Web Browser", "Web Browser", ["internet", "www", "browser"], "firefox"),
+    ("Visual Studio Code", "Text Editor", ["vscode", "editor", "development"], "code"),
+    ("GNU Image Manipulation Program", "Image Editor", ["gimp", "photo", "paint"], "gimp-2.10"),
+    ("LibreOffice Writer", "Word Processor", ["text", "letter", "document"], "libreoffice"),
+    ("Terminal", "Terminal Emulator", ["shell", "prompt", "command"], "gnome-terminal"),
+    ("System Monitor", "Task Manager", ["process", "cpu", "memory"], "gnome-system-monitor"),
+    ("Wireshark", "Network Analyzer", ["packet", "sniffer", "capture"], "wireshark"),
+    ("Thunderbird Mail", "Mail Client", ["email", "calendar"], "thunderbird"),
+]
+SYLLABLES = "ka lo mi nu pe ra si to vu xe zo bar cor dex fin gal hub ion jet".split()
+QUERIES = ["firefox", "code", "gimp", "writer", "term", "monitor", "wireshark", "mail", "ffx", "vsc"]
+
+def synthetic_apps(count: int, seed: int = 1):
+    rng = random.Random(seed)
+    apps = [{"name": n, "generic_name": g, "keywords": k, "executable": e} for n, g, k, e in REAL_APPS]
+    while len(apps) < count:
+        name = " ".join("".join(rng.choice(SYLLABLES) for _ in range(rng.randint(1, 3))).capitalize()
+                        for _ in range(rng.randint(1, 3)))
+        apps.append({"name": name, "generic_name": rng.choice(["Editor", "Viewer", "Game", "Utility", "Player"]),
+                     "keywords": [rng.choice(SYLLABLES) for _ in range(3)],
+                     "executable": f"/usr/bin/{name.lower().replace(' ', '-')}-{len(apps)}"})
+    return apps
+
+def typo(word: str, rng: random.Random) -> str:
+    if len(word) < 4:
+        return word
+    i = rng.randrange(1, len(word) - 1)
+    return word[:i] + word[i + 1] + word[i] + word[i + 2:]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--apps", type=int, default=1000)
+    parser.add_argument("--rounds", type=int, default=20)
+    args = parser.parse_args()
+
+    apps = synthetic_apps(args.apps)
+    started = time.perf_counter()
+    index = AppSearchIndex(apps)
+    print(f"indexed {len(apps)} apps in {(time.perf_counter() - started) * 1000:.1f} ms")
+
+    launches = Counter({"code": 40, "firefox": 25})
+    rng = random.Random(2)
+    timings = []
+    for _ in range(args.rounds):
+        for query in QUERIES + [typo(q, rng) for q in QUERIES]:
+            for n in range(1, len(query) + 1):
+                started = time.perf_counter()
+                index.search(query[:n], 10, launches)
+                timings.append((time.perf_counter() - started) * 1000)
+    timings.sort()
+    pick = lambda p: timings[min(len(timings) - 1, int(len(timings) * p))]
+    print(f"{len(timings)} keystroke searches: p50 {pick(0.5):.3f} ms, p99 {pick(0.99):.3f} ms, max {timings[-1]:.3f} ms")
+    for query in QUERIES + ["firfeox"]:
+        top = index.search(query, 3, launches)
+        print(f"  {query!r:<12} -> " + ", ".join(f"{app['name']} ({app['score']})" for app in top))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+# backend/benchmarks/bench_codec.py
+"""
+Encode cost per message type for each available codec.
+
+"per-client" is the old path (json.dumps plus a UTF-8 encode for every
+recipient); the codec columns encode once and share the buffer. Run from
+the backend directory:
+
+    python benchmarks/bench_codec.py [--clients 10] [--repeat 2000]
+"""
+import argparse
+import json
+import os
+import sys
+import timeit
+from datetime import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import message_codec
+from message_codec import EncodedMessage
+
+def sample_messages():
+    now = datetime.now().isoformat()
+    connections = [{
+        "fd": 10 + i,
+        "family": "AddressFamily.AF_INET",
+        "type": "SocketKind.SOCK_STREAM",
+        "local_address": f"10.0.0.5:{40000 + i}",
+        "remote_address": f"93.184.216.{i % 255}:443",
+        "status": "ESTABLISHED",
+        "pid": 1000 + i
+    } for i in range(50)]
+    interfaces = {name: [{
+        "family": "AddressFamily.AF_INET",
+        "address": "10.0.0.5",
+        "netmask": "255.255.255.0",
+        "broadcast": "10.0.0.255",
+        "ptp": None
+    }] for name in ("lo", "eth0", "wlan0", "docker0")}
+    return {
+        "system_stats": {"type": "system_stats", "data": {
+            "cpu": 12.5, "memory": 43.1, "disk": 71.0,
+            "network": {"bytes_sent": 123456789, "bytes_recv": 987654321,
+                        "packets_sent": 123456, "packets_recv": 654321},
+            "timestamp": now}},
+        "network_update": {"type": "network_update", "data": {
+            "interfaces": interfaces, "connections": connections, "timestamp": now}},
+        "system_logs": {"type": "system_logs", "data": [
+            {"timestamp": now, "message": f"Oct 17 10:00:{i:02d} host systemd[1]: Started session {i} of user jarvis."}
+            for i in range(10)]},
+        "process_list": {"type": "process_list", "data": [
+            {"pid": 100 + i, "name": f"proc-{i}", "cpu_percent": 1.5 * i, "memory_percent": 0.7 * i}
+            for i in range(10)]},
+        "terminal_output": {"type": "terminal_output", "data": {"output": "drwxr-xr-x 2 root root 4096 Oct 17 10:00 bin"}},
+    }
+
+def per_message_us(fn, repeat: int) -> float:
+    return min(timeit.repeat(fn, number=repeat, repeat=3)) / repeat * 1e6
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, default=10)
+    parser.add_argument("--repeat", type=int, default=2000)
+    args = parser.parse_args()
+
+    codecs = {"stdlib": lambda m: json.dumps(m, separators=(",", ":"), ensure_ascii=False).encode("utf-8")}
+    if message_codec.ORJSON_AVAILABLE:
+        codecs["orjson"] = lambda m: message_codec.orjson.dumps(m)
+    if message_codec.MSGPACK_AVAILABLE:
+        codecs["msgpack"] = message_codec.dumps_msgpack
+
+    print(f"microseconds per broadcast to {args.clients} clients")
+    header = f"{'message':<16}{'bytes':>8}{'per-client':>12}" + "".join(f"{name:>10}" for name in codecs)
+    print(header)
+    print("-" * len(header))
+    for name, message in sample_messages().items():
+        size = len(EncodedMessage(message).json)
+        legacy = per_message_us(lambda: [json.dumps(message).encode("utf-8") for _ in range(args.clients)], args.repeat)
+        row = f"{name:<16}{size:>8}{legacy:>12.1f}"
+        for codec in codecs.values():
+            row += f"{per_message_us(lambda: codec(message), args.repeat):>10.1f}"
+        print(row)
+
+if __name__ == "__main__":
+    main()
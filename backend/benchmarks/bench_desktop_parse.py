@@ -0,0 +1,137 @@
+# backend/benchmarks/bench_desktop_parse.py
+"""
+Throughput of .desktop parsing: the old line-prefix parser against the
+spec parser, one file at a time and in bulk across a thread pool.
+
+Writes a corpus of synthetic .desktop files shaped like distro ones (dozens
+of translations, Desktop Actions, quoted Exec lines), or parses a real
+directory with --dir. Also counts entries the old parser got wrong, e.g. an
+action's Name/Exec overwriting the app's. Run from the backend directory:
+
+    python benchmarks/bench_desktop_parse.py [--files 5000] [--workers 8] [--dir /usr/share/applications]
+"""
+import argparse
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from desktop_entry import PARSE_WORKERS, parse_desktop_entry, parse_desktop_files
+
+LOCALES = ("af ar ast be bg bn ca cs da de el en_GB eo es et eu fa fi fr ga gl he hi hr hu id is it ja "
+           "kk ko lt lv ml mr nb nl oc pa pl pt pt_BR ro ru sk sl sr sv ta te th tr uk vi zh_CN zh_TW").split()
+CATEGORIES = ["Utility;", "System;Monitor;", "Network;WebBrowser;", "Development;IDE;", "AudioVideo;Player;"]
+
+def legacy_parse_desktop_file(filepath: str):
+    """The parser this benchmark replaced, kept verbatim for comparison"""
+    app_data = {}
+    try:
+        with open(filepath, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if line.startswith('Name='):
+                    app_data['name'] = line[len('Name='):]
+                elif line.startswith('Exec='):
+                    exec_line = line[len('Exec='):]
+                    app_data['executable'] = exec_line.split(' ')[0].split('%')[0]
+                elif line.startswith('GenericName='):
+                    app_data['generic_name'] = line[len('GenericName='):]
+                elif line.startswith('Keywords='):
+                    app_data['keywords'] = [k for k in line[len('Keywords='):].split(';') if k]
+                elif line.startswith('Categories='):
+                    categories = line[len('Categories='):].strip(';').split(';')
+                    if 'Utility' in categories or 'System' in categories:
+                        app_data['category'] = 'system'
+                    elif 'Network' in categories or 'Internet' in categories:
+                        app_data['category'] = 'network'
+                    elif 'Security' in categories or 'Development' in categories:
+                        app_data['category'] = 'security'
+                    else:
+                        app_data['category'] = 'system'
+                elif line.startswith('Icon='):
+                    app_data['icon'] = line[len('Icon='):]
+                elif line.startswith('NoDisplay=true') or line.startswith('Hidden=true'):
+                    return None
+    except Exception as e:
+        print(f"Error parsing .desktop file {filepath}: {e}")
+        return None
+    if 'name' in app_data and 'executable' in app_data:
+        app_data.setdefault('category', 'system')
+        app_data.setdefault('icon', 'Terminal')
+        return app_data
+    return None
+
+def desktop_file(i: int, rng: random.Random) -> str:
+    name = f"Example App {i}"
+    lines = ["[Desktop Entry]", "Version=1.0", "Type=Application", f"Name={name}"]
+    lines += [f"Name[{loc}]={name} ({loc})" for loc in LOCALES]
+    lines.append("GenericName=Example Tool")
+    lines += [f"GenericName[{loc}]=Example Tool ({loc})" for loc in LOCALES]
+    lines.append(f"Comment=Does example things, number {i}")
+    lines += [f"Comment[{loc}]=Does example things ({loc}), number {i}" for loc in LOCALES]
+    lines.append("Keywords=example;tool;sample;")
+    if i % 3 == 0:
+        lines.append(f'Exec="/opt/Example Apps/app{i}" --profile "default profile" %U')
+    else:
+        lines.append(f"Exec=app{i} %F")
+    lines += [f"Icon=app{i}", f"Categories={rng.choice(CATEGORIES)}", "StartupNotify=true", "Terminal=false"]
+    if i % 10 == 0:
+        lines.append("NoDisplay=true")
+    # Actions: the old parser lets these overwrite the main Name and Exec
+    for action in ("new-window", "new-private-window"):
+        lines += ["", f"[Desktop Action {action}]", f"Name=Open a {action.replace('-', ' ')}"]
+        lines += [f"Name[{loc}]=Open a {action} ({loc})" for loc in LOCALES]
+        lines.append(f"Exec=app{i} --{action}")
+    return "\n".join(lines) + "\n"
+
+def timed(fn):
+    started = time.perf_counter()
+    result = fn()
+    return result, (time.perf_counter() - started) * 1000
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--files", type=int, default=5000)
+    parser.add_argument("--workers", type=int, default=PARSE_WORKERS)
+    parser.add_argument("--dir", help="parse the .desktop files in this directory instead")
+    args = parser.parse_args()
+
+    corpus = None
+    if args.dir:
+        directory = args.dir
+    else:
+        corpus = directory = tempfile.mkdtemp(prefix="desktop-corpus-")
+        rng = random.Random(1)
+        for i in range(args.files):
+            with open(os.path.join(directory, f"app{i}.desktop"), "w", encoding="utf-8") as f:
+                f.write(desktop_file(i, rng))
+    try:
+        paths = sorted(os.path.join(directory, name) for name in os.listdir(directory) if name.endswith(".desktop"))
+        size = sum(os.path.getsize(p) for p in paths)
+        print(f"{len(paths)} files, {size / 1024 / 1024:.1f} MiB, {os.cpu_count()} CPUs")
+
+        legacy, legacy_ms = timed(lambda: {p: legacy_parse_desktop_file(p) for p in paths})
+        spec, spec_ms = timed(lambda: parse_desktop_files(paths, workers=1))
+        bulk, bulk_ms = timed(lambda: parse_desktop_files(paths, workers=args.workers))
+        print(f"  legacy parser, sequential:   {legacy_ms:8.1f} ms  ({legacy_ms * 1000 / len(paths):.0f} us/file)")
+        print(f"  spec parser, sequential:     {spec_ms:8.1f} ms  ({spec_ms * 1000 / len(paths):.0f} us/file)")
+        print(f"  spec parser, {args.workers} workers:     {bulk_ms:8.1f} ms  ({bulk_ms * 1000 / len(paths):.0f} us/file)")
+
+        assert bulk == spec
+        differ = sum(1 for p in paths if (legacy[p] or {}).get("name") != (spec[p] or {}).get("name")
+                     or (legacy[p] or {}).get("executable") != (spec[p] or {}).get("executable"))
+        print(f"  entries whose name or executable differ between the parsers: {differ}")
+        sample = next((p for p in paths if spec[p] and legacy[p] and legacy[p]["executable"] != spec[p]["executable"]), None)
+        if sample:
+            print(f"    e.g. {os.path.basename(sample)}: legacy {legacy[sample]['name']!r} -> {legacy[sample]['executable']!r}, "
+                  f"spec {spec[sample]['name']!r} -> {spec[sample]['command']!r}")
+    finally:
+        if corpus:
+            shutil.rmtree(corpus, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+# backend/benchmarks/bench_log_search.py
+"""
+Ingest rate, memory and query latency of the indexed log store.
+
+Fills a store with synthetic journal-like lines, then times a mix of
+searches (free text, unit, priority, since, prefix and paging). Run from
+the backend directory:
+
+    python benchmarks/bench_log_search.py [--lines 1000000] [--repeat 20]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from log_follower import make_entry
+from log_store import LogStore
+
+UNITS = ["systemd", "sshd.service", "NetworkManager.service", "kernel", "cron.service",
+         "docker.service", "gdm.service", "pulseaudio", "snapd.service", "jarvis.service"]
+WORDS = ("started stopped session user connection accepted refused timeout error warning "
+         "device interface link up down packet dropped memory pressure disk mounted "
+         "unmounted request response failed succeeded retry backoff listen port").split()
+
+def synthetic_entries(count: int, seed: int = 1):
+    rng = random.Random(seed)
+    start = time.time() - count * 0.01
+    for i in range(count):
+        words = " ".join(rng.choice(WORDS) for _ in range(rng.randint(4, 12)))
+        message = f"{words} id={rng.randint(1, 50000)} from 10.0.{rng.randint(0, 255)}.{rng.randint(1, 254)}"
+        # Skewed like real logs: mostly info, few errors
+        priority = rng.choices(range(8), weights=(1, 1, 2, 20, 40, 80, 600, 256))[0]
+        yield make_entry(start + i * 0.01, message, priority, rng.choice(UNITS), "jarvis-host")
+
+def timed_ms(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best * 1000
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--lines", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--memory", action="store_true", help="trace peak memory (slows ingest several times)")
+    args = parser.parse_args()
+
+    if args.memory:
+        tracemalloc.start()
+    store = LogStore(capacity=args.lines)
+    batch = []
+    started = time.perf_counter()
+    for entry in synthetic_entries(args.lines):
+        batch.append(entry)
+        if len(batch) == 500:
+            store.add(batch)
+            batch = []
+    store.add(batch)
+    elapsed = time.perf_counter() - started
+    print(f"ingested {args.lines} lines in {elapsed:.1f}s ({args.lines / elapsed:,.0f} lines/s), "
+          f"{len(store.by_token)} distinct tokens")
+    if args.memory:
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print(f"peak traced memory {peak / 2**20:.0f} MiB")
+
+    newest = store.entry(store.next_seq - 1)["epoch"]
+    page = store.search("error", limit=100)
+    queries = {
+        "q=error": lambda: store.search("error"),
+        "q=disk mounted": lambda: store.search("disk mounted"),
+        "q=10.0.17.42": lambda: store.search("10.0.17.42"),
+        "q=id=4242 (rare)": lambda: store.search("4242"),
+        "q=nomatch": lambda: store.search("zzzz"),
+        "unit=sshd.service": lambda: store.search(unit="sshd.service"),
+        "priority=err": lambda: store.search(priority=3),
+        "q=failed unit=kernel prio<=3": lambda: store.search("failed", unit="kernel", priority=3),
+        "q=retr*": lambda: store.search("retr*"),
+        "since=newest-60s": lambda: store.search(since=newest - 60, limit=1000),
+        "page 2 of q=error": lambda: store.search("error", cursor=page["next_cursor"]),
+    }
+    print(f"{'query':<32}{'best ms':>10}{'hits':>8}{'scanned':>10}")
+    for name, query in queries.items():
+        result = query()
+        print(f"{name:<32}{timed_ms(query, args.repeat):>10.2f}{len(result['logs']):>8}{result['scanned']:>10}")
+
+if __name__ == "__main__":
+    main()
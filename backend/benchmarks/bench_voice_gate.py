@@ -0,0 +1,124 @@
+# backend/benchmarks/bench_voice_gate.py
+"""
+CPU cost and trigger accuracy of the voice gate on the bundled WAV fixtures.
+
+Runs every fixture in fixtures/voice/ through VoiceGate in 200 ms chunks,
+the way VoskStream feeds it, and reports per file:
+- how much CPU the gate itself used, as a share of one core
+- how much of the audio it let through to the full recognizer
+- speech segments found, false triggers (segments with no labelled speech
+  in them) and missed labelled speech
+
+With vosk installed, --model also times the real recognizer on all audio
+against only the gated audio, and --wake adds the wake-word spotter. The
+fixtures contain no real words, so nothing should wake. Run from the
+backend directory:
+
+    python benchmarks/bench_voice_gate.py [--model DIR] [--wake]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import wave
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from voice_gate import FEED, FLUSH, WAKE, WEBRTC_VAD_AVAILABLE, VoiceGate
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "voice")
+RATE = 16000
+CHUNK_BYTES = int(0.2 * RATE) * 2
+
+def read_wav(path: str) -> bytes:
+    with wave.open(path, "rb") as f:
+        assert f.getframerate() == RATE and f.getnchannels() == 1 and f.getsampwidth() == 2, path
+        return f.readframes(f.getnframes())
+
+def run_gate(pcm: bytes, spotter=None):
+    gate = VoiceGate(RATE, spotter=spotter, wake_word="jarvis" if spotter else "")
+    segments, forwarded = [], []
+    start = None
+    cpu = time.process_time()
+    for offset in range(0, len(pcm), CHUNK_BYTES):
+        at = offset / 2 / RATE
+        for action, audio in gate.process(pcm[offset:offset + CHUNK_BYTES]):
+            if action == FEED:
+                forwarded.append(audio)
+                if start is None:
+                    start = at
+            elif action == FLUSH:
+                segments.append((start, at + CHUNK_BYTES / 2 / RATE))
+                start = None
+    cpu = time.process_time() - cpu
+    if start is not None:
+        segments.append((start, len(pcm) / 2 / RATE))
+    return gate, segments, b"".join(forwarded), cpu
+
+def overlaps(a, b) -> bool:
+    return a[0] < b[1] and b[0] < a[1]
+
+def recognizer_cpu(model, pcm: bytes) -> float:
+    import vosk
+    recognizer = vosk.KaldiRecognizer(model, RATE)
+    cpu = time.process_time()
+    for offset in range(0, len(pcm), CHUNK_BYTES):
+        recognizer.AcceptWaveform(pcm[offset:offset + CHUNK_BYTES])
+    recognizer.FinalResult()
+    return time.process_time() - cpu
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", help="a Vosk model directory (needs vosk installed)")
+    parser.add_argument("--wake", action="store_true", help="require the wake word (needs --model)")
+    args = parser.parse_args()
+
+    model = None
+    if args.model:
+        import vosk
+        model = vosk.Model(args.model)
+    with open(os.path.join(FIXTURES, "manifest.json")) as f:
+        manifest = json.load(f)
+
+    print(f"WebRTC VAD {'on' if WEBRTC_VAD_AVAILABLE else 'not installed, energy only'}")
+    totals = {"seconds": 0.0, "cpu": 0.0, "forwarded": 0.0, "false": 0, "missed": 0, "labelled": 0,
+              "asr_all": 0.0, "asr_gated": 0.0}
+    for name, info in manifest.items():
+        pcm = read_wav(os.path.join(FIXTURES, name))
+        seconds = len(pcm) / 2 / RATE
+        spotter = None
+        if args.wake and model is not None:
+            import vosk
+            spotter = vosk.KaldiRecognizer(model, RATE, json.dumps(["jarvis", "[unk]"]))
+        gate, segments, forwarded, cpu = run_gate(pcm, spotter)
+        labels = [tuple(s) for s in info["speech"]]
+        false = sum(1 for s in segments if not any(overlaps(s, label) for label in labels))
+        missed = sum(1 for label in labels if not any(overlaps(s, label) for s in segments))
+        passed = len(forwarded) / 2 / RATE
+        line = (f"  {name:<28} gate CPU {cpu / seconds:6.2%}  passed {passed:4.1f}/{seconds:.1f} s  "
+                f"segments {len(segments)}  false {false}  missed {missed}")
+        if spotter is not None:
+            line += f"  wakes {gate.wakes}"
+        if model is not None:
+            asr_all, asr_gated = recognizer_cpu(model, pcm), recognizer_cpu(model, forwarded)
+            totals["asr_all"] += asr_all
+            totals["asr_gated"] += asr_gated
+            line += f"  ASR CPU {asr_all / seconds:.0%} -> {asr_gated / seconds:.0%}"
+        print(line)
+        totals["seconds"] += seconds
+        totals["cpu"] += cpu
+        totals["forwarded"] += passed
+        totals["false"] += false
+        totals["missed"] += missed
+        totals["labelled"] += len(labels)
+
+    print(f"total: gate CPU {totals['cpu'] / totals['seconds']:.2%} of a core, "
+          f"{totals['forwarded'] / totals['seconds']:.0%} of audio reached the recognizer, "
+          f"{totals['false']} false triggers, {totals['missed']}/{totals['labelled']} labelled segments missed")
+    if model is not None:
+        print(f"recognizer CPU: {totals['asr_all'] / totals['seconds']:.0%} of a core ungated, "
+              f"{totals['asr_gated'] / totals['seconds']:.0%} gated")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+# backend/benchmarks/bench_voice_lag.py
+"""
+Event-loop lag while listening: the old inline Vosk loop against VoskStream.
+
+The old path called the blocking stream.read() and AcceptWaveform on the
+event loop. VoskStream reads and decodes in threads and only hands results
+to the loop. Both run against a paced, microphone-like source and a
+recognizer that spends a fixed fraction of real time per chunk outside the
+GIL, like Vosk's C calls. With vosk installed, --model and --wav run the
+real recognizer on a 16 kHz mono WAV instead. Run from the backend directory:
+
+    python benchmarks/bench_voice_lag.py [--duration 5] [--rtf 0.3] [--model DIR --wav FILE]
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import statistics
+import struct
+import sys
+import time
+import wave
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from voice_service import SAMPLE_RATE, VoskStream
+
+class PacedSource:
+    """Hands out PCM at the rate a microphone would, blocking in read() like PyAudio"""
+
+    def __init__(self, pcm: bytes, sample_rate: int = SAMPLE_RATE, loop_audio: bool = True):
+        self.pcm = pcm
+        self.sample_rate = sample_rate
+        self.loop_audio = loop_audio
+        self.pos = 0
+        self.next_at = time.monotonic()
+
+    def read(self, frames: int) -> bytes:
+        n = frames * 2
+        if self.pos + n > len(self.pcm):
+            if not self.loop_audio:
+                return b""
+            self.pos = 0
+        chunk = self.pcm[self.pos:self.pos + n]
+        self.pos += n
+        self.next_at += frames / self.sample_rate
+        time.sleep(max(0.0, self.next_at - time.monotonic()))
+        return chunk
+
+    def close(self):
+        pass
+
+class StubRecognizer:
+    """Spends rtf x the audio's duration per chunk with the GIL released, and 'hears' a phrase every 2 s"""
+
+    def __init__(self, rtf: float, sample_rate: int = SAMPLE_RATE):
+        self.rtf = rtf
+        self.sample_rate = sample_rate
+        self.heard = 0
+
+    def AcceptWaveform(self, data: bytes) -> bool:
+        time.sleep(len(data) / 2 / self.sample_rate * self.rtf)
+        before = self.heard
+        self.heard += len(data)
+        return self.heard // (4 * self.sample_rate) != before // (4 * self.sample_rate)
+
+    def Result(self):
+        return json.dumps({"text": "what time is it"})
+
+    def PartialResult(self):
+        return json.dumps({"partial": "what time"})
+
+    def FinalResult(self):
+        return json.dumps({"text": ""})
+
+    def Reset(self):
+        pass
+
+def synthetic_pcm(seconds: float, sample_rate: int = SAMPLE_RATE) -> bytes:
+    samples = (int(3000 * math.sin(2 * math.pi * 220 * i / sample_rate)) for i in range(int(seconds * sample_rate)))
+    return struct.pack(f"<{int(seconds * sample_rate)}h", *samples)
+
+async def measure_lag(stop: asyncio.Event, samples: list, tick: float = 0.01):
+    """Record how late a 10 ms timer fires"""
+    loop = asyncio.get_running_loop()
+    while not stop.is_set():
+        expected = loop.time() + tick
+        await asyncio.sleep(tick)
+        samples.append(max(0.0, loop.time() - expected))
+
+async def legacy_listen(source, recognizer, stop: asyncio.Event, phrases: list):
+    """The pre-VoskStream loop: blocking read and decode on the loop, 10 ms sleep between chunks"""
+    while not stop.is_set():
+        data = source.read(4000)
+        if recognizer.AcceptWaveform(data):
+            phrases.append(json.loads(recognizer.Result())["text"])
+        else:
+            json.loads(recognizer.PartialResult())
+        await asyncio.sleep(0.01)
+
+async def stream_listen(source, recognizer, stop: asyncio.Event, phrases: list):
+    stream = VoskStream(recognizer, open_source=lambda: source)
+    stream.start()
+    try:
+        while not stop.is_set():
+            text = await stream.next_phrase(silence_timeout=0.5)
+            if text:
+                phrases.append(text)
+    finally:
+        await asyncio.to_thread(stream.stop)
+
+async def run_scenario(name: str, listen, make_source, make_recognizer, duration: float):
+    stop = asyncio.Event()
+    lag, phrases = [], []
+    tasks = [asyncio.create_task(measure_lag(stop, lag)),
+             asyncio.create_task(listen(make_source(), make_recognizer(), stop, phrases))]
+    await asyncio.sleep(duration)
+    stop.set()
+    await asyncio.gather(*tasks)
+    lag_ms = sorted(x * 1000 for x in lag)
+    p99 = lag_ms[min(len(lag_ms) - 1, int(len(lag_ms) * 0.99))]
+    print(f"  {name:<22} loop lag mean {statistics.mean(lag_ms):6.1f} ms, p99 {p99:6.1f} ms, "
+          f"max {lag_ms[-1]:6.1f} ms; {len(phrases)} phrases")
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--duration", type=float, default=5.0)
+    parser.add_argument("--rtf", type=float, default=0.3, help="stub recognizer cost as a fraction of real time")
+    parser.add_argument("--model", help="a Vosk model directory (needs vosk installed)")
+    parser.add_argument("--wav", help="16 kHz mono 16-bit WAV to feed in place of the synthetic tone")
+    args = parser.parse_args()
+
+    if args.wav:
+        with wave.open(args.wav, "rb") as f:
+            pcm = f.readframes(f.getnframes())
+    else:
+        pcm = synthetic_pcm(4.0)
+    if args.model:
+        import vosk
+        model = vosk.Model(args.model)
+        make_recognizer = lambda: vosk.KaldiRecognizer(model, SAMPLE_RATE)
+        print(f"Real Vosk recognizer, model {args.model}")
+    else:
+        make_recognizer = lambda: StubRecognizer(args.rtf)
+        print(f"Stub recognizer at {args.rtf:.0%} of real time")
+
+    for name, listen in (("inline (old)", legacy_listen), ("VoskStream threads", stream_listen)):
+        await run_scenario(name, listen, lambda: PacedSource(pcm), make_recognizer, args.duration)
+
+if __name__ == "__main__":
+    asyncio.run(main())
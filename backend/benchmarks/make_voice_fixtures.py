@@ -0,0 +1,128 @@
+# backend/benchmarks/make_voice_fixtures.py
+"""
+Regenerates the WAV fixtures in fixtures/voice/ used by bench_voice_gate.py.
+
+Everything is synthesized from a fixed seed so the files are reproducible:
+room tone, hum, keyboard clicks, quiet background babble, and "speech"
+built from a pitched glottal pulse train through vowel formant filters
+with syllable-rate loudness and noisy consonants. It is not intelligible,
+but it has the level, spectrum and rhythm a VAD keys on. manifest.json
+records where each file contains near-field speech. Run from the backend
+directory:
+
+    python benchmarks/make_voice_fixtures.py
+"""
+import json
+import math
+import os
+import random
+import struct
+import wave
+
+RATE = 16000
+OUT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "voice")
+# (F1, F2, F3) in Hz for a few vowels
+VOWELS = [(730, 1090, 2440), (270, 2290, 3010), (530, 1840, 2480), (570, 840, 2410), (300, 870, 2240)]
+
+def resonator(signal, freq, bandwidth):
+    """Two-pole resonant filter"""
+    r = math.exp(-math.pi * bandwidth / RATE)
+    a1, a2 = 2 * r * math.cos(2 * math.pi * freq / RATE), -r * r
+    gain = 1 - r
+    y1 = y2 = 0.0
+    out = []
+    for x in signal:
+        y = gain * x + a1 * y1 + a2 * y2
+        out.append(y)
+        y1, y2 = y, y1
+    return out
+
+def speech(seconds: float, rng: random.Random, level: float = 2500.0):
+    """Syllables of formant-filtered pulses, with noise bursts for consonants"""
+    out = []
+    while len(out) < seconds * RATE:
+        syllable = int(rng.uniform(0.15, 0.28) * RATE)
+        f0 = rng.uniform(100, 150)
+        pulses, phase = [], 0.0
+        for i in range(syllable):
+            phase += (f0 * (1 + 0.05 * math.sin(i / RATE * 2 * math.pi * 3))) / RATE
+            pulses.append(1.0 if phase >= 1 else 0.0)
+            phase %= 1
+        voiced = [0.0] * syllable
+        for formant, bandwidth in zip(rng.choice(VOWELS), (80, 100, 150)):
+            for i, y in enumerate(resonator(pulses, formant, bandwidth)):
+                voiced[i] += y
+        consonant = int(syllable * 0.25)
+        for i in range(syllable):
+            envelope = math.sin(math.pi * i / syllable) ** 0.5
+            sample = voiced[i] * envelope * 40
+            if i < consonant:
+                sample = sample * (i / consonant) + rng.gauss(0, 0.25)
+            out.append(sample)
+        out += [0.0] * int(rng.uniform(0.02, 0.08) * RATE)  # Gap between syllables
+    out = out[:int(seconds * RATE)]
+    rms = math.sqrt(sum(x * x for x in out) / len(out)) or 1.0
+    return [x * level / rms for x in out]
+
+def room(seconds: float, rng: random.Random, level: float = 40.0, hum: float = 0.0):
+    """Brownish fan noise, plus mains hum if asked"""
+    out, state = [], 0.0
+    for i in range(int(seconds * RATE)):
+        state = 0.98 * state + rng.gauss(0, 1)
+        out.append(state * level / 7 + hum * math.sin(2 * math.pi * 50 * i / RATE))
+    return out
+
+def mix(base, other, at: float = 0.0):
+    start = int(at * RATE)
+    for i, x in enumerate(other):
+        if start + i < len(base):
+            base[start + i] += x
+    return base
+
+def clicks(seconds: float, rng: random.Random, per_second: float = 6.0, level: float = 9000.0):
+    out = [0.0] * int(seconds * RATE)
+    t = 0.0
+    while True:
+        t += rng.expovariate(per_second)
+        if t >= seconds:
+            return out
+        start = int(t * RATE)
+        for i in range(int(0.004 * RATE)):
+            if start + i < len(out):
+                out[start + i] += rng.gauss(0, 1) * level * math.exp(-i / 12)
+
+def babble(seconds: float, rng: random.Random, voices: int = 5, level: float = 120.0):
+    out = [0.0] * int(seconds * RATE)
+    for _ in range(voices):
+        mix(out, speech(seconds, rng, level / math.sqrt(voices)))
+    return out
+
+def write(name: str, samples):
+    with wave.open(os.path.join(OUT_DIR, name), "wb") as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(RATE)
+        f.writeframes(struct.pack(f"<{len(samples)}h", *(max(-32768, min(32767, int(x))) for x in samples)))
+
+def main():
+    os.makedirs(OUT_DIR, exist_ok=True)
+    rng = random.Random(23)
+    fixtures = {
+        "silence.wav": (room(5, rng, level=15), []),
+        "room_hum.wav": (room(5, rng, level=150, hum=400), []),
+        "keyboard.wav": (mix(room(5, rng), clicks(5, rng)), []),
+        "distant_chatter.wav": (mix(room(5, rng), babble(5, rng)), []),
+        "command.wav": (mix(room(5, rng, level=60), speech(1.8, rng), at=1.5), [[1.5, 3.3]]),
+        "two_commands_in_noise.wav": (mix(mix(room(8, rng, level=150, hum=200), speech(1.5, rng), at=1.0),
+                                          speech(2.0, rng, level=1800), at=4.5), [[1.0, 2.5], [4.5, 6.5]]),
+    }
+    manifest = {}
+    for name, (samples, segments) in fixtures.items():
+        write(name, samples)
+        manifest[name] = {"speech": segments, "seconds": len(samples) / RATE}
+        print(f"wrote {name}")
+    with open(os.path.join(OUT_DIR, "manifest.json"), "w") as f:
+        json.dump(manifest, f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,218 @@
+# backend/command_executor.py
+"""
+Bounded execution of terminal commands sent over /ws.
+
+Commands run as background tasks so the client's receive loop stays free
+(for cancel_command and everything else). A global semaphore caps how many
+run at once across all clients; each client may also only have a few in
+flight. Every command gets a wall-clock timeout and an output budget, its
+children get rlimits and a lower CPU priority (optionally a systemd scope
+with CPU and memory quotas), and a client's commands are killed when it
+cancels them or disconnects.
+"""
+import asyncio
+import itertools
+import os
+import shlex
+import shutil
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+from fastapi import WebSocket
+
+from connection_manager import ConnectionManager
+from linux_tools import execute_command_async
+from message_codec import encode_message
+
+# Configuration
+MAX_COMMANDS = int(os.environ.get("JARVIS_MAX_COMMANDS", "4"))
+MAX_COMMANDS_PER_CLIENT = int(os.environ.get("JARVIS_MAX_COMMANDS_PER_CLIENT", "2"))
+COMMAND_TIMEOUT = float(os.environ.get("JARVIS_COMMAND_TIMEOUT", "300"))
+COMMAND_MAX_OUTPUT = int(os.environ.get("JARVIS_COMMAND_MAX_OUTPUT", str(16 * 1024 * 1024)))
+# Child resource limits; 0 disables a limit
+COMMAND_NICE = int(os.environ.get("JARVIS_COMMAND_NICE", "10"))
+COMMAND_CPU_SECONDS = int(os.environ.get("JARVIS_COMMAND_CPU_SECONDS", "0"))
+COMMAND_MEMORY_MB = int(os.environ.get("JARVIS_COMMAND_MEMORY_MB", "0"))
+COMMAND_MAX_PROCS = int(os.environ.get("JARVIS_COMMAND_MAX_PROCS", "0"))
+# Run commands in a transient systemd scope with these quotas (e.g. "50%" and "1G")
+COMMAND_CPU_QUOTA = os.environ.get("JARVIS_COMMAND_CPU_QUOTA", "")
+COMMAND_MEMORY_MAX = os.environ.get("JARVIS_COMMAND_MEMORY_MAX", "")
+
+# Why a command ended, as reported in command_finished
+REASON_EXITED = "exited"
+REASON_TIMEOUT = "timeout"
+REASON_OUTPUT_LIMIT = "output_limit"
+REASON_CANCELLED = "cancelled"
+
+def limited(command: str) -> str:
+    """Wrap a command in nice and prlimit carrying the configured priority and rlimits, if any.
+
+    Done in argv rather than a preexec_fn: the backend runs many threads, and
+    running Python code between fork and exec isn't safe then.
+    """
+    wrapper = []
+    rlimits = []
+    if COMMAND_CPU_SECONDS:
+        rlimits.append(f"--cpu={COMMAND_CPU_SECONDS}")
+    if COMMAND_MEMORY_MB:
+        rlimits.append(f"--as={COMMAND_MEMORY_MB * 1024 * 1024}")
+    if COMMAND_MAX_PROCS:
+        # Per-user, so it only bites when the backend runs as a dedicated user
+        rlimits.append(f"--nproc={COMMAND_MAX_PROCS}")
+    if rlimits:
+        if shutil.which("prlimit"):
+            wrapper += ["prlimit", *rlimits]
+        else:
+            print("prlimit not found; running commands without rlimits")
+    if COMMAND_NICE and shutil.which("nice"):
+        wrapper += ["nice", "-n", str(COMMAND_NICE)]
+    if not wrapper:
+        return command
+    return shlex.join([*wrapper, "/bin/sh", "-c", command])
+
+def scoped(command: str) -> str:
+    """Wrap a command in a systemd scope carrying the configured cgroup quotas, if any and available"""
+    properties = []
+    if COMMAND_CPU_QUOTA:
+        properties += ["-p", f"CPUQuota={COMMAND_CPU_QUOTA}"]
+    if COMMAND_MEMORY_MAX:
+        properties += ["-p", f"MemoryMax={COMMAND_MEMORY_MAX}"]
+    if not properties or shutil.which("systemd-run") is None:
+        return command
+    user = ["--user"] if os.geteuid() != 0 else []
+    return shlex.join(["systemd-run", *user, "--scope", "--quiet", *properties, "/bin/sh", "-c", command])
+
+@dataclass
+class RunningCommand:
+    id: str
+    command: str
+    websocket: WebSocket
+    task: Optional[asyncio.Task] = None
+    started: bool = False
+    output_bytes: int = 0
+    reason: Optional[str] = None
+
+class CommandExecutor:
+    """Runs client commands under global and per-client concurrency caps"""
+
+    def __init__(self, manager: ConnectionManager, max_commands: int = MAX_COMMANDS,
+                 max_per_client: int = MAX_COMMANDS_PER_CLIENT):
+        self.manager = manager
+        self.max_per_client = max_per_client
+        self._slots = asyncio.Semaphore(max_commands)
+        self.running: Dict[WebSocket, Dict[str, RunningCommand]] = {}
+        self._ids = itertools.count(1)
+
+    async def _send(self, websocket: WebSocket, message_type: str, data: dict):
+        await self.manager.send_personal_message(encode_message({"type": message_type, "data": data}), websocket)
+
+    async def submit(self, websocket: WebSocket, command: str, command_id: Optional[str] = None):
+        """Start a command in the background; rejects it if the client is at its cap"""
+        commands = self.running.get(websocket, {})
+        command_id = str(command_id) if command_id is not None else f"cmd-{next(self._ids)}"
+        if command_id in commands:
+            await self._send(websocket, "terminal_error", {"command_id": command_id,
+                                                           "error": f"Command id '{command_id}' is already running"})
+            return
+        if len(commands) >= self.max_per_client:
+            await self._send(websocket, "terminal_error", {
+                "command_id": command_id,
+                "error": f"Too many running commands (limit {self.max_per_client}); cancel one first"
+            })
+            return
+        running = RunningCommand(command_id, command, websocket)
+        self.running.setdefault(websocket, {})[command_id] = running
+        running.task = asyncio.create_task(self._run(running))
+
+    async def _run(self, running: RunningCommand):
+        websocket = running.websocket
+        try:
+            if self._slots.locked():
+                await self._send(websocket, "command_queued", {"command_id": running.id, "command": running.command})
+            async with self._slots:
+                running.started = True
+                await self._send(websocket, "command_started", {"command_id": running.id, "command": running.command})
+                exit_code = None
+                try:
+                    exit_code = await asyncio.wait_for(self._stream(running), timeout=COMMAND_TIMEOUT)
+                except asyncio.TimeoutError:
+                    running.reason = REASON_TIMEOUT
+                except asyncio.CancelledError:
+                    running.reason = running.reason or REASON_CANCELLED
+                    raise
+                finally:
+                    # Shielded: the client may be cancelling us, but should still hear how it ended
+                    await asyncio.shield(self._finish(running, exit_code))
+        except asyncio.CancelledError:
+            if not running.started:
+                await self._finish(running, None)
+        except Exception as e:
+            await self._send(websocket, "terminal_error", {"command_id": running.id,
+                                                           "error": f"Error executing command '{running.command}': {e}"})
+        finally:
+            commands = self.running.get(websocket)
+            if commands is not None:
+                commands.pop(running.id, None)
+                if not commands:
+                    self.running.pop(websocket, None)
+
+    async def _stream(self, running: RunningCommand) -> Optional[int]:
+        """Forward output frames; returns the exit code, or None if stopped early"""
+        seq = 0
+        frames = execute_command_async(scoped(limited(running.command)))
+        try:
+            async for frame in frames:
+                if frame["stream"] == "exit":
+                    if frame["output"]:
+                        seq += 1
+                        await self._send(running.websocket, "terminal_output",
+                                         {**frame, "seq": seq, "command_id": running.id})
+                    running.reason = REASON_EXITED
+                    return frame["exit_code"]
+                # Raw bytes from the pipe, not decoded characters
+                running.output_bytes += frame.get("bytes", 0)
+                seq += 1
+                # send_personal_message waits while the client's queue is full, which in turn
+                # stops us pulling output and lets the command block on its pipes
+                await self._send(running.websocket, "terminal_output", {**frame, "seq": seq, "command_id": running.id})
+                if running.output_bytes > COMMAND_MAX_OUTPUT:
+                    running.reason = REASON_OUTPUT_LIMIT
+                    return None
+        finally:
+            # Kills the command's process group if it's still running
+            await frames.aclose()
+        return None
+
+    async def _finish(self, running: RunningCommand, exit_code: Optional[int]):
+        messages = {
+            REASON_TIMEOUT: f"Command '{running.command}' timed out after {COMMAND_TIMEOUT:.0f}s and was killed.",
+            REASON_OUTPUT_LIMIT: f"Command '{running.command}' exceeded {COMMAND_MAX_OUTPUT} bytes of output and was killed.",
+            REASON_CANCELLED: f"Command '{running.command}' cancelled.",
+        }
+        await self._send(running.websocket, "terminal_output", {
+            "command_id": running.id,
+            "stream": "status",
+            "output": messages.get(running.reason, f"\r\nCommand '{running.command}' executed.")
+        })
+        await self._send(running.websocket, "command_finished", {
+            "command_id": running.id,
+            "exit_code": exit_code,
+            "reason": running.reason,
+            "output_bytes": running.output_bytes
+        })
+
+    def cancel(self, websocket: WebSocket, command_id: Optional[str] = None) -> int:
+        """Cancel one of a client's commands, or all of them; returns how many were cancelled"""
+        commands = self.running.get(websocket, {})
+        targets = [commands[command_id]] if command_id in commands else (list(commands.values()) if command_id is None else [])
+        for running in targets:
+            running.reason = REASON_CANCELLED
+            running.task.cancel()
+        return len(targets)
+
+    async def cancel_all(self, websocket: WebSocket):
+        """The client disconnected: kill everything it started and wait for the children to go"""
+        tasks = [running.task for running in self.running.get(websocket, {}).values()]
+        self.cancel(websocket)
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
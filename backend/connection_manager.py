@@ -0,0 +1,223 @@
+# backend/connection_manager.py
+import asyncio
+import os
+from collections import deque
+from typing import Deque, Dict, Iterable, List, Optional, Tuple
+
+from fastapi import WebSocket
+
+from delta_stream import DeltaStream
+from message_codec import DEFAULT_ENCODING, EncodedMessage
+
+# What to do when a client's outbound queue is full
+POLICY_DROP_OLDEST = "drop_oldest"   # discard the oldest queued frame
+POLICY_COALESCE = "coalesce"         # drop the oldest queued frame of the same type, else drop oldest
+POLICY_DISCONNECT = "disconnect"     # evict the client
+QUEUE_FULL_POLICIES = (POLICY_DROP_OLDEST, POLICY_COALESCE, POLICY_DISCONNECT)
+
+# Configuration
+CLIENT_QUEUE_SIZE = int(os.environ.get("JARVIS_CLIENT_QUEUE_SIZE", "64"))
+QUEUE_FULL_POLICY = os.environ.get("JARVIS_QUEUE_FULL_POLICY", POLICY_COALESCE)
+SEND_TIMEOUT = float(os.environ.get("JARVIS_SEND_TIMEOUT", "10"))
+
+# Close code sent to evicted slow consumers ("try again later")
+SLOW_CONSUMER_CLOSE_CODE = 1013
+
+class ClientConnection:
+    """One WebSocket client with its own bounded outbound queue and writer task"""
+
+    def __init__(self, websocket: WebSocket, manager: "ConnectionManager",
+                 max_queue: int = CLIENT_QUEUE_SIZE, policy: str = QUEUE_FULL_POLICY,
+                 encoding: str = DEFAULT_ENCODING, delta: bool = False):
+        if policy not in QUEUE_FULL_POLICIES:
+            raise ValueError(f"Unknown queue policy '{policy}', expected one of {QUEUE_FULL_POLICIES}")
+        self.websocket = websocket
+        self.manager = manager
+        self.max_queue = max_queue
+        self.policy = policy
+        self.encoding = encoding
+        self.delta = delta
+        # Last seq queued per delta stream; missing means the next frame must be a keyframe
+        self.stream_seq: Dict[str, int] = {}
+        self.closed = False
+        self.dropped = 0
+        # (frame, droppable): frames queued with put() are replies this client asked for and are never dropped
+        self._queue: Deque[Tuple[EncodedMessage, bool]] = deque()
+        self._has_items = asyncio.Event()
+        self._has_space = asyncio.Event()
+        self._has_space.set()
+        self._writer: Optional[asyncio.Task] = None
+
+    def start(self):
+        self._writer = asyncio.create_task(self._write_loop())
+
+    def close(self):
+        """Stop the writer and release anyone waiting for queue space"""
+        if self.closed:
+            return
+        self.closed = True
+        self._queue.clear()
+        self._has_space.set()
+        if self._writer and self._writer is not asyncio.current_task():
+            self._writer.cancel()
+
+    def offer(self, message: EncodedMessage) -> bool:
+        """Queue a frame without waiting. Returns False if the client must be evicted."""
+        if self.closed:
+            return False
+        if len(self._queue) >= self.max_queue:
+            if self.policy == POLICY_DISCONNECT:
+                return False
+            self.dropped += 1
+            if self.policy == POLICY_COALESCE and message.type is not None and message.droppable:
+                same = next((i for i, (queued, droppable) in enumerate(self._queue)
+                             if droppable and queued.type == message.type), None)
+                if same is not None:
+                    self._coalesce(same, message)
+                    return True
+            victim = next((i for i, (queued, droppable) in enumerate(self._queue) if droppable), None)
+            if victim is None:
+                # Everything queued must be delivered; drop the newcomer instead
+                if message.stream:
+                    self.stream_seq.pop(message.stream, None)
+                return True
+            dropped, _ = self._queue[victim]
+            del self._queue[victim]
+            if dropped.stream:
+                self.stream_seq.pop(dropped.stream, None)
+        self._enqueue(message, message.droppable)
+        return True
+
+    def _coalesce(self, index: int, message: EncodedMessage):
+        """Replace a queued frame with a newer one of the same type, keeping its place in the queue"""
+        self._queue[index] = (message, True)
+        if not message.stream:
+            return
+        if message.type == message.stream:
+            # A keyframe is the whole value: any later deltas of its stream are already in it
+            for i in range(len(self._queue) - 1, index, -1):
+                queued, droppable = self._queue[i]
+                if droppable and queued.stream == message.stream:
+                    del self._queue[i]
+        else:
+            # This delta's base was the frame it replaced, so the client needs a keyframe next
+            self.stream_seq.pop(message.stream, None)
+
+    async def put(self, message: EncodedMessage):
+        """Queue a frame, waiting for space instead of dropping anything; a full queue never drops it later"""
+        while not self.closed and len(self._queue) >= self.max_queue:
+            self._has_space.clear()
+            await self._has_space.wait()
+        if not self.closed:
+            self._enqueue(message, False)
+
+    def _enqueue(self, message: EncodedMessage, droppable: bool):
+        self._queue.append((message, droppable))
+        self._has_items.set()
+        if len(self._queue) >= self.max_queue:
+            self._has_space.clear()
+
+    async def _write_loop(self):
+        while not self.closed:
+            if not self._queue:
+                self._has_items.clear()
+                await self._has_items.wait()
+                continue
+            message, _ = self._queue.popleft()
+            self._has_space.set()
+            try:
+                frame = message.frame(self.encoding)
+                if isinstance(frame, bytes):
+                    send = self.websocket.send_bytes(frame)
+                else:
+                    send = self.websocket.send_text(frame)
+                await asyncio.wait_for(send, timeout=SEND_TIMEOUT)
+            except asyncio.TimeoutError:
+                print(f"Client send timed out after {SEND_TIMEOUT}s, evicting slow consumer")
+                self.manager.evict(self.websocket)
+                return
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Error sending to client: {e}")
+                self.manager.disconnect(self.websocket)
+                return
+
+# WebSocket connection manager
+class ConnectionManager:
+    def __init__(self, max_queue: int = CLIENT_QUEUE_SIZE, policy: str = QUEUE_FULL_POLICY):
+        self.max_queue = max_queue
+        self.policy = policy
+        self.clients: Dict[WebSocket, ClientConnection] = {}
+
+    @property
+    def active_connections(self) -> List[WebSocket]:
+        return list(self.clients)
+
+    async def connect(self, websocket: WebSocket, encoding: str = DEFAULT_ENCODING, delta: bool = False):
+        await websocket.accept()
+        client = ClientConnection(websocket, self, self.max_queue, self.policy, encoding, delta)
+        self.clients[websocket] = client
+        client.start()
+        print(f"Client connected. Total connections: {len(self.clients)}")
+
+    def disconnect(self, websocket: WebSocket):
+        client = self.clients.pop(websocket, None)
+        if client:
+            client.close()
+        print(f"Client disconnected. Total connections: {len(self.clients)}")
+
+    def evict(self, websocket: WebSocket):
+        """Drop a client that can't keep up and close its socket in the background"""
+        if websocket not in self.clients:
+            return
+        self.disconnect(websocket)
+        asyncio.create_task(self._close_quietly(websocket))
+
+    async def _close_quietly(self, websocket: WebSocket):
+        try:
+            await websocket.close(code=SLOW_CONSUMER_CLOSE_CODE)
+        except Exception:
+            pass  # Already gone
+
+    async def send_personal_message(self, message: EncodedMessage, websocket: WebSocket):
+        client = self.clients.get(websocket)
+        if client:
+            await client.put(message)
+
+    def _targets(self, websockets: Optional[Iterable[WebSocket]]) -> List[ClientConnection]:
+        if websockets is None:
+            return list(self.clients.values())
+        return [self.clients[ws] for ws in websockets if ws in self.clients]
+
+    async def broadcast(self, message: EncodedMessage, websockets: Optional[Iterable[WebSocket]] = None):
+        """Enqueue one encoded message for every client (or just websockets); never waits on a socket"""
+        evicted = [client.websocket for client in self._targets(websockets) if not client.offer(message)]
+        for ws in evicted:
+            print("Client outbound queue full, evicting slow consumer")
+            self.evict(ws)
+
+    async def send_keyframes(self, websocket: WebSocket, streams: List[DeltaStream]):
+        """Bring a newly connected client up to date with the current value of each stream"""
+        client = self.clients.get(websocket)
+        if not client:
+            return
+        for stream in streams:
+            if stream.keyframe is not None:
+                client.stream_seq[stream.message_type] = stream.seq
+                await client.put(stream.keyframe)
+
+    async def broadcast_stream(self, stream: DeltaStream, websockets: Optional[Iterable[WebSocket]] = None):
+        """Send a stream's latest frame: a delta to in-sync delta clients, the keyframe to everyone else"""
+        evicted = []
+        for client in self._targets(websockets):
+            name = stream.message_type
+            in_sync = client.stream_seq.get(name) == stream.seq - 1
+            message = stream.delta if (client.delta and in_sync and stream.delta is not None) else stream.keyframe
+            # Record first: offer() forgets the seq again if it has to drop a frame of this stream
+            client.stream_seq[name] = stream.seq
+            if not client.offer(message):
+                evicted.append(client.websocket)
+        for ws in evicted:
+            print("Client outbound queue full, evicting slow consumer")
+            self.evict(ws)
@@ -0,0 +1,80 @@
+# backend/delta_stream.py
+"""
+Keyframe + delta encoding for periodic state streams.
+
+A stream publishes a full keyframe ("system_stats", "network_update") and,
+between keyframes, a "<type>_delta" message holding only what changed since
+the previous sequence number. Both carry "seq"; a delta also carries "base",
+the seq it applies on top of. Clients that opt in with /ws?delta=1 receive
+deltas while they are in sync and keyframes otherwise.
+"""
+import os
+from typing import Callable, Optional
+
+from message_codec import EncodedMessage
+
+# Send a full keyframe to everyone at least this often, for resync
+KEYFRAME_INTERVAL = int(os.environ.get("JARVIS_KEYFRAME_INTERVAL", "30"))
+
+def diff_system_stats(prev: dict, cur: dict) -> dict:
+    """Changed scalar fields plus network counter increments"""
+    changed = {key: value for key, value in cur.items()
+               if key != "network" and prev.get(key) != value}
+    prev_net = prev.get("network", {})
+    counters = {key: value - prev_net.get(key, 0)
+                for key, value in cur.get("network", {}).items()
+                if value != prev_net.get(key, 0)}
+    return {"changed": changed, "counters": counters}
+
+def connection_key(conn: dict) -> str:
+    """Identity of a connection across ticks"""
+    return f"{conn.get('local_address')}|{conn.get('remote_address')}|{conn.get('pid')}"
+
+def diff_network_update(prev: dict, cur: dict) -> dict:
+    """Interface changes and connections added/removed since the previous tick"""
+    prev_ifaces = prev.get("interfaces", {})
+    cur_ifaces = cur.get("interfaces", {})
+    interfaces = {name: addrs for name, addrs in cur_ifaces.items() if prev_ifaces.get(name) != addrs}
+    interfaces_removed = [name for name in prev_ifaces if name not in cur_ifaces]
+
+    prev_conns = {connection_key(c): c for c in prev.get("connections", [])}
+    cur_conns = {connection_key(c): c for c in cur.get("connections", [])}
+    added = [conn for key, conn in cur_conns.items() if prev_conns.get(key) != conn]
+    removed = [key for key in prev_conns if key not in cur_conns]
+
+    return {
+        "interfaces": interfaces,
+        "interfaces_removed": interfaces_removed,
+        "connections_added": added,
+        "connections_removed": removed,
+        "timestamp": cur.get("timestamp")
+    }
+
+class DeltaStream:
+    """Tracks the last published value of one stream and builds its frames"""
+
+    def __init__(self, message_type: str, diff: Callable[[dict, dict], dict],
+                 keyframe_interval: int = KEYFRAME_INTERVAL):
+        self.message_type = message_type
+        self.diff = diff
+        self.keyframe_interval = max(1, keyframe_interval)
+        self.seq = 0
+        self.keyframe: Optional[EncodedMessage] = None
+        self.delta: Optional[EncodedMessage] = None
+        self._last: Optional[dict] = None
+
+    def update(self, data: dict):
+        """Publish a new value; afterwards keyframe is always set, delta only between keyframes"""
+        self.seq += 1
+        self.keyframe = EncodedMessage({"type": self.message_type, "data": data, "seq": self.seq},
+                                       stream=self.message_type)
+        if self._last is None or self.seq % self.keyframe_interval == 0:
+            self.delta = None
+        else:
+            self.delta = EncodedMessage({
+                "type": f"{self.message_type}_delta",
+                "data": self.diff(self._last, data),
+                "seq": self.seq,
+                "base": self.seq - 1
+            }, stream=self.message_type)
+        self._last = data
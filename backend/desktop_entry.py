@@ -0,0 +1,284 @@
+# backend/desktop_entry.py
+"""
+Desktop Entry (.desktop) parsing, following the freedesktop.org spec.
+
+Only the [Desktop Entry] group is read, so keys in [Desktop Action ...]
+groups can't leak into the main entry. Values are unescaped, localized
+keys (Name[de_DE]) are resolved for the server's locale, Exec is split
+with the spec's quoting rules and its field codes are expanded or
+dropped, and entries are hidden when their TryExec isn't installed or
+OnlyShowIn/NotShowIn exclude the current desktop. TryExec lookups go
+through a PATH listing that is only re-read when a PATH directory changes.
+Many files can be parsed at once across a thread pool.
+"""
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Configuration
+PARSE_WORKERS = int(os.environ.get("JARVIS_APP_PARSE_WORKERS", str(min(8, os.cpu_count() or 1))))
+# Below this many files a thread pool costs more than it saves
+PARSE_BATCH_MIN = 32
+# Desktops for OnlyShowIn/NotShowIn; the backend often runs outside the session, so allow an override
+CURRENT_DESKTOPS = [d for d in (os.environ.get("JARVIS_CURRENT_DESKTOP")
+                                or os.environ.get("XDG_CURRENT_DESKTOP") or "").split(":") if d]
+
+MAIN_GROUP = "Desktop Entry"
+_ESCAPES = {"s": " ", "n": "\n", "t": "\t", "r": "\r", "\\": "\\"}
+# Characters that must be backslash-escaped inside a quoted Exec argument
+_EXEC_QUOTED_ESCAPES = '"`$\\'
+# Field codes that expand to files or URLs, or are deprecated; a launcher with nothing to open drops them
+_DROPPED_FIELD_CODES = set("fFuUdDnNvm")
+
+def locale_variants(locale: Optional[str] = None) -> List[str]:
+    """Key suffixes to try for a locale, most specific first: lang_COUNTRY@MODIFIER, lang_COUNTRY, lang@MODIFIER, lang"""
+    if locale is None:
+        locale = os.environ.get("LC_ALL") or os.environ.get("LC_MESSAGES") or os.environ.get("LANG") or ""
+    locale, _, modifier = locale.partition("@")
+    locale = locale.split(".")[0]
+    if not locale or locale in ("C", "POSIX"):
+        return []
+    lang, _, country = locale.partition("_")
+    variants = []
+    if country and modifier:
+        variants.append(f"{lang}_{country}@{modifier}")
+    if country:
+        variants.append(f"{lang}_{country}")
+    if modifier:
+        variants.append(f"{lang}@{modifier}")
+    variants.append(lang)
+    return variants
+
+LOCALES = locale_variants()
+
+def unescape(value: str) -> str:
+    """Undo the spec's string escapes (\\s, \\n, \\t, \\r, \\\\)"""
+    if "\\" not in value:
+        return value
+    out = []
+    chars = iter(value)
+    for ch in chars:
+        if ch == "\\":
+            nxt = next(chars, "")
+            out.append(_ESCAPES.get(nxt, "\\" + nxt))
+        else:
+            out.append(ch)
+    return "".join(out)
+
+def split_list(value: str) -> List[str]:
+    """A ';'-separated list value, where '\\;' is a literal semicolon"""
+    items, current = [], []
+    chars = iter(value)
+    for ch in chars:
+        if ch == "\\":
+            nxt = next(chars, "")
+            current.append(";" if nxt == ";" else _ESCAPES.get(nxt, "\\" + nxt))
+        elif ch == ";":
+            items.append("".join(current))
+            current = []
+        else:
+            current.append(ch)
+    if current:
+        items.append("".join(current))
+    return [item for item in items if item]
+
+def read_main_group(lines: Iterable[str]) -> Dict[str, str]:
+    """Raw key=value pairs of the [Desktop Entry] group, localized keys included; the first of a duplicate key wins"""
+    entries: Dict[str, str] = {}
+    in_main = False
+    for line in lines:
+        line = line.strip()
+        if not line or line[0] == "#":
+            continue
+        if line[0] == "[":
+            if in_main:
+                break  # The main group is over; everything after it belongs to actions
+            in_main = line == f"[{MAIN_GROUP}]"
+            continue
+        if in_main:
+            key, sep, value = line.partition("=")
+            if sep:
+                entries.setdefault(key.strip(), value.strip())
+    return entries
+
+def localized(entries: Dict[str, str], key: str, locales: List[str] = LOCALES) -> Optional[str]:
+    for variant in locales:
+        value = entries.get(f"{key}[{variant}]")
+        if value is not None:
+            return value
+    return entries.get(key)
+
+def parse_exec(value: str) -> List[str]:
+    """Split an (already unescaped) Exec value into arguments; raises ValueError on bad quoting"""
+    args: List[str] = []
+    current: List[str] = []
+    has_arg = in_quotes = False
+    i, n = 0, len(value)
+    while i < n:
+        ch = value[i]
+        if in_quotes:
+            if ch == "\\" and i + 1 < n and value[i + 1] in _EXEC_QUOTED_ESCAPES:
+                current.append(value[i + 1])
+                i += 1
+            elif ch == '"':
+                in_quotes = False
+            else:
+                current.append(ch)
+        elif ch == '"':
+            in_quotes = has_arg = True
+        elif ch in " \t":
+            if has_arg:
+                args.append("".join(current))
+                current, has_arg = [], False
+        else:
+            current.append(ch)
+            has_arg = True
+        i += 1
+    if in_quotes:
+        raise ValueError("unterminated quote in Exec")
+    if has_arg:
+        args.append("".join(current))
+    return args
+
+def expand_field_codes(args: List[str], name: str = "", icon: str = "", path: str = "") -> List[str]:
+    """Expand %c, %k, %i and %%; drop file/URL and deprecated codes, since nothing is being opened"""
+    expanded = []
+    for arg in args:
+        if arg == "%i":
+            if icon:
+                expanded += ["--icon", icon]
+            continue
+        if len(arg) == 2 and arg[0] == "%" and arg[1] in _DROPPED_FIELD_CODES:
+            continue
+        if "%" not in arg:
+            expanded.append(arg)
+            continue
+        out = []
+        i = 0
+        while i < len(arg):
+            if arg[i] == "%" and i + 1 < len(arg):
+                code = arg[i + 1]
+                out.append({"%": "%", "c": name, "k": path}.get(code, ""))
+                i += 2
+            else:
+                out.append(arg[i])
+                i += 1
+        expanded.append("".join(out))
+    return expanded
+
+class ExecutableLookup:
+    """Which names are executable on PATH, re-listed only when PATH or one of its directories changes"""
+
+    def __init__(self):
+        self._key: Optional[Tuple] = None
+        self._paths: Dict[str, str] = {}
+
+    def _current_key(self) -> Tuple:
+        key = []
+        for directory in os.environ.get("PATH", os.defpath).split(os.pathsep):
+            try:
+                key.append((directory, os.stat(directory).st_mtime_ns))
+            except OSError:
+                key.append((directory, None))
+        return tuple(key)
+
+    def refresh(self):
+        """Re-list PATH if it changed; call once before a batch of lookups"""
+        key = self._current_key()
+        if key == self._key:
+            return
+        paths: Dict[str, str] = {}
+        for directory, mtime in key:
+            if mtime is None:
+                continue
+            try:
+                with os.scandir(directory) as it:
+                    for entry in it:
+                        # Earlier PATH entries win, like the shell
+                        paths.setdefault(entry.name, entry.path)
+            except OSError:
+                continue
+        self._paths = paths
+        self._key = key
+
+    def exists(self, program: str) -> bool:
+        if self._key is None:
+            self.refresh()
+        path = program if os.sep in program else self._paths.get(program)
+        return path is not None and os.path.isfile(path) and os.access(path, os.X_OK)
+
+executables = ExecutableLookup()
+
+def _category(categories: List[str]) -> str:
+    # Map common categories to simpler ones for frontend
+    if 'Utility' in categories or 'System' in categories:
+        return 'system'
+    elif 'Network' in categories or 'Internet' in categories:
+        return 'network'
+    elif 'Security' in categories or 'Development' in categories:  # Broadly categorize dev tools as security for demo
+        return 'security'
+    return 'system'  # Default
+
+def parse_desktop_entry(filepath: str, locales: List[str] = LOCALES,
+                        desktops: List[str] = CURRENT_DESKTOPS) -> Optional[dict]:
+    """The Launcher's view of a .desktop file, or None if it isn't a visible, runnable application"""
+    try:
+        with open(filepath, "r", encoding="utf-8", errors="replace") as f:
+            entries = read_main_group(f)
+    except OSError as e:
+        print(f"Error parsing .desktop file {filepath}: {e}")
+        return None
+
+    if entries.get("Type", "Application") != "Application":
+        return None
+    if entries.get("NoDisplay") == "true" or entries.get("Hidden") == "true":
+        return None
+    only_show_in = split_list(entries.get("OnlyShowIn", ""))
+    if only_show_in and not any(d in only_show_in for d in desktops):
+        return None
+    not_show_in = split_list(entries.get("NotShowIn", ""))
+    if any(d in not_show_in for d in desktops):
+        return None
+    try_exec = entries.get("TryExec")
+    if try_exec and not executables.exists(unescape(try_exec)):
+        return None
+
+    name = localized(entries, "Name", locales)
+    exec_value = entries.get("Exec")
+    if not name or not exec_value:
+        return None
+    name = unescape(name)
+    icon = unescape(entries.get("Icon", ""))
+    try:
+        command = expand_field_codes(parse_exec(unescape(exec_value)), name, icon, filepath)
+    except ValueError as e:
+        print(f"Error parsing .desktop file {filepath}: {e}")
+        return None
+    if not command:
+        return None
+
+    app_data = {
+        'name': name,
+        'executable': command[0],
+        'command': command,
+        'category': _category(split_list(entries.get("Categories", ""))),
+        'icon': icon or 'Terminal',  # Default to terminal icon (frontend will map this)
+    }
+    generic_name = localized(entries, "GenericName", locales)
+    if generic_name:
+        app_data['generic_name'] = unescape(generic_name)
+    keywords = localized(entries, "Keywords", locales)
+    if keywords:
+        app_data['keywords'] = split_list(keywords)
+    if name != entries.get("Name"):
+        # Keep the untranslated name searchable too
+        app_data['untranslated_name'] = unescape(entries.get("Name", ""))
+    return app_data
+
+def parse_desktop_files(paths: List[str], workers: int = PARSE_WORKERS) -> Dict[str, Optional[dict]]:
+    """Parse many .desktop files, across a thread pool when there are enough of them"""
+    executables.refresh()
+    if workers <= 1 or len(paths) < PARSE_BATCH_MIN:
+        return {path: parse_desktop_entry(path) for path in paths}
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="desktop-parse") as pool:
+        return dict(zip(paths, pool.map(parse_desktop_entry, paths)))
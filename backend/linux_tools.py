@@ -1,12 +1,41 @@
 # backend/linux_tools.py
 import asyncio
+import codecs
 import subprocess
 import os
+import signal
 
 # --- Command Execution ---
-async def execute_command_async(command: str):
+# Output is coalesced into frames of up to OUTPUT_FRAME_BYTES, flushed at least every OUTPUT_FRAME_DELAY seconds
+OUTPUT_FRAME_BYTES = int(os.environ.get("JARVIS_OUTPUT_FRAME_BYTES", str(16 * 1024)))
+OUTPUT_FRAME_DELAY = float(os.environ.get("JARVIS_OUTPUT_FRAME_DELAY", "0.03"))
+PIPE_READ_SIZE = 64 * 1024
+# Chunks buffered between the pipe readers and the consumer; when full the readers stop
+# reading, the pipes fill up and the child blocks on write
+PIPE_QUEUE_CHUNKS = 16
+
+async def _read_pipe(stream_name: str, pipe: asyncio.StreamReader, queue: asyncio.Queue):
+    try:
+        while True:
+            chunk = await pipe.read(PIPE_READ_SIZE)
+            if not chunk:
+                break
+            await queue.put((stream_name, chunk))
+    except (OSError, ValueError) as e:
+        print(f"Error reading command {stream_name}: {e}")
+    # None marks the end of this stream
+    await queue.put((stream_name, None))
+
+async def execute_command_async(command: str, frame_bytes: int = OUTPUT_FRAME_BYTES,
+                                frame_delay: float = OUTPUT_FRAME_DELAY):
     """
-    Executes a shell command asynchronously and yields its output line by line.
+    Executes a shell command asynchronously and yields its output in frames.
+    Each frame is {"stream": "stdout" | "stderr", "output": text, "bytes": raw size}; the last one is
+    {"stream": "exit", "exit_code": code, "output": message}.
+    stdout and stderr are read concurrently in raw chunks, and consecutive chunks
+    of one stream are coalesced by size and time, in arrival order. The consumer
+    sets the pace: while it isn't pulling frames the pipes fill up and the
+    command blocks. Closing the generator early kills the command.
     For security, consider whitelisting commands or using a more secure method.
     """
     print(f"Executing command: {command}")
@@ -16,123 +45,88 @@ async def execute_command_async(command: str):
             command,
             stdout=subprocess.PIPE,
             stderr=subprocess.PIPE,
-            shell=True # Be cautious with shell=True in production
+            # Own process group, so the whole pipeline can be killed at once
+            start_new_session=True
         )
-
-        # Read stdout line by line
-        while True:
-            line = await process.stdout.readline()
-            if not line:
-                break
-            yield line.decode().strip()
-
-        # Read stderr line by line (after stdout is exhausted)
-        while True:
-            line = await process.stderr.readline()
-            if not line:
-                break
-            yield f"ERROR: {line.decode().strip()}"
-
-        # Wait for the process to finish and get return code
-        await process.wait()
-        if process.returncode != 0:
-            yield f"Command exited with code {process.returncode}"
-
     except FileNotFoundError:
-        yield f"Error: Command '{command.split()[0]}' not found."
+        yield {"stream": "exit", "exit_code": 127, "output": f"Error: Command '{command.split()[0]}' not found."}
+        return
     except Exception as e:
-        yield f"An unexpected error occurred: {e}"
-
-# --- Application Discovery ---
-def get_installed_applications():
-    """
-    Attempts to find installed applications on a Linux system by parsing .desktop files.
-    Returns a list of dictionaries with app details.
-    This is a simplified implementation and might not find all apps or categories correctly.
-    """
-    app_paths = [
-        '/usr/share/applications/',
-        '/usr/local/share/applications/',
-        os.path.expanduser('~/.local/share/applications/')
-    ]
-    applications = []
-    found_executables = set() # To avoid duplicates
+        yield {"stream": "exit", "exit_code": -1, "output": f"An unexpected error occurred: {e}"}
+        return
 
-    for path in app_paths:
-        if not os.path.exists(path):
-            continue
+    queue: asyncio.Queue = asyncio.Queue(maxsize=PIPE_QUEUE_CHUNKS)
+    readers = [asyncio.create_task(_read_pipe("stdout", process.stdout, queue)),
+               asyncio.create_task(_read_pipe("stderr", process.stderr, queue))]
+    decoders = {name: codecs.getincrementaldecoder("utf-8")(errors="replace") for name in ("stdout", "stderr")}
+    loop = asyncio.get_running_loop()
+    try:
+        open_pipes = 2
+        pending = None  # a chunk of another stream that ends the current frame
+        while open_pipes:
+            if pending is None:
+                pending = await queue.get()
+            stream_name, chunk = pending
+            pending = None
+            if chunk is None:
+                open_pipes -= 1
+                tail = decoders[stream_name].decode(b"", final=True)
+                if tail:
+                    yield {"stream": stream_name, "output": tail, "bytes": 0}
+                continue
+            parts = [chunk]
+            size = len(chunk)
+            deadline = loop.time() + frame_delay
+            while size < frame_bytes:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    item = queue.get_nowait() if not queue.empty() else await asyncio.wait_for(queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                if item[0] != stream_name or item[1] is None:
+                    pending = item
+                    break
+                parts.append(item[1])
+                size += len(item[1])
+            text = decoders[stream_name].decode(b"".join(parts))
+            if text:
+                yield {"stream": stream_name, "output": text, "bytes": size}
 
-        for filename in os.listdir(path):
-            if filename.endswith('.desktop'):
-                filepath = os.path.join(path, filename)
-                app_info = parse_desktop_file(filepath)
-                if app_info and app_info['executable'] not in found_executables:
-                    applications.append(app_info)
-                    found_executables.add(app_info['executable'])
-    return applications
+        # Wait for the process to finish and get return code
+        await process.wait()
+        message = f"Command exited with code {process.returncode}" if process.returncode != 0 else ""
+        yield {"stream": "exit", "exit_code": process.returncode, "output": message}
+    finally:
+        for reader in readers:
+            reader.cancel()
+        if process.returncode is None:
+            await _kill_process_group(process)
 
-def parse_desktop_file(filepath: str):
-    """Parses a .desktop file and extracts relevant application information."""
-    app_data = {}
+async def _kill_process_group(process: asyncio.subprocess.Process):
     try:
-        with open(filepath, 'r', encoding='utf-8') as f:
-            for line in f:
-                line = line.strip()
-                if line.startswith('Name='):
-                    app_data['name'] = line[len('Name='):]
-                elif line.startswith('Exec='):
-                    # Extract the executable part, ignoring arguments
-                    exec_line = line[len('Exec='):]
-                    app_data['executable'] = exec_line.split(' ')[0].split('%')[0]
-                elif line.startswith('Categories='):
-                    categories = line[len('Categories='):].strip(';').split(';')
-                    # Map common categories to simpler ones for frontend
-                    if 'Utility' in categories or 'System' in categories:
-                        app_data['category'] = 'system'
-                    elif 'Network' in categories or 'Internet' in categories:
-                        app_data['category'] = 'network'
-                    elif 'Security' in categories or 'Development' in categories: # Broadly categorize dev tools as security for demo
-                        app_data['category'] = 'security'
-                    else:
-                        app_data['category'] = 'system' # Default
-                elif line.startswith('Icon='):
-                    app_data['icon'] = line[len('Icon='):] # This would need mapping to Lucide icons or serving actual icons
-                elif line.startswith('NoDisplay=true') or line.startswith('Hidden=true'):
-                    return None # Skip hidden applications
-                elif line.startswith('Type=Application'):
-                    pass # Only process Application types
-    except Exception as e:
-        print(f"Error parsing .desktop file {filepath}: {e}")
-        return None
-
-    # Ensure essential fields are present
-    if 'name' in app_data and 'executable' in app_data:
-        # Provide a default category if not found
-        if 'category' not in app_data:
-            app_data['category'] = 'system'
-        # Provide a default icon if not found (frontend will map this)
-        if 'icon' not in app_data:
-            app_data['icon'] = 'Terminal' # Default to terminal icon
-        return app_data
-    return None
+        os.killpg(process.pid, signal.SIGKILL)
+    except ProcessLookupError:
+        pass
+    try:
+        # Drain what's left so the pipes see EOF; wait() doesn't return until they close
+        await asyncio.wait_for(asyncio.gather(process.stdout.read(), process.stderr.read(), process.wait()),
+                               timeout=5)
+    except asyncio.TimeoutError:
+        print(f"Command {process.pid} still holding its pipes open after kill")
 
 # Example usage (for testing)
 if __name__ == "__main__":
     async def test_command_execution():
         print("--- Testing 'ls -l' ---")
-        async for line in execute_command_async("ls -l"):
-            print(line)
+        async for frame in execute_command_async("ls -l"):
+            print(frame["output"], end="")
         print("\n--- Testing 'echo Hello World' ---")
-        async for line in execute_command_async("echo Hello World"):
-            print(line)
+        async for frame in execute_command_async("echo Hello World"):
+            print(frame["output"], end="")
         print("\n--- Testing 'nonexistent_command' ---")
-        async for line in execute_command_async("nonexistent_command"):
-            print(line)
-
-    # asyncio.run(test_command_execution())
+        async for frame in execute_command_async("nonexistent_command"):
+            print(frame["output"], end="")
 
-    print("\n--- Testing get_installed_applications ---")
-    apps = get_installed_applications()
-    for app in apps[:10]: # Print first 10 apps
-        print(f"Name: {app.get('name')}, Exec: {app.get('executable')}, Category: {app.get('category')}")
-    print(f"Found {len(apps)} applications.")
\ No newline at end of file
+    asyncio.run(test_command_execution())
@@ -0,0 +1,284 @@
+# backend/log_follower.py
+"""
+Live system log feed.
+
+One long-lived `journalctl -f -o json` child streams new journal entries;
+where there is no journal, /var/log/syslog is tailed from a saved byte
+offset instead. Either way each entry is parsed once, with its real
+timestamp, priority, unit and host, and handed to listeners in batches.
+"""
+import asyncio
+import json
+import os
+import re
+import time
+from collections import deque
+from datetime import datetime
+from typing import Awaitable, Callable, Deque, List, Optional, Tuple
+
+# Configuration
+# Entries kept for /api/logs and new subscribers
+LOG_BACKLOG = int(os.environ.get("JARVIS_LOG_BACKLOG", "500"))
+# auto, journal or syslog
+LOG_SOURCE = os.environ.get("JARVIS_LOG_SOURCE", "auto")
+SYSLOG_PATHS = [p for p in os.environ.get("JARVIS_SYSLOG_PATH", "/var/log/syslog:/var/log/messages").split(":") if p]
+SYSLOG_POLL_INTERVAL = float(os.environ.get("JARVIS_SYSLOG_POLL_INTERVAL", "1.0"))
+# On first open (or after a long pause) only the last this-many bytes of syslog are read
+SYSLOG_TAIL_BYTES = 64 * 1024
+RESTART_BACKOFF = 5.0
+READ_CHUNK = 64 * 1024
+
+PRIORITY_NAMES = ("emerg", "alert", "crit", "err", "warning", "notice", "info", "debug")
+
+def make_entry(epoch: float, message: str, priority: Optional[int] = None,
+               unit: Optional[str] = None, host: Optional[str] = None) -> dict:
+    return {
+        "timestamp": datetime.fromtimestamp(epoch).isoformat(),
+        "epoch": epoch,
+        "priority": priority,
+        "level": PRIORITY_NAMES[priority] if priority is not None and 0 <= priority < 8 else None,
+        "unit": unit,
+        "host": host,
+        "message": message
+    }
+
+def _field_text(value) -> str:
+    # journald exports non-UTF-8 fields as arrays of byte values
+    if isinstance(value, list):
+        return bytes(value).decode("utf-8", errors="replace")
+    return "" if value is None else str(value)
+
+def parse_journal_line(line: bytes) -> Tuple[Optional[dict], Optional[str]]:
+    """One `journalctl -o json` record to (entry, journal cursor); (None, None) if it isn't one"""
+    try:
+        record = json.loads(line)
+    except ValueError:
+        return None, None
+    if not isinstance(record, dict):
+        return None, None
+    try:
+        epoch = int(record["__REALTIME_TIMESTAMP"]) / 1_000_000
+    except (KeyError, ValueError):
+        epoch = time.time()
+    try:
+        priority = int(record.get("PRIORITY"))
+    except (TypeError, ValueError):
+        priority = None
+    unit = record.get("_SYSTEMD_UNIT") or record.get("SYSLOG_IDENTIFIER") or record.get("_COMM")
+    entry = make_entry(epoch, _field_text(record.get("MESSAGE")), priority,
+                       _field_text(unit) or None, _field_text(record.get("_HOSTNAME")) or None)
+    return entry, record.get("__CURSOR")
+
+_RFC3164 = re.compile(r"^(?P<ts>[A-Z][a-z]{2} [ \d]\d \d\d:\d\d:\d\d) (?P<host>\S+) (?P<rest>.*)$")
+_RFC3339 = re.compile(r"^(?P<ts>\d{4}-\d\d-\d\dT\d\d:\d\d:\d\d(?:\.\d+)?(?:Z|[+-]\d\d:?\d\d)?) (?P<host>\S+) (?P<rest>.*)$")
+_TAG = re.compile(r"^(?P<tag>[^\s:\[]+)(?:\[\d+\])?: ?(?P<msg>.*)$")
+
+def parse_syslog_line(line: str, now: Optional[float] = None) -> dict:
+    """A classic (Oct 17 12:00:00) or high-precision (RFC 3339) syslog line to an entry"""
+    now = time.time() if now is None else now
+    epoch, host, rest = now, None, line
+    match = _RFC3339.match(line)
+    if match:
+        try:
+            epoch = datetime.fromisoformat(match["ts"].replace("Z", "+00:00")).timestamp()
+            host, rest = match["host"], match["rest"]
+        except ValueError:
+            pass
+    else:
+        match = _RFC3164.match(line)
+        if match:
+            try:
+                # The classic format has no year; a date in the future belongs to last year
+                year = datetime.fromtimestamp(now).year
+                parsed = datetime.strptime(f"{year} {match['ts']}", "%Y %b %d %H:%M:%S")
+                if parsed.timestamp() > now + 86400:
+                    parsed = parsed.replace(year=year - 1)
+                epoch = parsed.timestamp()
+                host, rest = match["host"], match["rest"]
+            except ValueError:
+                pass
+    unit, message = None, rest
+    tagged = _TAG.match(rest)
+    if tagged:
+        unit, message = tagged["tag"], tagged["msg"]
+    return make_entry(epoch, message, None, unit, host)
+
+class SyslogTail:
+    """Reads only the bytes appended to a syslog file since the last call.
+
+    The offset and inode survive between calls; a shrunk file or a new
+    inode means it was rotated, so reading restarts from the top.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.offset: Optional[int] = None
+        self.inode: Optional[int] = None
+        self._partial = b""
+
+    def read_new(self) -> List[dict]:
+        """Entries appended since the last call. Runs in a worker thread."""
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return []
+        if self.inode != stat.st_ino or (self.offset is not None and stat.st_size < self.offset):
+            rotated = self.inode is not None
+            self.inode = stat.st_ino
+            self.offset = 0 if rotated else None
+            self._partial = b""
+        if self.offset == stat.st_size:
+            return []
+        with open(self.path, "rb") as f:
+            start = self.offset or 0
+            skip_partial = False
+            if stat.st_size - start > SYSLOG_TAIL_BYTES:
+                # First open or a long pause: don't replay the whole file
+                start = stat.st_size - SYSLOG_TAIL_BYTES
+                skip_partial = True
+                self._partial = b""
+            f.seek(start)
+            data = f.read(stat.st_size - start)
+        self.offset = start + len(data)
+        lines = (self._partial + data).split(b"\n")
+        self._partial = lines.pop()
+        if skip_partial and lines:
+            lines.pop(0)
+        now = time.time()
+        return [parse_syslog_line(line.decode("utf-8", errors="replace").rstrip("\r"), now)
+                for line in lines if line.strip()]
+
+class LogFollower:
+    """Follows the journal (or syslog) and fans new entries out to listeners"""
+
+    def __init__(self, backlog: int = LOG_BACKLOG):
+        self.recent: Deque[dict] = deque(maxlen=backlog)
+        self.source: Optional[str] = None
+        self._listeners: List[Callable[[List[dict]], Awaitable[None]]] = []
+        self._task: Optional[asyncio.Task] = None
+        self._process: Optional[asyncio.subprocess.Process] = None
+        # Journal cursor of the newest entry seen, so a restart resumes right after it
+        self._cursor: Optional[str] = None
+        self._tail: Optional[SyslogTail] = None
+
+    def latest(self, limit: int = 10) -> List[dict]:
+        if limit <= 0:
+            return []
+        return list(self.recent)[-limit:]
+
+    def add_listener(self, callback: Callable[[List[dict]], Awaitable[None]]):
+        """Register a coroutine called with each batch of new entries"""
+        self._listeners.append(callback)
+
+    async def _dispatch(self, entries: List[dict]):
+        if not entries:
+            return
+        self.recent.extend(entries)
+        for callback in self._listeners:
+            try:
+                await callback(entries)
+            except Exception as e:
+                print(f"Log listener error: {e}")
+
+    async def _journal_available(self) -> bool:
+        """journalctl -f blocks quietly on an empty journal (e.g. in containers), so probe first"""
+        if LOG_SOURCE == "syslog":
+            return False
+        if LOG_SOURCE == "journal":
+            return True
+        try:
+            probe = await asyncio.create_subprocess_exec(
+                "journalctl", "-n", "1", "-o", "json", "--no-pager", "-q",
+                stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.DEVNULL)
+            out, _ = await asyncio.wait_for(probe.communicate(), timeout=5)
+        except (FileNotFoundError, PermissionError, asyncio.TimeoutError):
+            return False
+        return probe.returncode == 0 and bool(out.strip())
+
+    async def _follow_journal(self) -> bool:
+        """Stream journalctl until it exits; False if the journal isn't usable here"""
+        if self._cursor:
+            # Timestamps aren't unique in a burst; the cursor names exactly where we stopped
+            start = [f"--after-cursor={self._cursor}"]
+        else:
+            start = ["-n", str(self.recent.maxlen or 50)]
+        try:
+            self._process = await asyncio.create_subprocess_exec(
+                "journalctl", "-f", "-o", "json", "--no-pager", *start,
+                stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.DEVNULL)
+        except (FileNotFoundError, PermissionError):
+            return False
+        self.source = "journal"
+        received = False
+        partial = b""
+        try:
+            while True:
+                chunk = await self._process.stdout.read(READ_CHUNK)
+                if not chunk:
+                    break
+                received = True
+                lines = (partial + chunk).split(b"\n")
+                partial = lines.pop()
+                entries = []
+                for line in lines:
+                    if not line.strip():
+                        continue
+                    entry, cursor = parse_journal_line(line)
+                    if entry is not None:
+                        entries.append(entry)
+                        self._cursor = cursor or self._cursor
+                await self._dispatch(entries)
+        finally:
+            if self._process.returncode is None:
+                self._process.terminate()
+            await self._process.wait()
+        return received
+
+    async def _follow_syslog(self):
+        path = next((p for p in SYSLOG_PATHS if os.access(p, os.R_OK)), None)
+        if path is None:
+            raise FileNotFoundError("No readable journal or syslog file")
+        if self._tail is None or self._tail.path != path:
+            self._tail = SyslogTail(path)
+        self.source = path
+        while True:
+            await self._dispatch(await asyncio.to_thread(self._tail.read_new))
+            await asyncio.sleep(SYSLOG_POLL_INTERVAL)
+
+    async def _run(self):
+        while True:
+            try:
+                # Probed before every (re)start: journalctl exiting with nothing may only mean
+                # journald was restarting, which shouldn't cost us the journal for good
+                if await self._journal_available():
+                    if await self._follow_journal():
+                        print("journalctl exited; restarting")
+                    else:
+                        print("journalctl exited without output; probing the journal again")
+                else:
+                    if self.source in (None, "journal"):
+                        print("Journal not available, falling back to syslog")
+                    await self._follow_syslog()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Error following system logs: {e}")
+            await asyncio.sleep(RESTART_BACKOFF)
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._process and self._process.returncode is None:
+            self._process.terminate()
+            await self._process.wait()
+
+follower = LogFollower()
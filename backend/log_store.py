@@ -0,0 +1,291 @@
+# backend/log_store.py
+"""
+Bounded, indexed in-memory log store behind /api/logs/search.
+
+Entries get increasing sequence numbers and live in a ring of columns
+(message, epoch, priority, interned unit and host). Inverted indexes map
+each unit, priority, host and message token to the sorted sequence numbers
+that contain it. A search walks the shortest matching posting list from the
+newest entry backwards and probes the others with a binary search, so a
+query costs roughly the size of its most selective term, not the store size.
+"""
+import base64
+import heapq
+import os
+import re
+import time
+from array import array
+from bisect import bisect_left
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from log_follower import PRIORITY_NAMES, make_entry
+from metrics_history import parse_duration
+
+# Configuration
+LOG_STORE_LINES = int(os.environ.get("JARVIS_LOG_STORE_LINES", "200000"))
+DEFAULT_SEARCH_LIMIT = 100
+MAX_SEARCH_LIMIT = 1000
+# Index at most this many distinct tokens per line, so one huge line can't bloat the index
+MAX_TOKENS_PER_LINE = 32
+
+_TOKEN = re.compile(r"[a-z0-9_]{2,}")
+
+def tokenize(text: str) -> List[str]:
+    """Distinct lower-cased word tokens, in order of first appearance"""
+    return list(dict.fromkeys(_TOKEN.findall(text.lower())))[:MAX_TOKENS_PER_LINE]
+
+class PostingList:
+    """Sorted sequence numbers in a compact array; old ones are trimmed from the front"""
+    __slots__ = ("seqs", "start")
+
+    def __init__(self):
+        self.seqs = array('q')
+        self.start = 0
+
+    def __len__(self) -> int:
+        return len(self.seqs) - self.start
+
+    def append(self, seq: int):
+        self.seqs.append(seq)
+
+    def trim(self, head: int):
+        """Drop sequence numbers below head"""
+        seqs, start = self.seqs, self.start
+        while start < len(seqs) and seqs[start] < head:
+            start += 1
+        if start > 1024 and start * 2 > len(seqs):
+            del seqs[:start]
+            start = 0
+        self.start = start
+
+    def __contains__(self, seq: int) -> bool:
+        i = bisect_left(self.seqs, seq, self.start)
+        return i < len(self.seqs) and self.seqs[i] == seq
+
+    def before(self, seq: int):
+        """Sequence numbers below seq, newest first"""
+        seqs = self.seqs
+        for i in range(bisect_left(seqs, seq, self.start) - 1, self.start - 1, -1):
+            yield seqs[i]
+
+def encode_cursor(seq: int) -> str:
+    return base64.urlsafe_b64encode(str(seq).encode()).decode()
+
+def decode_cursor(cursor: str) -> int:
+    try:
+        return int(base64.urlsafe_b64decode(cursor.encode()).decode())
+    except (ValueError, UnicodeDecodeError):
+        raise ValueError("Malformed cursor")
+
+def parse_priority(value) -> Optional[int]:
+    """'3' or 'err' to a syslog priority number"""
+    if value is None or value == "":
+        return None
+    value = str(value).strip().lower()
+    if value in PRIORITY_NAMES:
+        return PRIORITY_NAMES.index(value)
+    if not value.isdigit() or not 0 <= int(value) <= 7:
+        raise ValueError("priority must be 0-7 or one of " + ", ".join(PRIORITY_NAMES))
+    return int(value)
+
+def parse_since(value, now: Optional[float] = None) -> Optional[float]:
+    """A duration back from now ('15m'), an epoch, or an ISO timestamp, to an epoch"""
+    if value is None or value == "":
+        return None
+    now = time.time() if now is None else now
+    value = str(value).strip()
+    try:
+        number = float(value)
+        # Large bare numbers are epochs, small ones seconds ago
+        return number if number > 1e9 else now - number
+    except ValueError:
+        pass
+    try:
+        return now - parse_duration(value)
+    except ValueError:
+        pass
+    try:
+        return datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp()
+    except ValueError:
+        raise ValueError("since must be a duration like 15m, an epoch or an ISO timestamp")
+
+class LogStore:
+    """The last capacity log entries, indexed by unit, priority, host and token"""
+
+    def __init__(self, capacity: int = LOG_STORE_LINES):
+        self.capacity = capacity
+        self.messages: List[Optional[str]] = [None] * capacity
+        self.epochs = array('d', [0.0]) * capacity
+        self.priorities = array('b', [-1]) * capacity
+        self.units = array('i', [0]) * capacity
+        self.hosts = array('i', [0]) * capacity
+        # Interned unit/host names; id 0 means unknown
+        self._names: List[Optional[str]] = [None]
+        self._name_ids: Dict[str, int] = {}
+        self.by_unit: Dict[int, PostingList] = {}
+        self.by_host: Dict[int, PostingList] = {}
+        self.by_priority: Dict[int, PostingList] = {}
+        self.by_token: Dict[str, PostingList] = {}
+        self.head = 0       # oldest retained seq
+        self.next_seq = 0   # seq the next entry will get
+
+    def __len__(self) -> int:
+        return self.next_seq - self.head
+
+    def _intern(self, name: Optional[str]) -> int:
+        if not name:
+            return 0
+        name_id = self._name_ids.get(name)
+        if name_id is None:
+            name_id = self._name_ids[name] = len(self._names)
+            self._names.append(name)
+        return name_id
+
+    def _postings(self, seq: int):
+        """(index, key) pairs an entry was filed under"""
+        slot = seq % self.capacity
+        if self.units[slot]:
+            yield self.by_unit, self.units[slot]
+        if self.hosts[slot]:
+            yield self.by_host, self.hosts[slot]
+        if self.priorities[slot] >= 0:
+            yield self.by_priority, self.priorities[slot]
+        for token in tokenize(self.messages[slot]):
+            yield self.by_token, token
+
+    def _evict(self):
+        """Drop the oldest entry from every posting list it is on"""
+        seq = self.head
+        self.head += 1
+        for index, key in self._postings(seq):
+            postings = index.get(key)
+            if postings is not None:
+                postings.trim(self.head)
+                if not postings:
+                    del index[key]
+
+    def add(self, entries: List[dict]):
+        for entry in entries:
+            if self.next_seq - self.head >= self.capacity:
+                self._evict()
+            seq = self.next_seq
+            slot = seq % self.capacity
+            message = entry.get("message") or ""
+            priority = entry.get("priority")
+            self.messages[slot] = message
+            self.epochs[slot] = entry.get("epoch") or time.time()
+            self.priorities[slot] = priority if priority is not None else -1
+            self.units[slot] = self._intern(entry.get("unit"))
+            self.hosts[slot] = self._intern(entry.get("host"))
+            for index, key in self._postings(seq):
+                postings = index.get(key)
+                if postings is None:
+                    postings = index[key] = PostingList()
+                postings.append(seq)
+            self.next_seq += 1
+
+    def entry(self, seq: int) -> dict:
+        slot = seq % self.capacity
+        priority = self.priorities[slot]
+        entry = make_entry(self.epochs[slot], self.messages[slot], priority if priority >= 0 else None,
+                           self._names[self.units[slot]], self._names[self.hosts[slot]])
+        entry["seq"] = seq
+        return entry
+
+    def _term_lists(self, q: str, unit: Optional[str], host: Optional[str],
+                    priority: Optional[int]) -> Optional[List[Tuple[PostingList, ...]]]:
+        """One group of posting lists per search term; an entry must be on some list of every group.
+
+        Returns None when a term matches nothing, so the search is empty.
+        """
+        groups = []
+        for name, index in ((unit, self.by_unit), (host, self.by_host)):
+            if name:
+                postings = index.get(self._name_ids.get(name, -1))
+                if postings is None:
+                    return None
+                groups.append((postings,))
+        if priority is not None:
+            lists = tuple(self.by_priority[p] for p in range(priority + 1) if p in self.by_priority)
+            if not lists:
+                return None
+            groups.append(lists)
+        for word in q.lower().split():
+            if word.endswith("*"):
+                prefix = word.rstrip("*")
+                if not prefix:
+                    continue
+                lists = tuple(postings for token, postings in self.by_token.items() if token.startswith(prefix))
+            else:
+                tokens = tokenize(word)
+                if not tokens:
+                    continue
+                lists = tuple(self.by_token[token] for token in tokens if token in self.by_token)
+                if len(lists) < len(tokens):
+                    return None
+                # A word that splits into several tokens ("ssh-agent") needs all of them
+                groups.extend((postings,) for postings in lists)
+                continue
+            if not lists:
+                return None
+            groups.append(lists)
+        return groups
+
+    def search(self, q: str = "", unit: Optional[str] = None, host: Optional[str] = None,
+               priority: Optional[int] = None, since: Optional[float] = None,
+               cursor: Optional[str] = None, limit: int = DEFAULT_SEARCH_LIMIT) -> dict:
+        """Newest-first page of matching entries; pass next_cursor back to continue"""
+        started = time.perf_counter()
+        limit = max(1, min(limit, MAX_SEARCH_LIMIT))
+        before = decode_cursor(cursor) if cursor else self.next_seq
+        before = min(before, self.next_seq)
+
+        groups = self._term_lists(q, unit, host, priority)
+        results: List[int] = []
+        scanned = 0
+        more = False
+        if groups is not None:
+            if groups:
+                # Drive from the most selective group; entries arrive in time order, newest last
+                groups.sort(key=lambda lists: sum(len(p) for p in lists))
+                driver, rest = groups[0], groups[1:]
+                if len(driver) == 1:
+                    candidates = driver[0].before(before)
+                else:
+                    # Several lists (priority range, prefix): merge them newest first, lazily. A line
+                    # can hold several tokens matching one prefix, so drop repeats of the same seq
+                    candidates = _unique(heapq.merge(*(p.before(before) for p in driver), reverse=True))
+            else:
+                rest = []
+                candidates = range(before - 1, self.head - 1, -1)
+            epochs, capacity = self.epochs, self.capacity
+            for seq in candidates:
+                if seq < self.head:
+                    break
+                scanned += 1
+                if since is not None and epochs[seq % capacity] < since:
+                    break
+                if all(any(seq in p for p in lists) for lists in rest):
+                    if len(results) == limit:
+                        more = True
+                        break
+                    results.append(seq)
+
+        return {
+            "logs": [self.entry(seq) for seq in results],
+            "next_cursor": encode_cursor(results[-1]) if more else None,
+            "scanned": scanned,
+            "retained": len(self),
+            "query_ms": round((time.perf_counter() - started) * 1000, 2)
+        }
+
+def _unique(seqs: Iterator[int]) -> Iterator[int]:
+    """Drop consecutive repeats from a sorted stream"""
+    previous = None
+    for seq in seqs:
+        if seq != previous:
+            previous = seq
+            yield seq
+
+store = LogStore()
@@ -6,16 +6,34 @@ import time
 import subprocess
 import sys
 from datetime import datetime
-from typing import Dict, List
+from typing import Dict, Optional
 from fastapi import FastAPI, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from fastapi.staticfiles import StaticFiles
 import uvicorn
 import os
 
 # Import new services
-from linux_tools import execute_command_async, get_installed_applications
-from voice_service import initialize_voice_service, speak_text, recognize_speech_from_mic
+from app_index import app_index
+from app_search import DEFAULT_SEARCH_LIMIT as DEFAULT_APP_RESULTS, app_search
+from voice_service import STATE_LOADING, STATE_UNAVAILABLE, get_voice_status, speak_text, start_voice_service, voice_status
+from voice_intents import match_intent
+from voice_sessions import VoiceSessionManager
+from metrics_sampler import sampler
+from metrics_history import BACKFILL_SECONDS, MetricsHistory, history, parse_duration
+from metrics_store import RETENTION_DAYS, open_store
+from connection_manager import ConnectionManager
+from message_codec import encode_message, resolve_encoding
+from process_table import process_table
+from topics import Topic, TopicRegistry
+from pty_sessions import PtySessionManager
+from command_executor import CommandExecutor
+from log_follower import follower as log_follower
+from log_store import DEFAULT_SEARCH_LIMIT, parse_priority, parse_since, store as log_store
+from scheduler import AdaptiveInterval, scalar_change, set_change
+from network_collector import ConnectionQuery, DEFAULT_PAGE_SIZE, collector as network_collector
+from delta_stream import DeltaStream, connection_key, diff_network_update, diff_system_stats
 
 app = FastAPI(title="JarvisOS Backend", version="1.0.0")
 
@@ -28,326 +46,365 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# WebSocket connection manager
-class ConnectionManager:
-    def __init__(self):
-        self.active_connections: List[WebSocket] = []
+manager = ConnectionManager()
 
-    async def connect(self, websocket: WebSocket):
-        await websocket.accept()
-        self.active_connections.append(websocket)
-        print(f"Client connected. Total connections: {len(self.active_connections)}")
+# Topics a client is subscribed to on connect unless it passes /ws?subscribe=...
+DEFAULT_TOPICS = ("system", "network", "logs")
+topics = TopicRegistry()
 
-    def disconnect(self, websocket: WebSocket):
-        if websocket in self.active_connections:
-            self.active_connections.remove(websocket)
-        print(f"Client disconnected. Total connections: {len(self.active_connections)}")
+# Per-client subscribe_connections streams
+connection_streams: Dict[WebSocket, asyncio.Task] = {}
+pty_sessions = PtySessionManager(manager)
+command_executor = CommandExecutor(manager)
 
-    async def send_personal_message(self, message: str, websocket: WebSocket):
-        try:
-            await websocket.send_text(message)
-        except:
-            self.disconnect(websocket)
-
-    async def broadcast(self, message: str):
-        disconnected = []
-        for connection in self.active_connections:
-            try:
-                await connection.send_text(message)
-            except:
-                disconnected.append(connection)
-
-        # Remove disconnected clients
-        for conn in disconnected:
-            self.disconnect(conn)
+# On-disk metric history, only when JARVIS_METRICS_DIR is set
+metrics_store = None
 
-manager = ConnectionManager()
+# Periodic state streams; /ws?delta=1 clients get only what changed between keyframes
+stats_stream = DeltaStream("system_stats", diff_system_stats)
+network_stream = DeltaStream("network_update", diff_network_update)
 
 # System monitoring functions
 def get_system_stats():
-    """Get current system statistics"""
-    try:
-        cpu_percent = psutil.cpu_percent(interval=1)
-        memory = psutil.virtual_memory()
-        disk = psutil.disk_usage('/')
-        net_io = psutil.net_io_counters()
+    """Get current system statistics from the latest background sample"""
+    return sampler.latest().to_dict()
 
-        return {
-            "cpu": round(cpu_percent, 1),
-            "memory": round(memory.percent, 1),
-            "disk": round((disk.used / disk.total) * 100, 1),
-            "network": {
-                "bytes_sent": net_io.bytes_sent,
-                "bytes_recv": net_io.bytes_recv,
-                "packets_sent": net_io.packets_sent,
-                "packets_recv": net_io.packets_recv
-            },
-            "timestamp": datetime.now().isoformat()
-        }
-    except Exception as e:
-        print(f"Error getting system stats: {e}")
-        return {
-            "cpu": 0,
-            "memory": 0,
-            "disk": 0,
-            "network": {"bytes_sent": 0, "bytes_recv": 0, "packets_sent": 0, "packets_recv": 0},
-            "timestamp": datetime.now().isoformat()
-        }
+def get_process_list(sort: str = "cpu", limit: int = 10):
+    """Get the top processes by cpu, memory or io from the process table"""
+    return process_table.top(limit, sort)
 
-def get_process_list():
-    """Get list of running processes"""
+async def get_network_connections():
+    """Get established network connections"""
     try:
-        processes = []
-        for proc in psutil.process_iter(['pid', 'name', 'cpu_percent', 'memory_percent']):
-            try:
-                processes.append(proc.info)
-            except (psutil.NoSuchProcess, psutil.AccessDenied):
-                pass
-        return sorted(processes, key=lambda x: x['cpu_percent'] or 0, reverse=True)[:10]
+        snapshot = await network_collector.get()
+        return [{
+            "local_address": conn["local_address"],
+            "remote_address": conn["remote_address"],
+            "status": conn["status"],
+            "pid": conn["pid"]
+        } for conn in snapshot.established(limit=20)]
     except Exception as e:
-        print(f"Error getting process list: {e}")
+        print(f"Error getting network connections: {e}")
         return []
 
-def get_network_connections():
-    """Get network connections"""
+async def stream_connections(websocket: WebSocket, query: ConnectionQuery, chunk_size: int, interval: float):
+    """Stream every matching connection in chunks, then again after each refresh interval"""
+    while True:
+        async for chunk, total, done in network_collector.stream(query, chunk_size):
+            await manager.send_personal_message(encode_message({
+                "type": "connections_chunk",
+                "data": {"connections": chunk, "total": total, "done": done}
+            }), websocket)
+        await asyncio.sleep(interval)
+
+async def handle_subscribe_connections(data: dict, websocket: WebSocket):
+    stop_connection_stream(websocket)
     try:
-        connections = []
-        for conn in psutil.net_connections(kind='inet'):
-            if conn.status == 'ESTABLISHED':
-                connections.append({
-                    "local_address": f"{conn.laddr.ip}:{conn.laddr.port}" if conn.laddr else "N/A",
-                    "remote_address": f"{conn.raddr.ip}:{conn.raddr.port}" if conn.raddr else "N/A",
-                    "status": conn.status,
-                    "pid": conn.pid
-                })
-        return connections[:20]
-    except Exception as e:
-        print(f"Error getting network connections: {e}")
-        return []
+        if not isinstance(data, dict):
+            raise TypeError("subscribe_connections data must be an object")
+        query = ConnectionQuery.from_params(data)
+        chunk_size = int(data.get("chunk_size") or DEFAULT_PAGE_SIZE)
+        interval = max(network_collector.ttl, float(data.get("interval") or 5))
+    except (ValueError, TypeError) as e:
+        await manager.send_personal_message(encode_message({
+            "type": "connections_error",
+            "data": {"error": str(e)}
+        }), websocket)
+        return
+    connection_streams[websocket] = asyncio.create_task(stream_connections(websocket, query, chunk_size, interval))
+
+def stop_connection_stream(websocket: WebSocket):
+    task = connection_streams.pop(websocket, None)
+    if task:
+        task.cancel()
+
+async def handle_pty(message_type: str, data: dict, websocket: WebSocket):
+    """Terminal session control; keystrokes and output travel as binary frames"""
+    try:
+        if message_type == "pty_open":
+            session = await pty_sessions.open(websocket, int(data.get("rows", 24)), int(data.get("cols", 80)))
+            reply = {"session": session.id, "shell": session.shell, "token": session.token}
+        elif message_type == "pty_attach":
+            session = await pty_sessions.attach(websocket, int(data["session"]), str(data.get("token") or ""))
+            reply = {"session": session.id, "shell": session.shell, "attached": True}
+        elif message_type == "pty_resize":
+            pty_sessions.get(int(data["session"]), websocket).resize(int(data["rows"]), int(data["cols"]))
+            return
+        elif message_type == "pty_input":
+            # Text fallback for clients that can't send binary frames
+            pty_sessions.get(int(data["session"]), websocket).write(str(data.get("data", "")).encode())
+            return
+        elif message_type == "pty_close":
+            pty_sessions.get(int(data["session"]), websocket)
+            await pty_sessions.close(int(data["session"]))
+            return
+        else:
+            return
+    except (KeyError, ValueError, TypeError, OSError) as e:
+        await manager.send_personal_message(encode_message({
+            "type": "pty_error",
+            "data": {"session": data.get("session"), "error": str(e)}
+        }), websocket)
+        return
+    await manager.send_personal_message(encode_message({"type": "pty_opened", "data": reply}), websocket)
 
 async def get_network_data():
     """Helper to get detailed network info for WebSocket"""
     try:
-        interfaces = {}
-        for iface_name, addrs in psutil.net_if_addrs().items():
-            interfaces[iface_name] = []
-            for addr in addrs:
-                interfaces[iface_name].append({
-                    "family": str(addr.family),
-                    "address": addr.address,
-                    "netmask": addr.netmask,
-                    "broadcast": addr.broadcast,
-                    "ptp": addr.ptp
-                })
-
-        connections = []
-        for conn in psutil.net_connections(kind='inet'):
-            if conn.status == 'ESTABLISHED':
-                connections.append({
-                    "fd": conn.fd,
-                    "family": str(conn.family),
-                    "type": str(conn.type),
-                    "local_address": f"{conn.laddr.ip}:{conn.laddr.port}" if conn.laddr else "N/A",
-                    "remote_address": f"{conn.raddr.ip}:{conn.raddr.port}" if conn.raddr else "N/A",
-                    "status": conn.status,
-                    "pid": conn.pid
-                })
-            if len(connections) >= 50:
-                break
-
-        return {
-            "interfaces": interfaces,
-            "connections": connections,
-            "timestamp": datetime.now().isoformat()
-        }
+        snapshot = await network_collector.get()
+        return snapshot.summary(limit=50)
     except Exception as e:
         print(f"Error getting network data: {e}")
         return {"interfaces": {}, "connections": [], "timestamp": datetime.now().isoformat()}
 
-def get_system_logs():
-    """Get recent system logs"""
-    try:
-        result = subprocess.run(['journalctl', '-n', '50', '--no-pager'], 
-                              capture_output=True, text=True, timeout=5)
-        if result.returncode == 0:
-            logs = result.stdout.strip().split('\n')
-            return [{"timestamp": datetime.now().isoformat(), "message": log} for log in logs[-10:]]
+async def get_installed_apps():
+    """The indexed application list; only the very first call (no cache yet) waits for a scan"""
+    if app_index.generation == 0:
+        await app_index.refresh()
+    return app_index.apps()
+
+async def handle_launch_application(data: dict, websocket: WebSocket):
+    """Start an installed app, named by desktop file ID, with the argv parsed from its Exec line.
+
+    Nothing from the client reaches a shell: unknown IDs are refused.
+    """
+    app_id = data.get("id") if isinstance(data, dict) else None
+    installed = None
+    if isinstance(app_id, str):
+        await get_installed_apps()
+        installed = app_index.get(app_id)
+    if installed is None:
+        notification = {"title": "App Launcher Error", "message": f"Unknown application {app_id!r}", "type": "error"}
+    else:
+        try:
+            # Own session, detached from our stdio, so it outlives the backend like a desktop launch would
+            subprocess.Popen(installed["command"], start_new_session=True, stdin=subprocess.DEVNULL,
+                             stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        except OSError as e:
+            notification = {"title": "App Launcher Error", "message": f"Failed to launch {installed['name']}: {e}",
+                            "type": "error"}
         else:
-            with open('/var/log/syslog', 'r') as f:
-                lines = f.readlines()
-                return [{"timestamp": datetime.now().isoformat(), "message": line.strip()} for line in lines[-10:]]
-    except Exception as e:
-        print(f"Error getting system logs: {e}")
-        return [{"timestamp": datetime.now().isoformat(), "message": f"Error reading logs: {e}"}]
+            await app_search.record_launch(installed["executable"])
+            notification = {"title": "App Launcher", "message": f"Launched {installed['name']}", "type": "success"}
+    await manager.send_personal_message(encode_message({
+        "type": "notification",
+        "data": {**notification, "timestamp": datetime.now().isoformat()}
+    }), websocket)
 
-# Background tasks
-async def system_monitor_task():
-    """Background task to monitor system and send updates"""
-    while True:
-        try:
-            stats = get_system_stats()
-            message = {
-                "type": "system_stats",
-                "data": stats
-            }
-            await manager.broadcast(json.dumps(message))
-            await asyncio.sleep(2)
-        except Exception as e:
-            print(f"Error in system monitor task: {e}")
-            await asyncio.sleep(5)
+def get_system_logs(limit: int = 10):
+    """Get the most recent system log entries from the log follower"""
+    return log_follower.latest(limit)
 
-async def network_monitor_task():
-    """Background task to send network info periodically"""
-    while True:
+def record_metrics(snapshot):
+    """Sampler listener: append to in-memory history and, if enabled, to disk"""
+    values = history.record(snapshot)
+    if metrics_store:
         try:
-            network_data = await get_network_data()
-            message = {
-                "type": "network_update",
-                "data": network_data
-            }
-            await manager.broadcast(json.dumps(message))
-            await asyncio.sleep(5)
-        except Exception as e:
-            print(f"Error in network monitor task: {e}")
-            await asyncio.sleep(10)
-
-async def logs_monitor_task():
-    """Background task to send system logs periodically"""
-    while True:
+            metrics_store.append(snapshot.epoch, values)
+        except OSError as e:
+            print(f"Error writing metrics store: {e}")
+
+# Topic publishers: each collects once, sends to the subscribers that are due
+# and returns a 0..1 change score for the topic's scheduler
+last_published: Dict[str, object] = {}
+
+async def publish_system_stats(targets):
+    """Send the latest system stats sample"""
+    stats = get_system_stats()
+    stats_stream.update(stats)
+    await manager.broadcast_stream(stats_stream, targets)
+    # A 10 point move in cpu or memory counts as fully changed
+    change = scalar_change(last_published.get("system"), stats, ("cpu", "memory"), 10.0)
+    last_published["system"] = stats
+    return change
+
+async def publish_network(targets):
+    """Send interfaces and established connections"""
+    data = await get_network_data()
+    network_stream.update(data)
+    await manager.broadcast_stream(network_stream, targets)
+    keys = {connection_key(conn) for conn in data["connections"]}
+    change = set_change(last_published.get("network"), keys)
+    last_published["network"] = keys
+    return change
+
+async def store_log_entries(entries):
+    """Log follower listener: index new entries for /api/logs/search"""
+    log_store.add(entries)
+
+async def publish_log_entries(entries):
+    """Log follower listener: push each new batch of entries to logs subscribers, once"""
+    targets = list(topics.topics["logs"].subscribers)
+    if targets:
+        await manager.broadcast(encode_message({"type": "system_logs", "data": entries}), targets)
+
+async def send_log_backlog(websocket: WebSocket) -> bool:
+    """Give a new logs subscriber the latest entries; everything after arrives as pushed"""
+    await manager.send_personal_message(encode_message({
+        "type": "system_logs",
+        "data": get_system_logs()
+    }), websocket)
+    return True
+
+async def publish_processes(snapshot):
+    """Process table listener: send the top processes by CPU to the subscribers that are due"""
+    topic = topics.topics["processes"]
+    now = time.monotonic()
+    targets = topic.due(now)
+    if targets:
+        await manager.broadcast(encode_message({"type": "process_list", "data": get_process_list()}), targets)
+        topic.mark_sent(targets, now)
+
+async def send_process_list(websocket: WebSocket) -> bool:
+    """Give a new processes subscriber the current top processes, if the table has any"""
+    if not process_table.rows:
+        return False
+    await manager.send_personal_message(encode_message({
+        "type": "process_list",
+        "data": get_process_list()
+    }), websocket)
+    return True
+
+def keyframe_on_subscribe(stream: DeltaStream):
+    """Give a new subscriber the stream's current value without advancing the stream"""
+    async def send(websocket: WebSocket) -> bool:
+        if stream.keyframe is None:
+            return False
+        await manager.send_keyframes(websocket, [stream])
+        return True
+    return send
+
+def host_cpu() -> float:
+    return sampler.latest().cpu
+
+topics.register(Topic("system", publish_system_stats, AdaptiveInterval(2, 0.5, 10, load=host_cpu),
+                      on_subscribe=keyframe_on_subscribe(stats_stream)))
+topics.register(Topic("network", publish_network, AdaptiveInterval(5, 1, 30, load=host_cpu),
+                      on_subscribe=keyframe_on_subscribe(network_stream)))
+topics.register(Topic("logs", None, on_subscribe=send_log_backlog))
+# The process table samples on its own scheduler and pushes each snapshot to the topic
+process_table.scheduler.load = host_cpu
+process_table.add_listener(publish_processes)
+topics.register(Topic("processes", None, process_table.scheduler, on_subscribe=send_process_list,
+                      on_start=process_table.start, on_stop=process_table.stop))
+
+async def handle_subscribe(data: dict, websocket: WebSocket, subscribe: bool = True):
+    """Subscribe to or unsubscribe from topics, then report the client's subscriptions"""
+    if not isinstance(data, dict):
+        data = {}
+        error = "subscribe data must be an object"
+    else:
+        error = None
+    names = data.get("topics") or ([data["topic"]] if data.get("topic") else [])
+    for name in names:
         try:
-            logs = get_system_logs()
-            message = {
-                "type": "system_logs",
-                "data": logs
-            }
-            await manager.broadcast(json.dumps(message))
-            await asyncio.sleep(10)
-        except Exception as e:
-            print(f"Error in logs monitor task: {e}")
-            await asyncio.sleep(15)
+            if subscribe:
+                await topics.subscribe(websocket, name, data.get("interval"), bool(data.get("live")))
+            else:
+                await topics.unsubscribe(websocket, name)
+        except (KeyError, ValueError, TypeError) as e:
+            error = str(e)
+    await manager.send_personal_message(encode_message({
+        "type": "subscriptions",
+        "data": {"topics": topics.subscriptions(websocket), "error": error}
+    }), websocket)
 
-# Global variable to control voice recognition loop
-voice_recognition_active = False
+async def restore_metrics(until: float):
+    """Replay the on-disk samples up to until into memory, in a worker thread.
 
-async def voice_recognition_loop(websocket: WebSocket):
-    global voice_recognition_active
-    print("Starting voice recognition loop...")
-    
-    await manager.send_personal_message(json.dumps({
-        "type": "jarvis_status",
-        "data": {"listening": True, "speaking": True}
-    }), websocket)
-    
-    await manager.send_personal_message(json.dumps({
-        "type": "notification",
-        "data": {
-            "title": "Voice Service",
-            "message": "Listening for commands...",
-            "type": "info",
-            "timestamp": datetime.now().isoformat()
-        }
-    }), websocket)
+    Live samples keep going into history meanwhile; the replayed ones are
+    put in front of them once the replay is done, and history queries
+    cover the older range from then on.
+    """
+    restored = MetricsHistory()
+    try:
+        replayed = await asyncio.to_thread(metrics_store.replay, restored, until - RETENTION_DAYS * 86400, until)
+    except Exception as e:
+        print(f"Error restoring metrics from disk: {e}")
+        return
+    history.absorb(restored)
+    print(f"Restored {replayed} metric samples from disk")
 
-    while voice_recognition_active:
+async def metrics_retention_task():
+    """Background task to expire and compact on-disk metric segments"""
+    while True:
         try:
-            await manager.send_personal_message(json.dumps({
-                "type": "jarvis_status",
-                "data": {"listening": True, "speaking": False}
-            }), websocket)
-            
-            text = await recognize_speech_from_mic()
-            if text:
-                print(f"Recognized: {text}")
-                await manager.send_personal_message(json.dumps({
-                    "type": "notification",
-                    "data": {
-                        "title": "Voice Input",
-                        "message": f"Heard: '{text}'",
-                        "type": "info",
-                        "timestamp": datetime.now().isoformat()
-                    }
-                }), websocket)
-                await process_voice_command(text, websocket)
-            await asyncio.sleep(0.1)
+            await asyncio.to_thread(metrics_store.enforce_retention)
         except Exception as e:
-            print(f"Error in voice recognition loop: {e}")
-            voice_recognition_active = False
-            await manager.send_personal_message(json.dumps({
-                "type": "jarvis_status",
-                "data": {"listening": False, "speaking": False}
-            }), websocket)
+            print(f"Error in metrics retention task: {e}")
+        await asyncio.sleep(3600)
 
-async def process_voice_command(command_text: str, websocket: WebSocket):
+async def process_voice_command(command_text: str, intent: Optional[str] = None):
+    """Answer a recognized phrase; the response goes to every client in the voice session"""
     command_text = command_text.lower()
+    intent = intent or match_intent(command_text)
     response_text = ""
 
-    await manager.send_personal_message(json.dumps({
-        "type": "jarvis_status",
-        "data": {"listening": True, "speaking": True}
-    }), websocket)
+    await voice_sessions.broadcast("jarvis_status", {"listening": True, "speaking": True})
 
-    if "hello jarvis" in command_text or "hey jarvis" in command_text:
+    if intent == "greet":
         response_text = "Hello, Commander. How may I assist you?"
-    elif "what is your status" in command_text or "system status" in command_text:
+    elif intent == "status":
         stats = get_system_stats()
         response_text = f"Current CPU usage is {stats['cpu']} percent, memory is {stats['memory']} percent, and disk usage is {stats['disk']} percent."
-    elif "open terminal" in command_text:
+    elif intent == "open_terminal":
         response_text = "Opening quantum terminal."
-        await manager.send_personal_message(json.dumps({
-            "type": "command_response",
-            "data": {"command": "open_widget", "result": "terminal"}
-        }), websocket)
-    elif "show processes" in command_text:
+        await voice_sessions.broadcast("command_response", {"command": "open_widget", "result": "terminal"})
+    elif intent == "show_processes":
+        await process_table.ensure_fresh()
         processes = get_process_list()
         if processes:
             response_text = f"There are {len(processes)} active processes. Top process is {processes[0]['name']} using {processes[0]['cpu_percent']} percent CPU."
         else:
             response_text = "Unable to retrieve process list."
-    elif "what time is it" in command_text or "current time" in command_text:
+    elif intent == "time":
         current_time = datetime.now().strftime("%I:%M %p")
         response_text = f"The current time is {current_time}."
-    elif "shutdown" in command_text or "power off" in command_text:
+    elif intent == "shutdown":
         response_text = "Initiating shutdown sequence. Goodbye, Commander."
-    elif "thank you" in command_text:
+    elif intent == "thanks":
         response_text = "You're welcome, Commander."
     else:
         response_text = "I'm sorry, Commander. I didn't understand that command."
 
     if response_text:
+        # Show the answer right away; speaking it takes seconds
+        await voice_sessions.notify("Jarvis Response", response_text, "success")
         await speak_text(response_text)
-        await manager.send_personal_message(json.dumps({
-            "type": "notification",
-            "data": {
-                "title": "Jarvis Response",
-                "message": response_text,
-                "type": "success",
-                "timestamp": datetime.now().isoformat()
-            }
-        }), websocket)
 
-async def handle_jarvis_activate(data: dict, websocket: WebSocket):
-    global voice_recognition_active
-    listening_state = data.get("listening")
-    
-    if listening_state is not None:
-        voice_recognition_active = listening_state
-    else:
-        voice_recognition_active = not voice_recognition_active
+voice_sessions = VoiceSessionManager(manager, process_voice_command)
 
-    await manager.send_personal_message(json.dumps({
+async def handle_jarvis_activate(data: dict, websocket: WebSocket):
+    """Join or leave the shared voice session; other clients' sessions are unaffected"""
+    listening = data.get("listening")
+    if listening is None:
+        listening = not voice_sessions.is_subscribed(websocket)
+    if voice_status["state"] == STATE_UNAVAILABLE:
+        listening = False
+
+    await manager.send_personal_message(encode_message({
         "type": "jarvis_status",
-        "data": {"listening": voice_recognition_active, "speaking": False}
+        "data": {"listening": listening, "speaking": False}
     }), websocket)
 
-    if voice_recognition_active:
-        asyncio.create_task(voice_recognition_loop(websocket))
-        notification_msg = "Voice recognition system activated. Listening..."
-        notification_type = "success"
+    if listening:
+        await voice_sessions.subscribe(websocket)
+        if voice_status["state"] == STATE_LOADING:
+            notification_msg = "Voice model is still loading; listening will start as soon as it's ready."
+            notification_type = "info"
+        else:
+            notification_msg = "Voice recognition system activated. Listening..."
+            notification_type = "success"
+    elif voice_status["state"] == STATE_UNAVAILABLE:
+        await voice_sessions.unsubscribe(websocket)
+        notification_msg = "Voice recognition is unavailable on this system."
+        notification_type = "error"
     else:
+        await voice_sessions.unsubscribe(websocket)
         notification_msg = "Voice recognition system deactivated."
         notification_type = "info"
 
-    await manager.send_personal_message(json.dumps({
+    await manager.send_personal_message(encode_message({
         "type": "notification",
         "data": {
             "title": "Jarvis AI",
@@ -371,7 +428,7 @@ async def handle_command(command_data: dict, websocket: WebSocket):
                 "timestamp": datetime.now().isoformat()
             }
         }
-        await manager.send_personal_message(json.dumps(response), websocket)
+        await manager.send_personal_message(encode_message(response), websocket)
 
     elif command.lower() == "network_scan":
         await asyncio.sleep(1)
@@ -383,37 +440,45 @@ async def handle_command(command_data: dict, websocket: WebSocket):
                 "timestamp": datetime.now().isoformat()
             }
         }
-        await manager.send_personal_message(json.dumps(response), websocket)
+        await manager.send_personal_message(encode_message(response), websocket)
 
     else:
-        try:
-            async for output_line in execute_command_async(command):
-                await manager.send_personal_message(json.dumps({
-                    "type": "terminal_output",
-                    "data": {"output": output_line}
-                }), websocket)
-            await manager.send_personal_message(json.dumps({
-                "type": "terminal_output",
-                "data": {"output": f"\r\nCommand '{command}' executed."}
-            }), websocket)
-        except Exception as e:
-            await manager.send_personal_message(json.dumps({
-                "type": "terminal_error",
-                "data": {"error": f"Error executing command '{command}': {e}"}
-            }), websocket)
+        # Runs in the background under the executor's limits; output arrives as terminal_output
+        await command_executor.submit(websocket, command, command_data.get("id"))
 
 # Start background tasks
 @app.on_event("startup")
 async def startup_event():
-    asyncio.create_task(system_monitor_task())
-    asyncio.create_task(network_monitor_task())
-    asyncio.create_task(logs_monitor_task())
-    initialize_voice_service()
+    global metrics_store
+    metrics_store = await asyncio.to_thread(open_store)
+    if metrics_store:
+        # Up to RETENTION_DAYS of samples: restore them in the background rather than hold up start-up
+        asyncio.create_task(restore_metrics(time.time()))
+        asyncio.create_task(metrics_retention_task())
+    sampler.add_listener(record_metrics)
+    print(f"Metrics history reserved {history.memory_bytes() / 1024:.0f} KiB")
+    sampler.start()
+    log_follower.add_listener(store_log_entries)
+    log_follower.add_listener(publish_log_entries)
+    log_follower.start()
+    app_index.start()
+    # The speech model takes a while to load; don't hold up accepting connections for it
+    asyncio.create_task(start_voice_service())
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    await pty_sessions.close_all()
+    await app_index.stop()
+    await log_follower.stop()
+    if metrics_store:
+        metrics_store.close()
 
 # WebSocket endpoint
 @app.websocket("/ws")
 async def websocket_endpoint(websocket: WebSocket):
-    await manager.connect(websocket)
+    encoding = resolve_encoding(websocket.query_params.get("encoding"))
+    delta = websocket.query_params.get("delta", "").lower() in ("1", "true", "yes")
+    await manager.connect(websocket, encoding, delta)
 
     # Send welcome message
     welcome_message = {
@@ -425,68 +490,123 @@ async def websocket_endpoint(websocket: WebSocket):
             "timestamp": datetime.now().isoformat()
         }
     }
-    await manager.send_personal_message(json.dumps(welcome_message), websocket)
+    await manager.send_personal_message(encode_message(welcome_message), websocket)
+    await manager.send_personal_message(encode_message({
+        "type": "system_history",
+        "data": history.query(BACKFILL_SECONDS)
+    }), websocket)
+
+    requested = websocket.query_params.get("subscribe")
+    initial_topics = DEFAULT_TOPICS if requested is None else [t for t in requested.split(",") if t and t != "none"]
+    for name in initial_topics:
+        try:
+            await topics.subscribe(websocket, name)
+        except KeyError as e:
+            print(f"Ignoring initial subscription: {e}")
 
     try:
         while True:
-            data = await websocket.receive_text()
-            message = json.loads(data)
+            frame = await websocket.receive()
+            if frame["type"] == "websocket.disconnect":
+                raise WebSocketDisconnect(frame.get("code", 1000))
+            if frame.get("bytes") is not None:
+                # Binary frames from the client are terminal input
+                try:
+                    pty_sessions.write(websocket, frame["bytes"])
+                except (KeyError, ValueError, OSError) as e:
+                    print(f"Dropped terminal input: {e}")
+                continue
+            message = json.loads(frame["text"])
 
             if message.get("type") == "command":
                 await handle_command(message.get("data", {}), websocket)
+            elif message.get("type") == "cancel_command":
+                command_id = (message.get("data") or {}).get("id")
+                cancelled = command_executor.cancel(websocket, str(command_id) if command_id is not None else None)
+                if not cancelled:
+                    await manager.send_personal_message(encode_message({
+                        "type": "terminal_error",
+                        "data": {"command_id": command_id, "error": "No such running command"}
+                    }), websocket)
             elif message.get("type") == "jarvis_activate":
                 await handle_jarvis_activate(message.get("data", {}), websocket)
             elif message.get("type") == "get_processes":
-                processes = get_process_list()
+                request = message.get("data") or {}
+                await process_table.ensure_fresh()
+                try:
+                    processes = get_process_list(request.get("sort", "cpu"), int(request.get("limit") or 10))
+                except (ValueError, TypeError) as e:
+                    processes = []
+                    print(f"Bad get_processes request: {e}")
                 response = {
                     "type": "process_list",
                     "data": processes
                 }
-                await manager.send_personal_message(json.dumps(response), websocket)
+                await manager.send_personal_message(encode_message(response), websocket)
+            elif message.get("type") == "get_process_detail":
+                pid = (message.get("data") or {}).get("pid")
+                try:
+                    pid = int(pid)
+                except (ValueError, TypeError):
+                    detail = {"pid": pid, "error": "pid must be an integer"}
+                else:
+                    await process_table.ensure_fresh()
+                    detail = await process_table.detail(pid) or {"pid": pid, "error": "No such process"}
+                response = {
+                    "type": "process_detail",
+                    "data": detail
+                }
+                await manager.send_personal_message(encode_message(response), websocket)
+            elif message.get("type") == "subscribe":
+                await handle_subscribe(message.get("data") or {}, websocket)
+            elif message.get("type") == "unsubscribe":
+                await handle_subscribe(message.get("data") or {}, websocket, subscribe=False)
+            elif message.get("type") == "subscribe_connections":
+                await handle_subscribe_connections(message.get("data") or {}, websocket)
+            elif message.get("type") == "unsubscribe_connections":
+                stop_connection_stream(websocket)
+            elif str(message.get("type", "")).startswith("pty_"):
+                await handle_pty(message["type"], message.get("data") or {}, websocket)
             elif message.get("type") == "get_network":
                 network_data = await get_network_data()
                 response = {
                     "type": "network_update",
                     "data": network_data
                 }
-                await manager.send_personal_message(json.dumps(response), websocket)
+                await manager.send_personal_message(encode_message(response), websocket)
             elif message.get("type") == "get_installed_apps":
-                apps = get_installed_applications()
+                apps = await get_installed_apps()
                 response = {
                     "type": "installed_applications",
                     "data": apps
                 }
-                await manager.send_personal_message(json.dumps(response), websocket)
+                await manager.send_personal_message(encode_message(response), websocket)
+            elif message.get("type") == "search_apps":
+                # Sent on every keystroke; seq lets the client ignore answers to stale queries
+                request = message.get("data") or {}
+                try:
+                    result = await app_search.search(str(request.get("query", "")),
+                                               int(request.get("limit", DEFAULT_APP_RESULTS)))
+                except (TypeError, ValueError) as e:
+                    result = {"query": request.get("query"), "results": [], "error": str(e)}
+                await manager.send_personal_message(encode_message({
+                    "type": "app_search_results",
+                    "data": {**result, "seq": request.get("seq")}
+                }), websocket)
             elif message.get("type") == "launch_application":
-                app_executable = message.get("data", {}).get("executable")
-                if app_executable:
-                    try:
-                        os.system(f"nohup {app_executable} &")
-                        await manager.send_personal_message(json.dumps({
-                            "type": "notification",
-                            "data": {
-                                "title": "App Launcher",
-                                "message": f"Launched {app_executable}",
-                                "type": "success",
-                                "timestamp": datetime.now().isoformat()
-                            }
-                        }), websocket)
-                    except Exception as e:
-                        await manager.send_personal_message(json.dumps({
-                            "type": "notification",
-                            "data": {
-                                "title": "App Launcher Error",
-                                "message": f"Failed to launch {app_executable}: {e}",
-                                "type": "error",
-                                "timestamp": datetime.now().isoformat()
-                            }
-                        }), websocket)
+                await handle_launch_application(message.get("data") or {}, websocket)
 
     except WebSocketDisconnect:
         manager.disconnect(websocket)
     except Exception as e:
         print(f"WebSocket error: {e}")
         manager.disconnect(websocket)
+    finally:
+        stop_connection_stream(websocket)
+        pty_sessions.detach_all(websocket)
+        await command_executor.cancel_all(websocket)
+        await topics.unsubscribe_all(websocket)
+        await voice_sessions.unsubscribe(websocket)
 
 # REST API endpoints
 @app.get("/api/system/info")
@@ -512,55 +632,104 @@ async def get_system_stats_api():
     """Get current system stats via REST API"""
     return get_system_stats()
 
+@app.get("/api/system/history")
+async def get_system_history_api(range: str = "15m", step: str = "", source: str = "memory"):
+    """Get CPU, memory, disk and network-rate history, e.g. ?range=24h&step=5m
+
+    source=disk reads the persistent store (averages only) when it is enabled.
+    """
+    try:
+        range_seconds = parse_duration(range)
+        step_seconds = parse_duration(step)
+    except ValueError:
+        return JSONResponse({"error": "range and step must be positive durations like 90, 90s, 15m, 24h or 7d"},
+                            status_code=400)
+    if source == "disk":
+        if not metrics_store:
+            return {"error": "Persistent metrics are disabled; set JARVIS_METRICS_DIR"}
+        now = time.time()
+        return await asyncio.to_thread(metrics_store.query, now - range_seconds, now, step_seconds or 60)
+    return history.query(range_seconds, step_seconds)
+
 @app.get("/api/processes")
-async def get_processes_api():
-    """Get running processes via REST API"""
-    return {"processes": get_process_list()}
+async def get_processes_api(sort: str = "cpu", limit: int = 10):
+    """Get the top running processes via REST API, sorted by cpu, memory or io"""
+    await process_table.ensure_fresh()
+    try:
+        return {"processes": get_process_list(sort, limit)}
+    except ValueError as e:
+        return {"error": str(e)}
+
+@app.get("/api/processes/tree")
+async def get_process_tree_api(root: Optional[int] = None, depth: int = 1, user: Optional[str] = None):
+    """Get the process tree below root (default: top-level processes), depth levels deep"""
+    await process_table.ensure_fresh()
+    return {"tree": process_table.snapshot.tree(root, max(0, depth), user)}
+
+@app.get("/api/processes/{pid}")
+async def get_process_detail_api(pid: int):
+    """Get cmdline, threads, memory, fds and IO counters for one process"""
+    await process_table.ensure_fresh()
+    detail = await process_table.detail(pid)
+    return detail if detail else {"error": f"No such process: {pid}"}
 
 @app.get("/api/network")
 async def get_network_api():
     """Get detailed network information via REST API"""
     try:
-        interfaces = {}
-        for iface_name, addrs in psutil.net_if_addrs().items():
-            interfaces[iface_name] = []
-            for addr in addrs:
-                interfaces[iface_name].append({
-                    "family": str(addr.family),
-                    "address": addr.address,
-                    "netmask": addr.netmask,
-                    "broadcast": addr.broadcast,
-                    "ptp": addr.ptp
-                })
-
-        connections = []
-        for conn in psutil.net_connections(kind='inet'):
-            if conn.status == 'ESTABLISHED':
-                connections.append({
-                    "fd": conn.fd,
-                    "family": str(conn.family),
-                    "type": str(conn.type),
-                    "local_address": f"{conn.laddr.ip}:{conn.laddr.port}" if conn.laddr else "N/A",
-                    "remote_address": f"{conn.raddr.ip}:{conn.raddr.port}" if conn.raddr else "N/A",
-                    "status": conn.status,
-                    "pid": conn.pid
-                })
-            if len(connections) >= 50:
-                break
-
-        return {
-            "interfaces": interfaces,
-            "connections": connections,
-            "timestamp": datetime.now().isoformat()
-        }
+        snapshot = await network_collector.get()
+        return snapshot.summary(limit=50)
     except Exception as e:
         print(f"Error in /api/network: {e}")
         return {"error": str(e)}
 
+@app.get("/api/network/connections")
+async def get_network_connections_api(state: str = "", pid: str = "", port: str = "", cidr: str = "",
+                                      sort: str = "", cursor: str = "", limit: int = DEFAULT_PAGE_SIZE):
+    """List inet connections with filtering, sorting and cursor pagination
+
+    e.g. ?state=ESTABLISHED,TIME_WAIT&port=443&cidr=10.0.0.0/8&sort=-pid&limit=200
+    """
+    try:
+        query = ConnectionQuery.from_params({"state": state, "pid": pid, "port": port, "cidr": cidr, "sort": sort})
+        return await network_collector.query(query, cursor or None, limit)
+    except (ValueError, LookupError) as e:
+        return {"error": str(e)}
+
+@app.get("/api/voice/status")
+async def get_voice_status_api():
+    """Whether the speech models are loaded, which engine is in use, recognizer pool usage and the voice session"""
+    return {**get_voice_status(), "session": voice_sessions.stats()}
+
 @app.get("/api/logs")
-async def get_logs_api():
+async def get_logs_api(limit: int = 10):
     """Get system logs via REST API"""
-    return {"logs": get_system_logs()}
+    return {"logs": get_system_logs(limit), "source": log_follower.source}
+
+@app.get("/api/logs/search")
+async def search_logs_api(q: str = "", unit: str = "", host: str = "", priority: str = "", since: str = "",
+                          cursor: str = "", limit: int = DEFAULT_SEARCH_LIMIT):
+    """Search retained log entries, newest first, with cursor pagination
+
+    e.g. ?q=failed+ssh*&unit=sshd.service&priority=err&since=1h&limit=50
+    priority matches that level and everything more severe.
+    """
+    try:
+        return log_store.search(q, unit or None, host or None, parse_priority(priority),
+                                parse_since(since), cursor or None, limit)
+    except ValueError as e:
+        return {"error": str(e)}
+
+@app.get("/api/apps")
+async def get_apps_api():
+    """Installed applications from the app index"""
+    apps = await get_installed_apps()
+    return {"apps": apps, "count": len(apps), "source": app_index.source}
+
+@app.get("/api/apps/search")
+async def search_apps_api(q: str = "", limit: int = DEFAULT_APP_RESULTS):
+    """Top matches for q over app names, generic names, keywords and commands"""
+    return await app_search.search(q, limit)
 
 @app.post("/api/notifications")
 async def send_notification(notification: dict):
@@ -572,7 +741,7 @@ async def send_notification(notification: dict):
             "timestamp": datetime.now().isoformat()
         }
     }
-    await manager.broadcast(json.dumps(message))
+    await manager.broadcast(encode_message(message))
     return {"status": "sent"}
 
 @app.get("/api/health")
@@ -0,0 +1,117 @@
+# backend/message_codec.py
+import json
+import os
+from typing import Any, Optional
+
+# Optional fast encoders; stdlib json is always available
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+try:
+    import msgpack
+    MSGPACK_AVAILABLE = True
+except ImportError:
+    MSGPACK_AVAILABLE = False
+
+# Wire encodings a client can ask for with /ws?encoding=...
+ENCODING_JSON = "json"                # UTF-8 JSON in text frames (default)
+ENCODING_JSON_BINARY = "json-binary"  # same bytes, sent as binary frames without re-encoding
+ENCODING_MSGPACK = "msgpack"          # MessagePack in binary frames
+DEFAULT_ENCODING = ENCODING_JSON
+
+# Set JARVIS_JSON_CODEC=stdlib to force the stdlib encoder
+JSON_CODEC = os.environ.get("JARVIS_JSON_CODEC", "orjson" if ORJSON_AVAILABLE else "stdlib")
+
+def available_encodings():
+    encodings = [ENCODING_JSON, ENCODING_JSON_BINARY]
+    if MSGPACK_AVAILABLE:
+        encodings.append(ENCODING_MSGPACK)
+    return encodings
+
+def resolve_encoding(requested: Optional[str]) -> str:
+    """Pick the wire encoding for a client, falling back to JSON text frames"""
+    if requested in available_encodings():
+        return requested
+    if requested:
+        print(f"Unsupported encoding '{requested}', using {DEFAULT_ENCODING}")
+    return DEFAULT_ENCODING
+
+def dumps_json(obj: Any) -> bytes:
+    """Serialize to compact UTF-8 JSON with the configured codec"""
+    if JSON_CODEC == "orjson" and ORJSON_AVAILABLE:
+        return orjson.dumps(obj, default=str)
+    return json.dumps(obj, separators=(",", ":"), ensure_ascii=False, default=str).encode("utf-8")
+
+def dumps_msgpack(obj: Any) -> bytes:
+    return msgpack.packb(obj, use_bin_type=True, default=str)
+
+class EncodedMessage:
+    """A message envelope that is serialized at most once per wire encoding.
+
+    A broadcast builds one of these and hands the same object to every
+    recipient, so N clients cost one encode, not N.
+    """
+    __slots__ = ("type", "message", "stream", "_json", "_text", "_msgpack")
+    # A full client queue may discard this frame to make room
+    droppable = True
+
+    def __init__(self, message: dict, stream: Optional[str] = None):
+        self.type: Optional[str] = message.get("type")
+        self.message = message
+        # Set for keyframe/delta messages so queues can detect a broken chain
+        self.stream = stream
+        self._json: Optional[bytes] = None
+        self._text: Optional[str] = None
+        self._msgpack: Optional[bytes] = None
+
+    @property
+    def json(self) -> bytes:
+        if self._json is None:
+            self._json = dumps_json(self.message)
+        return self._json
+
+    @property
+    def text(self) -> str:
+        if self._text is None:
+            self._text = self.json.decode("utf-8")
+        return self._text
+
+    @property
+    def msgpack(self) -> bytes:
+        if self._msgpack is None:
+            self._msgpack = dumps_msgpack(self.message)
+        return self._msgpack
+
+    def frame(self, encoding: str):
+        """Return the str (text frame) or bytes (binary frame) for an encoding"""
+        if encoding == ENCODING_MSGPACK:
+            return self.msgpack
+        if encoding == ENCODING_JSON_BINARY:
+            return self.json
+        return self.text
+
+def encode_message(message: dict) -> EncodedMessage:
+    """Wrap a {"type": ..., "data": ...} envelope for sending"""
+    return EncodedMessage(message)
+
+class BinaryFrame:
+    """Raw bytes that go out as a binary frame whatever the client's encoding.
+
+    Used for terminal data, which would only be inflated by a JSON or
+    msgpack envelope. The first byte is a frame kind that can't start an
+    encoded envelope (JSON starts with '{', a msgpack map with 0x8X/0xDE/0xDF).
+    """
+    __slots__ = ("type", "stream", "payload")
+    # Terminal bytes are a stream; losing a chunk would corrupt the screen
+    droppable = False
+
+    def __init__(self, payload: bytes, type: Optional[str] = None):
+        self.type = type
+        self.stream = None
+        self.payload = payload
+
+    def frame(self, encoding: str) -> bytes:
+        return self.payload
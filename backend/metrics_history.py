@@ -0,0 +1,280 @@
+# backend/metrics_history.py
+"""
+Fixed-size in-memory metric history.
+
+Every sample is kept at full resolution for the last few minutes and folded
+into 10 s / 1 min / 5 min min/max/avg rollups that cover hours to days. All
+storage is preallocated `array` columns, so memory use is fixed at start-up
+and reported by memory_bytes().
+"""
+import math
+import os
+from array import array
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from metrics_sampler import SAMPLE_INTERVAL, SystemSnapshot
+
+METRICS = ("cpu", "memory", "disk", "net_sent_rate", "net_recv_rate")
+
+# Configuration
+RAW_MINUTES = int(os.environ.get("JARVIS_HISTORY_RAW_MINUTES", "15"))
+# (bucket seconds, retained buckets)
+ROLLUP_TIERS = (
+    (10, 6 * 360),      # 10 s for 6 h
+    (60, 24 * 60),      # 1 min for 24 h
+    (300, 7 * 288),     # 5 min for 7 days
+)
+BACKFILL_SECONDS = int(os.environ.get("JARVIS_HISTORY_BACKFILL_SECONDS", "300"))
+
+_DURATION_UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+def parse_duration(value, default: Optional[float] = None) -> Optional[float]:
+    """Parse '90', '90s', '15m', '24h' or '7d' into seconds; ValueError unless finite and positive"""
+    if value is None or value == "":
+        return default
+    if isinstance(value, (int, float)):
+        seconds = float(value)
+    else:
+        value = str(value).strip().lower()
+        if value and value[-1] in _DURATION_UNITS:
+            seconds = float(value[:-1]) * _DURATION_UNITS[value[-1]]
+        else:
+            seconds = float(value)
+    if not math.isfinite(seconds) or seconds <= 0:
+        raise ValueError(f"Duration must be finite and positive, got {value!r}")
+    return seconds
+
+class RingSeries:
+    """A ring of buckets with a timestamp, count and min/max/avg per metric.
+
+    Timestamps are appended in increasing order, so range lookups are a
+    binary search over the ring.
+    """
+
+    def __init__(self, resolution: float, capacity: int):
+        self.resolution = resolution
+        self.capacity = capacity
+        self.times = array('d', [0.0]) * capacity
+        self.counts = array('I', [0]) * capacity
+        self.columns: Dict[str, Tuple[array, array, array]] = {
+            name: (array('d', [0.0]) * capacity, array('d', [0.0]) * capacity, array('d', [0.0]) * capacity)
+            for name in METRICS
+        }
+        self.head = 0  # next slot to write
+        self.size = 0
+
+    @property
+    def span(self) -> float:
+        return self.resolution * self.capacity
+
+    def memory_bytes(self) -> int:
+        total = self.times.itemsize * self.capacity + self.counts.itemsize * self.capacity
+        for columns in self.columns.values():
+            total += sum(col.itemsize * self.capacity for col in columns)
+        return total
+
+    def append(self, timestamp: float, count: int, mins: Sequence[float], maxs: Sequence[float], avgs: Sequence[float]):
+        slot = self.head
+        self.times[slot] = timestamp
+        self.counts[slot] = count
+        for i, name in enumerate(METRICS):
+            mn, mx, av = self.columns[name]
+            mn[slot] = mins[i]
+            mx[slot] = maxs[i]
+            av[slot] = avgs[i]
+        self.head = (slot + 1) % self.capacity
+        if self.size < self.capacity:
+            self.size += 1
+
+    def _slot(self, logical: int) -> int:
+        """Map 0..size-1 (oldest to newest) to a physical slot"""
+        return (self.head - self.size + logical) % self.capacity
+
+    def _first_at_or_after(self, timestamp: float) -> int:
+        lo, hi = 0, self.size
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.times[self._slot(mid)] < timestamp:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def oldest(self) -> Optional[float]:
+        return self.times[self._slot(0)] if self.size else None
+
+    def ranges_between(self, start: float, end: float) -> List[Tuple[int, int]]:
+        """Physical [lo, hi) slot ranges holding start..end, oldest first (two if the ring wraps)"""
+        first = self._first_at_or_after(start)
+        last = self._first_at_or_after(end + 1e-9)
+        if first >= last:
+            return []
+        lo, hi = self._slot(first), self._slot(last - 1) + 1
+        if lo < hi:
+            return [(lo, hi)]
+        return [(lo, self.capacity), (0, hi)]
+
+    def slots_between(self, start: float, end: float) -> List[int]:
+        return [slot for lo, hi in self.ranges_between(start, end) for slot in range(lo, hi)]
+
+class _Accumulator:
+    """The in-progress bucket of one rollup tier"""
+
+    def __init__(self, series: RingSeries):
+        self.series = series
+        self.bucket: Optional[float] = None
+        self.reset()
+
+    def reset(self):
+        n = len(METRICS)
+        self.count = 0
+        self.mins = [float("inf")] * n
+        self.maxs = [float("-inf")] * n
+        self.sums = [0.0] * n
+
+    def add(self, timestamp: float, values: Sequence[float]):
+        bucket = timestamp - (timestamp % self.series.resolution)
+        if self.bucket is not None and bucket != self.bucket:
+            self.flush()
+        self.bucket = bucket
+        self.count += 1
+        for i, value in enumerate(values):
+            if value < self.mins[i]:
+                self.mins[i] = value
+            if value > self.maxs[i]:
+                self.maxs[i] = value
+            self.sums[i] += value
+
+    def flush(self):
+        if self.count:
+            avgs = [round(total / self.count, 2) for total in self.sums]
+            self.series.append(self.bucket, self.count, self.mins, self.maxs, avgs)
+        self.reset()
+
+class MetricsHistory:
+    """Full-resolution ring plus rollup tiers, fed from MetricsSampler snapshots"""
+
+    def __init__(self, raw_seconds: float = RAW_MINUTES * 60, raw_resolution: float = SAMPLE_INTERVAL,
+                 tiers: Sequence[Tuple[int, int]] = ROLLUP_TIERS):
+        raw_capacity = max(1, int(raw_seconds / raw_resolution))
+        self.raw = RingSeries(raw_resolution, raw_capacity)
+        self.rollups = [RingSeries(resolution, capacity) for resolution, capacity in tiers]
+        self._accumulators = [_Accumulator(series) for series in self.rollups]
+        self._prev: Optional[SystemSnapshot] = None
+
+    def memory_bytes(self) -> int:
+        return self.raw.memory_bytes() + sum(series.memory_bytes() for series in self.rollups)
+
+    def record(self, snapshot: SystemSnapshot) -> Tuple[float, ...]:
+        """MetricsSampler listener: derive net rates, append one sample and return its values"""
+        sent_rate = recv_rate = 0.0
+        prev = self._prev
+        if prev is not None and snapshot.monotonic > prev.monotonic:
+            elapsed = snapshot.monotonic - prev.monotonic
+            sent_rate = max(0, snapshot.network.bytes_sent - prev.network.bytes_sent) / elapsed
+            recv_rate = max(0, snapshot.network.bytes_recv - prev.network.bytes_recv) / elapsed
+        self._prev = snapshot
+        values = (snapshot.cpu, snapshot.memory, snapshot.disk, round(sent_rate, 1), round(recv_rate, 1))
+        self.add(snapshot.epoch, values)
+        return values
+
+    def add(self, timestamp: float, values: Sequence[float]):
+        self.raw.append(timestamp, 1, values, values, values)
+        for accumulator in self._accumulators:
+            accumulator.add(timestamp, values)
+
+    def absorb(self, older: "MetricsHistory"):
+        """Put the samples replayed into older in front of the ones recorded here since.
+
+        Re-adds this history's raw samples newer than older's last one to
+        older, then takes over its series. Keeps this history's previous
+        snapshot, so net rates carry on from the live sampler.
+        """
+        after = older.raw.times[older.raw._slot(older.raw.size - 1)] if older.raw.size else float("-inf")
+        columns = [self.raw.columns[name][2] for name in METRICS]
+        for slot in self.raw.slots_between(after + 1e-9, float("inf")):
+            older.add(self.raw.times[slot], [column[slot] for column in columns])
+        self.raw = older.raw
+        self.rollups = older.rollups
+        self._accumulators = older._accumulators
+
+    def _pick_series(self, range_seconds: float, step: float) -> RingSeries:
+        """Coarsest tier that covers the range and is no coarser than step, else the finest that covers it"""
+        tiers = [self.raw] + self.rollups
+        covering = [series for series in tiers if series.span >= range_seconds] or [max(tiers, key=lambda s: s.span)]
+        fine_enough = [series for series in covering if series.resolution <= step]
+        if fine_enough:
+            return max(fine_enough, key=lambda s: s.resolution)
+        return min(covering, key=lambda s: s.resolution)
+
+    def query(self, range_seconds: float, step: Optional[float] = None, end: Optional[float] = None) -> dict:
+        """Columnar min/max/avg per metric over the last range_seconds, bucketed by step"""
+        if end is None:
+            end = self.raw.times[self.raw._slot(self.raw.size - 1)] if self.raw.size else 0.0
+        series = self._pick_series(range_seconds, step or self.raw.resolution)
+        step = max(step or series.resolution, series.resolution)
+        start = end - range_seconds
+
+        if step == series.resolution:
+            # Buckets line up with stored slots: copy column slices as-is
+            ranges = series.ranges_between(start, end)
+            return {
+                "start": start,
+                "end": end,
+                "step": step,
+                "resolution": series.resolution,
+                "timestamps": [t for lo, hi in ranges for t in series.times[lo:hi].tolist()],
+                "metrics": {
+                    name: {
+                        key: [v for lo, hi in ranges for v in column[lo:hi].tolist()]
+                        for key, column in zip(("min", "max", "avg"), series.columns[name])
+                    }
+                    for name in METRICS
+                }
+            }
+
+        timestamps: List[float] = []
+        out = {name: {"min": [], "max": [], "avg": []} for name in METRICS}
+        bucket = None
+        count = 0
+        mins = maxs = sums = None
+        n = len(METRICS)
+        columns = [series.columns[name] for name in METRICS]
+
+        def emit():
+            timestamps.append(bucket)
+            for i, name in enumerate(METRICS):
+                out[name]["min"].append(round(mins[i], 2))
+                out[name]["max"].append(round(maxs[i], 2))
+                out[name]["avg"].append(round(sums[i] / count, 2))
+
+        for slot in series.slots_between(start, end):
+            ts = series.times[slot]
+            slot_bucket = ts - (ts % step)
+            if slot_bucket != bucket:
+                if bucket is not None:
+                    emit()
+                bucket = slot_bucket
+                count = 0
+                mins, maxs, sums = [float("inf")] * n, [float("-inf")] * n, [0.0] * n
+            weight = series.counts[slot]
+            count += weight
+            for i, (mn, mx, av) in enumerate(columns):
+                if mn[slot] < mins[i]:
+                    mins[i] = mn[slot]
+                if mx[slot] > maxs[i]:
+                    maxs[i] = mx[slot]
+                sums[i] += av[slot] * weight
+        if bucket is not None:
+            emit()
+
+        return {
+            "start": start,
+            "end": end,
+            "step": step,
+            "resolution": series.resolution,
+            "timestamps": timestamps,
+            "metrics": out
+        }
+
+history = MetricsHistory()
@@ -0,0 +1,131 @@
+# backend/metrics_sampler.py
+import asyncio
+import os
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Callable, List, Optional
+
+import psutil
+
+# Configuration
+SAMPLE_INTERVAL = float(os.environ.get("JARVIS_SAMPLE_INTERVAL", "1.0"))
+DISK_PATH = os.environ.get("JARVIS_DISK_PATH", "/")
+
+@dataclass(frozen=True)
+class NetworkCounters:
+    bytes_sent: int = 0
+    bytes_recv: int = 0
+    packets_sent: int = 0
+    packets_recv: int = 0
+
+@dataclass(frozen=True)
+class SystemSnapshot:
+    """Immutable view of the host at one sample instant"""
+    cpu: float = 0.0
+    memory: float = 0.0
+    disk: float = 0.0
+    network: NetworkCounters = field(default_factory=NetworkCounters)
+    timestamp: str = ""
+    epoch: float = 0.0
+    monotonic: float = 0.0
+
+    def to_dict(self) -> dict:
+        """Shape used by the system_stats message and /api/system/stats"""
+        return {
+            "cpu": self.cpu,
+            "memory": self.memory,
+            "disk": self.disk,
+            "network": {
+                "bytes_sent": self.network.bytes_sent,
+                "bytes_recv": self.network.bytes_recv,
+                "packets_sent": self.network.packets_sent,
+                "packets_recv": self.network.packets_recv
+            },
+            "timestamp": self.timestamp
+        }
+
+def _take_sample() -> SystemSnapshot:
+    """Read every counter once without sleeping.
+
+    cpu_percent(interval=None) reports usage since the previous call, so the
+    sampler's own cadence is the measurement window.
+    """
+    cpu_percent = psutil.cpu_percent(interval=None)
+    memory = psutil.virtual_memory()
+    disk = psutil.disk_usage(DISK_PATH)
+    net_io = psutil.net_io_counters()
+
+    return SystemSnapshot(
+        cpu=round(cpu_percent, 1),
+        memory=round(memory.percent, 1),
+        disk=round((disk.used / disk.total) * 100, 1),
+        network=NetworkCounters(
+            bytes_sent=net_io.bytes_sent,
+            bytes_recv=net_io.bytes_recv,
+            packets_sent=net_io.packets_sent,
+            packets_recv=net_io.packets_recv
+        ),
+        timestamp=datetime.now().isoformat(),
+        epoch=time.time(),
+        monotonic=time.monotonic()
+    )
+
+class MetricsSampler:
+    """Samples host metrics in the background and publishes the latest snapshot.
+
+    Readers call latest(), which is a plain attribute read: no psutil calls
+    and no waiting on the sampler.
+    """
+
+    def __init__(self, interval: float = SAMPLE_INTERVAL):
+        self.interval = interval
+        self._latest = SystemSnapshot(timestamp=datetime.now().isoformat())
+        self._listeners: List[Callable[[SystemSnapshot], None]] = []
+        self._task: Optional[asyncio.Task] = None
+
+    def latest(self) -> SystemSnapshot:
+        return self._latest
+
+    def add_listener(self, callback: Callable[[SystemSnapshot], None]):
+        """Register a callback invoked on the event loop after each sample"""
+        self._listeners.append(callback)
+
+    async def sample_once(self) -> SystemSnapshot:
+        # psutil reads /proc and statfs; keep it off the loop in case the
+        # disk is a slow mount.
+        snapshot = await asyncio.to_thread(_take_sample)
+        self._latest = snapshot
+        for callback in self._listeners:
+            try:
+                callback(snapshot)
+            except Exception as e:
+                print(f"Error in metrics listener: {e}")
+        return snapshot
+
+    def start(self):
+        if self._task is None or self._task.done():
+            # Prime the CPU counters so the first published value covers a real window
+            psutil.cpu_percent(interval=None)
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        while True:
+            started = time.monotonic()
+            try:
+                await self.sample_once()
+            except Exception as e:
+                print(f"Error sampling system metrics: {e}")
+            elapsed = time.monotonic() - started
+            await asyncio.sleep(max(0.0, self.interval - elapsed))
+
+sampler = MetricsSampler()
@@ -0,0 +1,299 @@
+# backend/metrics_store.py
+"""
+Optional on-disk metric history in memory-mapped segment files.
+
+Each segment is a preallocated file with a small header followed by
+fixed-width records (epoch double + one float32 per metric). The newest
+segment is appended through a writable mapping; older segments are mapped
+read-only and range reads hand out memoryview slices of the mapping, so
+nothing is copied until a record is unpacked.
+
+Sealed segments older than COMPACT_AFTER_HOURS are rewritten at one record
+per minute, and segments past the retention window are deleted. Enabled by
+setting JARVIS_METRICS_DIR.
+
+Appends come from the event loop; queries, replay and retention run in
+worker threads. A lock guards the segment list: readers take their views
+under it, and retention rewrites sealed segments outside it and only
+swaps them in under it.
+"""
+import mmap
+import os
+import struct
+import threading
+import time
+from typing import Iterator, List, Optional, Sequence, Tuple
+
+from metrics_history import METRICS
+
+# Configuration
+METRICS_DIR = os.environ.get("JARVIS_METRICS_DIR", "")
+RETENTION_DAYS = float(os.environ.get("JARVIS_METRICS_RETENTION_DAYS", "7"))
+SEGMENT_RECORDS = int(os.environ.get("JARVIS_METRICS_SEGMENT_RECORDS", str(6 * 3600)))
+COMPACT_AFTER_HOURS = float(os.environ.get("JARVIS_METRICS_COMPACT_AFTER_HOURS", "24"))
+COMPACT_BUCKET_SECONDS = 60
+FLUSH_INTERVAL = 10.0
+
+MAGIC = b"JVMS"
+VERSION = 1
+FLAG_COMPACTED = 1
+# magic, version, flags, record size, record capacity, record count
+HEADER = struct.Struct("<4sHHIII")
+HEADER_SIZE = 32
+RECORD = struct.Struct("<d" + "f" * len(METRICS))
+
+class Segment:
+    """One mapped segment file"""
+
+    def __init__(self, path: str, writable: bool = False):
+        self.path = path
+        self.writable = writable
+        self._file = open(path, "r+b" if writable else "rb")
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_WRITE if writable else mmap.ACCESS_READ)
+        magic, version, self.flags, record_size, self.capacity, self.count = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC or version != VERSION or record_size != RECORD.size:
+            self.close()
+            raise ValueError(f"{path} is not a version {VERSION} metrics segment")
+
+    @classmethod
+    def create(cls, path: str, capacity: int = SEGMENT_RECORDS, flags: int = 0) -> "Segment":
+        with open(path, "wb") as f:
+            f.truncate(HEADER_SIZE + capacity * RECORD.size)
+            f.write(HEADER.pack(MAGIC, VERSION, flags, RECORD.size, capacity, 0))
+        return cls(path, writable=True)
+
+    @property
+    def full(self) -> bool:
+        return self.count >= self.capacity
+
+    @property
+    def compacted(self) -> bool:
+        return bool(self.flags & FLAG_COMPACTED)
+
+    def first_time(self) -> Optional[float]:
+        return self._time_at(0) if self.count else None
+
+    def last_time(self) -> Optional[float]:
+        return self._time_at(self.count - 1) if self.count else None
+
+    def _time_at(self, index: int) -> float:
+        return struct.unpack_from("<d", self._map, HEADER_SIZE + index * RECORD.size)[0]
+
+    def _first_at_or_after(self, timestamp: float) -> int:
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._time_at(mid) < timestamp:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def append(self, timestamp: float, values: Sequence[float]):
+        RECORD.pack_into(self._map, HEADER_SIZE + self.count * RECORD.size, timestamp, *values)
+        self.count += 1
+        HEADER.pack_into(self._map, 0, MAGIC, VERSION, self.flags, RECORD.size, self.capacity, self.count)
+
+    def view(self, start: float, end: float) -> memoryview:
+        """Zero-copy slice of the records with start <= time <= end"""
+        first = self._first_at_or_after(start)
+        last = self._first_at_or_after(end + 1e-9)
+        return memoryview(self._map)[HEADER_SIZE + first * RECORD.size:HEADER_SIZE + last * RECORD.size]
+
+    def flush(self):
+        if self.writable:
+            self._map.flush()
+
+    def close(self):
+        try:
+            self.flush()
+            self._map.close()
+        except (BufferError, ValueError):
+            pass  # A reader still holds a view; the mapping is released with it
+        self._file.close()
+
+def iter_records(view: memoryview) -> Iterator[Tuple[float, ...]]:
+    """Unpack (timestamp, *metrics) tuples straight from a mapped slice"""
+    return RECORD.iter_unpack(view)
+
+class MetricsStore:
+    """Appends samples to the newest segment and serves range reads across segments"""
+
+    def __init__(self, directory: str = METRICS_DIR, segment_records: int = SEGMENT_RECORDS,
+                 retention_days: float = RETENTION_DAYS):
+        self.directory = directory
+        self.segment_records = segment_records
+        self.retention = retention_days * 86400
+        self.segments: List[Segment] = []
+        self._lock = threading.Lock()
+        self._last_flush = time.monotonic()
+        os.makedirs(directory, exist_ok=True)
+        self._open_existing()
+
+    def _segment_path(self, first_time: float, compacted: bool = False) -> str:
+        suffix = "c" if compacted else ""
+        return os.path.join(self.directory, f"metrics-{int(first_time * 1000):015d}{suffix}.seg")
+
+    def _open_existing(self):
+        names = sorted(name for name in os.listdir(self.directory) if name.startswith("metrics-") and name.endswith(".seg"))
+        for name in names:
+            path = os.path.join(self.directory, name)
+            try:
+                segment = Segment(path)
+            except (OSError, ValueError) as e:
+                print(f"Skipping unreadable metrics segment {path}: {e}")
+                continue
+            if segment.count == 0:
+                segment.close()
+                os.remove(path)
+                continue
+            self.segments.append(segment)
+        # Keep appending to the newest segment if it has room
+        if self.segments and not self.segments[-1].full and not self.segments[-1].compacted:
+            tail = self.segments.pop()
+            tail.close()
+            self.segments.append(Segment(tail.path, writable=True))
+        print(f"Metrics store: {len(self.segments)} segments in {self.directory}")
+
+    def append(self, timestamp: float, values: Sequence[float]):
+        tail = self.segments[-1] if self.segments else None
+        if tail is None or not tail.writable or tail.full:
+            with self._lock:
+                if tail is not None and tail.writable:
+                    tail.close()
+                    self.segments[-1] = Segment(tail.path)
+                tail = Segment.create(self._segment_path(timestamp), self.segment_records)
+                self.segments.append(tail)
+        tail.append(timestamp, values)
+        now = time.monotonic()
+        if now - self._last_flush >= FLUSH_INTERVAL:
+            tail.flush()
+            self._last_flush = now
+
+    def views(self, start: float, end: float) -> List[memoryview]:
+        """Zero-copy record slices covering start..end, oldest first.
+
+        Taken under the lock; a view keeps its mapping alive even if
+        retention swaps the segment out while the caller is reading it.
+        """
+        views = []
+        with self._lock:
+            for segment in self.segments:
+                first, last = segment.first_time(), segment.last_time()
+                if first is None or last < start or first > end:
+                    continue
+                view = segment.view(start, end)
+                if len(view):
+                    views.append(view)
+        return views
+
+    def query(self, start: float, end: float, step: float) -> dict:
+        """Average records into step-second buckets, in the same columnar shape as MetricsHistory"""
+        timestamps: List[float] = []
+        avgs = {name: [] for name in METRICS}
+        bucket = None
+        count = 0
+        sums = [0.0] * len(METRICS)
+
+        def emit():
+            timestamps.append(bucket)
+            for i, name in enumerate(METRICS):
+                avgs[name].append(round(sums[i] / count, 2))
+
+        for view in self.views(start, end):
+            for record in iter_records(view):
+                record_bucket = record[0] - (record[0] % step)
+                if record_bucket != bucket:
+                    if bucket is not None:
+                        emit()
+                    bucket, count, sums = record_bucket, 0, [0.0] * len(METRICS)
+                count += 1
+                for i in range(len(METRICS)):
+                    sums[i] += record[i + 1]
+            view.release()
+        if bucket is not None:
+            emit()
+        return {
+            "start": start,
+            "end": end,
+            "step": step,
+            "timestamps": timestamps,
+            "metrics": {name: {"avg": values} for name, values in avgs.items()}
+        }
+
+    def replay(self, history, since: float, until: Optional[float] = None):
+        """Feed stored samples from since to until (default now) into a MetricsHistory, oldest first"""
+        replayed = 0
+        for view in self.views(since, until or time.time()):
+            for record in iter_records(view):
+                history.add(record[0], record[1:])
+                replayed += 1
+            view.release()
+        return replayed
+
+    def enforce_retention(self, now: Optional[float] = None):
+        """Delete expired segments and compact old full-resolution ones. Blocking; run it in a worker thread."""
+        now = now or time.time()
+        with self._lock:
+            expired = [segment for segment in self.segments
+                       if not segment.writable and segment.last_time() < now - self.retention]
+            self.segments = [segment for segment in self.segments if segment not in expired]
+            for segment in expired:
+                segment.close()
+                os.remove(segment.path)
+                print(f"Removed expired metrics segment {segment.path}")
+            compact_before = now - COMPACT_AFTER_HOURS * 3600
+            candidates = [segment for segment in self.segments
+                          if not segment.writable and not segment.compacted and segment.last_time() < compact_before]
+
+        # Sealed segments never change, so they can be rewritten without holding up appends or queries
+        for segment in candidates:
+            compacted = self._compact(segment)
+            if compacted is segment:
+                continue
+            with self._lock:
+                self.segments[self.segments.index(segment)] = compacted
+                segment.close()
+                os.remove(segment.path)
+
+    def _compact(self, segment: Segment) -> Segment:
+        """Rewrite a sealed segment at one averaged record per COMPACT_BUCKET_SECONDS"""
+        buckets: List[Tuple[float, List[float], int]] = []
+        view = segment.view(segment.first_time(), segment.last_time())
+        for record in iter_records(view):
+            bucket = record[0] - (record[0] % COMPACT_BUCKET_SECONDS)
+            if not buckets or buckets[-1][0] != bucket:
+                buckets.append((bucket, [0.0] * len(METRICS), 0))
+            _, sums, count = buckets[-1]
+            for i in range(len(METRICS)):
+                sums[i] += record[i + 1]
+            buckets[-1] = (bucket, sums, count + 1)
+        view.release()
+        if len(buckets) * 2 > segment.count:
+            return segment  # Already sparse; rewriting would save little
+
+        path = self._segment_path(segment.first_time(), compacted=True)
+        tmp_path = path + ".tmp"
+        compacted = Segment.create(tmp_path, max(1, len(buckets)), flags=FLAG_COMPACTED)
+        for bucket, sums, count in buckets:
+            compacted.append(bucket, [total / count for total in sums])
+        compacted.close()
+        os.replace(tmp_path, path)
+        print(f"Compacted metrics segment {segment.path}: {segment.count} -> {len(buckets)} records")
+        return Segment(path)
+
+    def close(self):
+        with self._lock:
+            for segment in self.segments:
+                segment.close()
+            self.segments = []
+
+def open_store() -> Optional[MetricsStore]:
+    """Open the store configured by JARVIS_METRICS_DIR, or None if persistence is off"""
+    if not METRICS_DIR:
+        return None
+    try:
+        return MetricsStore(METRICS_DIR)
+    except OSError as e:
+        print(f"✗ Metrics store unavailable at {METRICS_DIR}: {e}")
+        return None
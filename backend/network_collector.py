@@ -0,0 +1,287 @@
+# backend/network_collector.py
+import asyncio
+import base64
+import ipaddress
+import os
+import socket
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple, Union
+
+import psutil
+
+# Configuration
+NETSTAT_TTL = float(os.environ.get("JARVIS_NETSTAT_TTL", "2.0"))
+# Snapshots kept alive so pagination cursors stay valid across refreshes
+RETAINED_SNAPSHOTS = 4
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+SORT_KEYS = ("pid", "port", "local", "remote", "state")
+
+@dataclass(frozen=True)
+class NetworkSnapshot:
+    """One scan of interfaces and inet sockets, indexed by pid, port and state"""
+    interfaces: Dict[str, List[dict]] = field(default_factory=dict)
+    connections: List[dict] = field(default_factory=list)
+    timestamp: str = ""
+    monotonic: float = 0.0
+    scan_seconds: float = 0.0
+    generation: int = 0
+    # Row numbers into connections, in scan order
+    by_pid: Dict[Optional[int], List[int]] = field(default_factory=dict, repr=False)
+    by_port: Dict[int, List[int]] = field(default_factory=dict, repr=False)
+    by_state: Dict[str, List[int]] = field(default_factory=dict, repr=False)
+    # Per-row (ip version, ip as int) of the remote end, None if unconnected
+    remote_ips: List[Optional[Tuple[int, int]]] = field(default_factory=list, repr=False)
+    local_ports: List[int] = field(default_factory=list, repr=False)
+
+    def summary(self, limit: int = 50) -> dict:
+        """Interfaces plus the first established connections, as sent in network_update"""
+        return {
+            "interfaces": self.interfaces,
+            "connections": self.established(limit),
+            "timestamp": self.timestamp
+        }
+
+    def established(self, limit: Optional[int] = None) -> List[dict]:
+        rows = self.by_state.get("ESTABLISHED", [])
+        if limit is not None:
+            rows = rows[:limit]
+        return [self.connections[row] for row in rows]
+
+    def select(self, query: "ConnectionQuery") -> List[int]:
+        """Row numbers matching a query, in the requested order"""
+        lists = []
+        if query.states:
+            if len(query.states) == 1:
+                lists.append(self.by_state.get(query.states[0], []))
+            else:
+                lists.append(sorted(row for state in query.states for row in self.by_state.get(state, [])))
+        if query.pid is not None:
+            lists.append(self.by_pid.get(query.pid, []))
+        if query.port is not None:
+            lists.append(self.by_port.get(query.port, []))
+
+        if lists:
+            # Walk the shortest posting list and probe the others
+            lists.sort(key=len)
+            rows = list(lists[0])
+            for other in lists[1:]:
+                other = set(other)
+                rows = [row for row in rows if row in other]
+        else:
+            rows = list(range(len(self.connections)))
+
+        if query.network is not None:
+            version = query.network.version
+            net = int(query.network.network_address)
+            mask = int(query.network.netmask)
+            remote_ips = self.remote_ips
+            rows = [row for row in rows
+                    if remote_ips[row] is not None and remote_ips[row][0] == version
+                    and remote_ips[row][1] & mask == net]
+
+        if query.sort:
+            rows.sort(key=self._sort_key(query.sort), reverse=query.descending)
+        return rows
+
+    def _sort_key(self, sort: str):
+        conns = self.connections
+        if sort == "pid":
+            return lambda row: conns[row]["pid"] or 0
+        if sort == "port":
+            return lambda row: self.local_ports[row]
+        if sort == "remote":
+            return lambda row: self.remote_ips[row] or (0, 0)
+        if sort == "state":
+            return lambda row: conns[row]["status"]
+        return lambda row: conns[row]["local_address"]
+
+@dataclass(frozen=True)
+class ConnectionQuery:
+    """Filters and ordering for /api/network/connections and subscribe_connections"""
+    states: Tuple[str, ...] = ()
+    pid: Optional[int] = None
+    port: Optional[int] = None
+    network: Optional[Union[ipaddress.IPv4Network, ipaddress.IPv6Network]] = None
+    sort: Optional[str] = None
+    descending: bool = False
+
+    @classmethod
+    def from_params(cls, params: dict) -> "ConnectionQuery":
+        """Parse request parameters; raises ValueError on bad input"""
+        states = tuple(s.strip().upper() for s in str(params.get("state") or "").split(",") if s.strip())
+        pid = params.get("pid")
+        port = params.get("port")
+        cidr = params.get("cidr")
+        sort = str(params.get("sort") or "")
+        descending = sort.startswith("-")
+        sort = sort.lstrip("-") or None
+        if sort is not None and sort not in SORT_KEYS:
+            raise ValueError(f"sort must be one of {', '.join(SORT_KEYS)} (prefix '-' for descending)")
+        return cls(
+            states=states,
+            pid=int(pid) if pid not in (None, "") else None,
+            port=int(port) if port not in (None, "") else None,
+            network=ipaddress.ip_network(cidr, strict=False) if cidr else None,
+            sort=sort,
+            descending=descending
+        )
+
+def encode_cursor(generation: int, offset: int) -> str:
+    return base64.urlsafe_b64encode(f"{generation}:{offset}".encode()).decode()
+
+def decode_cursor(cursor: str) -> Tuple[int, int]:
+    try:
+        generation, offset = base64.urlsafe_b64decode(cursor.encode()).decode().split(":")
+        return int(generation), int(offset)
+    except (ValueError, UnicodeDecodeError):
+        raise ValueError("Malformed cursor")
+
+def _format_address(addr) -> str:
+    return f"{addr.ip}:{addr.port}" if addr else "N/A"
+
+def _ip_key(ip: str) -> Optional[Tuple[int, int]]:
+    for family, version in ((socket.AF_INET, 4), (socket.AF_INET6, 6)):
+        try:
+            return version, int.from_bytes(socket.inet_pton(family, ip), "big")
+        except OSError:
+            continue
+    return None
+
+def _scan(generation: int = 0) -> NetworkSnapshot:
+    """Walk net_if_addrs and /proc/net/{tcp,udp}* once and index the result. Runs in a worker thread."""
+    started = time.monotonic()
+    interfaces = {}
+    for iface_name, addrs in psutil.net_if_addrs().items():
+        interfaces[iface_name] = [{
+            "family": str(addr.family),
+            "address": addr.address,
+            "netmask": addr.netmask,
+            "broadcast": addr.broadcast,
+            "ptp": addr.ptp
+        } for addr in addrs]
+
+    connections = []
+    by_pid: Dict[Optional[int], List[int]] = {}
+    by_port: Dict[int, List[int]] = {}
+    by_state: Dict[str, List[int]] = {}
+    remote_ips = []
+    local_ports = []
+    for row, conn in enumerate(psutil.net_connections(kind='inet')):
+        connections.append({
+            "fd": conn.fd,
+            "family": str(conn.family),
+            "type": str(conn.type),
+            "local_address": _format_address(conn.laddr),
+            "remote_address": _format_address(conn.raddr),
+            "status": conn.status,
+            "pid": conn.pid
+        })
+        by_pid.setdefault(conn.pid, []).append(row)
+        by_state.setdefault(conn.status, []).append(row)
+        local_port = conn.laddr.port if conn.laddr else 0
+        local_ports.append(local_port)
+        if conn.laddr:
+            by_port.setdefault(local_port, []).append(row)
+        if conn.raddr:
+            if conn.raddr.port != local_port:
+                by_port.setdefault(conn.raddr.port, []).append(row)
+            remote_ips.append(_ip_key(conn.raddr.ip))
+        else:
+            remote_ips.append(None)
+
+    finished = time.monotonic()
+    return NetworkSnapshot(
+        interfaces=interfaces,
+        connections=connections,
+        timestamp=datetime.now().isoformat(),
+        monotonic=finished,
+        scan_seconds=finished - started,
+        generation=generation,
+        by_pid=by_pid,
+        by_port=by_port,
+        by_state=by_state,
+        remote_ips=remote_ips,
+        local_ports=local_ports
+    )
+
+class NetworkCollector:
+    """Serves a TTL-bounded network snapshot to every caller.
+
+    A stale snapshot triggers one scan in a worker thread; callers arriving
+    while it runs await the same in-flight scan instead of starting another.
+    """
+
+    def __init__(self, ttl: float = NETSTAT_TTL):
+        self.ttl = ttl
+        self._snapshot: Optional[NetworkSnapshot] = None
+        self._inflight: Optional[asyncio.Future] = None
+        self._generation = 0
+        self._recent: "OrderedDict[int, NetworkSnapshot]" = OrderedDict()
+
+    def cached(self) -> Optional[NetworkSnapshot]:
+        return self._snapshot
+
+    async def get(self, max_age: Optional[float] = None) -> NetworkSnapshot:
+        max_age = self.ttl if max_age is None else max_age
+        snapshot = self._snapshot
+        if snapshot is not None and time.monotonic() - snapshot.monotonic <= max_age:
+            return snapshot
+        if self._inflight is None:
+            self._inflight = asyncio.ensure_future(self._refresh())
+        # Shield so one caller being cancelled doesn't abort the scan for the others
+        return await asyncio.shield(self._inflight)
+
+    async def _refresh(self) -> NetworkSnapshot:
+        try:
+            self._generation += 1
+            snapshot = await asyncio.to_thread(_scan, self._generation)
+            self._snapshot = snapshot
+            self._recent[snapshot.generation] = snapshot
+            while len(self._recent) > RETAINED_SNAPSHOTS:
+                self._recent.popitem(last=False)
+            return snapshot
+        finally:
+            self._inflight = None
+
+    async def query(self, query: ConnectionQuery, cursor: Optional[str] = None,
+                    limit: int = DEFAULT_PAGE_SIZE) -> dict:
+        """One page of matching connections. A cursor pins the snapshot its first page came from."""
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+        if cursor:
+            generation, offset = decode_cursor(cursor)
+            snapshot = self._recent.get(generation)
+            if snapshot is None:
+                raise LookupError("Cursor expired; restart the listing without a cursor")
+        else:
+            snapshot, offset = await self.get(), 0
+
+        started = time.perf_counter()
+        rows = snapshot.select(query)
+        page = rows[offset:offset + limit]
+        next_offset = offset + len(page)
+        return {
+            "connections": [snapshot.connections[row] for row in page],
+            "total": len(rows),
+            "next_cursor": encode_cursor(snapshot.generation, next_offset) if next_offset < len(rows) else None,
+            "timestamp": snapshot.timestamp,
+            "query_ms": round((time.perf_counter() - started) * 1000, 2)
+        }
+
+    async def stream(self, query: ConnectionQuery, chunk_size: int = DEFAULT_PAGE_SIZE):
+        """Yield (chunk, total, done) for every match in the current snapshot"""
+        chunk_size = max(1, min(chunk_size, MAX_PAGE_SIZE))
+        snapshot = await self.get()
+        rows = snapshot.select(query)
+        if not rows:
+            yield [], 0, True
+            return
+        for start in range(0, len(rows), chunk_size):
+            chunk = [snapshot.connections[row] for row in rows[start:start + chunk_size]]
+            yield chunk, len(rows), start + chunk_size >= len(rows)
+
+collector = NetworkCollector()
@@ -0,0 +1,318 @@
+# backend/process_table.py
+import asyncio
+import heapq
+import os
+import time
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Dict, List, Optional
+
+import psutil
+
+from scheduler import AdaptiveInterval, set_change
+
+# Configuration
+PROCESS_INTERVAL = float(os.environ.get("JARVIS_PROCESS_INTERVAL", "2.0"))
+# Bounds for the adaptive sampling interval
+PROCESS_MIN_INTERVAL = 1.0
+PROCESS_MAX_INTERVAL = 20.0
+# After an on-demand read (REST, get_processes, voice), keep sampling this long for the next one
+ON_DEMAND_LINGER = float(os.environ.get("JARVIS_PROCESS_LINGER", "60"))
+# A cold table takes two samples this far apart, so cpu_percent has a baseline
+PRIME_GAP = 0.5
+PRIME_TIMEOUT = 10.0
+
+SORT_FIELDS = {
+    "cpu": "cpu_percent",
+    "memory": "memory_percent",
+    "io": "io_rate",
+}
+SUMMARY_FIELDS = ("pid", "name", "cpu_percent", "memory_percent", "io_rate")
+
+def summarize(row: dict) -> dict:
+    """The short form used in process_list and /api/processes"""
+    return {key: row[key] for key in SUMMARY_FIELDS}
+
+@dataclass(frozen=True)
+class ProcessSnapshot:
+    """One pass over /proc, indexed by pid, parent pid and user"""
+    rows: List[dict] = field(default_factory=list)
+    by_pid: Dict[int, dict] = field(default_factory=dict)
+    children: Dict[int, List[int]] = field(default_factory=dict)
+    by_user: Dict[str, List[int]] = field(default_factory=dict)
+    monotonic: float = 0.0
+
+    def roots(self) -> List[int]:
+        """PIDs whose parent isn't in the snapshot (init, kthreadd, orphans we can't see)"""
+        return [row["pid"] for row in self.rows if row["ppid"] not in self.by_pid or row["ppid"] == row["pid"]]
+
+    def tree(self, root: Optional[int] = None, depth: int = 1, user: Optional[str] = None) -> List[dict]:
+        """Nested nodes below root (or the top-level processes), depth levels deep"""
+        if root is not None:
+            start = [root] if root in self.by_pid else []
+        elif user is not None:
+            pids = self.by_user.get(user, [])
+            mine = set(pids)
+            start = [pid for pid in pids if self.by_pid[pid]["ppid"] not in mine]
+        else:
+            start = self.roots()
+        return [self._node(pid, depth) for pid in start]
+
+    def _node(self, pid: int, depth: int) -> dict:
+        row = self.by_pid[pid]
+        children = self.children.get(pid, [])
+        node = {**summarize(row), "user": row["user"], "child_count": len(children)}
+        if depth > 0:
+            node["children"] = [self._node(child, depth - 1) for child in children if child in self.by_pid]
+        return node
+
+    def detail(self, pid: int) -> Optional[dict]:
+        row = self.by_pid.get(pid)
+        if row is None:
+            return None
+        return {**row, "children": self.children.get(pid, [])}
+
+class ProcessTable:
+    """Long-lived psutil.Process objects, refreshed incrementally.
+
+    Keeping each Process across samples is what makes cpu_percent(None)
+    meaningful: it reports usage since the previous call on the same object.
+    A freshly seen PID reads 0.0 until its second sample.
+
+    The background loop runs while the "processes" topic is watched and for
+    ON_DEMAND_LINGER seconds after any on-demand read, so one-off readers
+    get recent per-interval CPU figures rather than a cold first sample.
+
+    The sampling interval comes from an AdaptiveInterval fed with the
+    duration of each _sample() pass, so a host with many PIDs is sampled
+    less often instead of the scan eating into its CPU.
+    """
+
+    def __init__(self, interval: float = PROCESS_INTERVAL):
+        self.scheduler = AdaptiveInterval(interval, PROCESS_MIN_INTERVAL, max(interval, PROCESS_MAX_INTERVAL))
+        # Wall time of the last _sample() pass
+        self.sample_seconds = 0.0
+        self._listeners: List[Callable[[ProcessSnapshot], Awaitable[None]]] = []
+        self._procs: Dict[int, psutil.Process] = {}
+        # Per-PID values that don't change over a process's life
+        self._static: Dict[int, dict] = {}
+        self._io_totals: Dict[int, int] = {}
+        self._snapshot = ProcessSnapshot()
+        self._sampled_at: Optional[float] = None
+        self._task: Optional[asyncio.Task] = None
+        self._inflight: Optional[asyncio.Future] = None
+        self._watched = False
+        self._demand_until = 0.0
+        # Set once the loop has a snapshot with real CPU figures
+        self._primed = asyncio.Event()
+
+    @property
+    def interval(self) -> float:
+        return self.scheduler.current
+
+    def add_listener(self, callback: Callable[[ProcessSnapshot], Awaitable[None]]):
+        """Register a coroutine called with each new snapshot from the background loop"""
+        self._listeners.append(callback)
+
+    @property
+    def snapshot(self) -> ProcessSnapshot:
+        return self._snapshot
+
+    @property
+    def rows(self) -> List[dict]:
+        return self._snapshot.rows
+
+    def _forget(self, pid: int):
+        self._procs.pop(pid, None)
+        self._static.pop(pid, None)
+        self._io_totals.pop(pid, None)
+
+    def _static_info(self, pid: int, proc: psutil.Process) -> dict:
+        info = self._static.get(pid)
+        if info is None:
+            try:
+                cmdline = proc.cmdline()
+            except psutil.AccessDenied:
+                cmdline = []
+            try:
+                user = proc.username()
+            except (psutil.AccessDenied, KeyError):
+                user = "?"
+            info = self._static[pid] = {
+                "name": proc.name(),
+                "cmdline": cmdline,
+                "user": user,
+                "create_time": proc.create_time()
+            }
+        return info
+
+    def _sample(self) -> ProcessSnapshot:
+        """Diff the PID set, then read every tracked process once. Runs in a worker thread."""
+        now = time.monotonic()
+        elapsed = now - self._sampled_at if self._sampled_at else 0.0
+        current = set(psutil.pids())
+
+        for pid in self._procs.keys() - current:
+            self._forget(pid)
+        for pid in current - self._procs.keys():
+            try:
+                self._procs[pid] = psutil.Process(pid)
+            except psutil.Error:
+                pass
+
+        rows = []
+        for pid, proc in list(self._procs.items()):
+            try:
+                with proc.oneshot():
+                    if not proc.is_running():
+                        # PID was reused by a new process; start over with a fresh object
+                        self._forget(pid)
+                        proc = self._procs[pid] = psutil.Process(pid)
+                    static = self._static_info(pid, proc)
+                    memory = proc.memory_info()
+                    row = {
+                        "pid": pid,
+                        "ppid": proc.ppid(),
+                        "name": static["name"],
+                        "user": static["user"],
+                        "cmdline": static["cmdline"],
+                        "status": proc.status(),
+                        "create_time": static["create_time"],
+                        "cpu_percent": round(proc.cpu_percent(None), 1),
+                        "memory_percent": round(proc.memory_percent(), 2),
+                        "rss": memory.rss,
+                        "num_threads": proc.num_threads(),
+                        "num_fds": None,
+                        "io_read_bytes": None,
+                        "io_write_bytes": None,
+                        "io_rate": 0.0
+                    }
+                    try:
+                        row["num_fds"] = proc.num_fds()
+                    except psutil.AccessDenied:
+                        pass
+                    try:
+                        io = proc.io_counters()
+                        row["io_read_bytes"] = io.read_bytes
+                        row["io_write_bytes"] = io.write_bytes
+                        total = io.read_bytes + io.write_bytes
+                        previous = self._io_totals.get(pid)
+                        self._io_totals[pid] = total
+                        if previous is not None and elapsed > 0:
+                            row["io_rate"] = round(max(0, total - previous) / elapsed, 1)
+                    except (psutil.AccessDenied, AttributeError):
+                        pass  # Other users' IO counters need privileges
+            except (psutil.NoSuchProcess, psutil.ZombieProcess):
+                self._forget(pid)
+                continue
+            except psutil.AccessDenied:
+                continue
+            rows.append(row)
+
+        by_pid = {row["pid"]: row for row in rows}
+        children: Dict[int, List[int]] = {}
+        by_user: Dict[str, List[int]] = {}
+        for row in rows:
+            if row["ppid"] != row["pid"]:
+                children.setdefault(row["ppid"], []).append(row["pid"])
+            by_user.setdefault(row["user"], []).append(row["pid"])
+
+        self._sampled_at = now
+        self.sample_seconds = time.monotonic() - now
+        return ProcessSnapshot(rows=rows, by_pid=by_pid, children=children, by_user=by_user, monotonic=now)
+
+    async def refresh(self) -> ProcessSnapshot:
+        # _sample mutates the Process cache, so concurrent callers share one pass
+        if self._inflight is None:
+            self._inflight = asyncio.ensure_future(self._refresh())
+        return await asyncio.shield(self._inflight)
+
+    async def _refresh(self) -> ProcessSnapshot:
+        try:
+            self._snapshot = await asyncio.to_thread(self._sample)
+            return self._snapshot
+        finally:
+            self._inflight = None
+
+    async def ensure_fresh(self) -> ProcessSnapshot:
+        """A recent snapshot for an on-demand reader; starts (or extends) the background loop"""
+        self._demand_until = time.monotonic() + ON_DEMAND_LINGER
+        self._ensure_running()
+        try:
+            await asyncio.wait_for(self._primed.wait(), timeout=PRIME_TIMEOUT)
+        except asyncio.TimeoutError:
+            pass
+        return self._snapshot
+
+    @staticmethod
+    def _uss(pid: int) -> Optional[int]:
+        # A separate Process object, so this can't race the sampler's oneshot() on the cached one
+        try:
+            return psutil.Process(pid).memory_full_info().uss
+        except (psutil.Error, AttributeError):
+            return None
+
+    async def detail(self, pid: int) -> Optional[dict]:
+        """One process's row plus USS, which needs a /proc/<pid>/smaps walk and so is only read here"""
+        detail = self._snapshot.detail(pid)
+        if detail is not None:
+            detail["uss"] = await asyncio.to_thread(self._uss, pid)
+        return detail
+
+    def top(self, limit: int = 10, sort: str = "cpu") -> List[dict]:
+        """Top-N rows by cpu, memory or io, selected with a heap rather than a full sort"""
+        field_name = SORT_FIELDS.get(sort)
+        if field_name is None:
+            raise ValueError(f"sort must be one of {', '.join(SORT_FIELDS)}")
+        return [summarize(row) for row in heapq.nlargest(limit, self.rows, key=lambda row: row[field_name])]
+
+    def _ensure_running(self):
+        if self._task is not None and not self._task.done():
+            return
+        if self._sampled_at is None or time.monotonic() - self._sampled_at > self.interval * 2:
+            # CPU since a long-ago sample is no use to anyone; take a fresh baseline first
+            self._primed.clear()
+        self._task = asyncio.create_task(self._run())
+
+    def start(self):
+        """The "processes" topic gained its first subscriber"""
+        self._watched = True
+        self._ensure_running()
+
+    async def stop(self):
+        """The "processes" topic lost its last subscriber; on-demand readers may keep the loop going"""
+        self._watched = False
+        if self._task and time.monotonic() >= self._demand_until:
+            # Let go of the task before waiting for it: a subscriber arriving meanwhile starts a new loop
+            task, self._task = self._task, None
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+
+    async def _run(self):
+        top_pids = None
+        while self._watched or time.monotonic() < self._demand_until:
+            started = time.monotonic()
+            try:
+                if not self._primed.is_set():
+                    await self.refresh()
+                    await asyncio.sleep(PRIME_GAP)
+                snapshot = await self.refresh()
+                pids = {row["pid"] for row in self.top()}
+                delay = self.scheduler.update(set_change(top_pids, pids), self.sample_seconds)
+                top_pids = pids
+            except Exception as e:
+                snapshot = None
+                delay = self.scheduler.failed()
+                print(f"Error refreshing process table: {e}; retrying in {delay:.1f}s")
+            self._primed.set()
+            if snapshot is not None:
+                for callback in self._listeners:
+                    try:
+                        await callback(snapshot)
+                    except Exception as e:
+                        print(f"Process table listener error: {e}")
+            await asyncio.sleep(max(0.0, delay - (time.monotonic() - started)))
+
+process_table = ProcessTable()
@@ -0,0 +1,265 @@
+# backend/pty_sessions.py
+"""
+PTY-backed shell sessions for the terminal widget.
+
+Each terminal tab gets one long-lived shell on its own pseudo-terminal, so
+cd, environment variables and full-screen programs (top, less, vim) work.
+Terminal bytes travel as binary WebSocket frames in both directions:
+
+    0x01 | session id (uint32, big-endian) | raw bytes
+
+Control messages (pty_open, pty_resize, pty_attach, pty_close) stay JSON.
+A session outlives its WebSocket; a reconnecting client re-attaches with
+the secret token it was given at pty_open and gets the capped scrollback
+replayed. Sessions nobody has touched for
+PTY_IDLE_TIMEOUT seconds, or whose shell has exited, are reaped.
+"""
+import asyncio
+import fcntl
+import os
+import secrets
+import signal
+import struct
+import subprocess
+import termios
+import time
+from collections import deque
+from typing import Deque, Dict, Optional
+
+from fastapi import WebSocket
+
+from connection_manager import ConnectionManager
+from message_codec import BinaryFrame, encode_message
+
+# Configuration
+PTY_SHELL = os.environ.get("JARVIS_PTY_SHELL") or os.environ.get("SHELL") or "/bin/bash"
+PTY_IDLE_TIMEOUT = float(os.environ.get("JARVIS_PTY_IDLE_TIMEOUT", "1800"))
+PTY_SCROLLBACK_BYTES = int(os.environ.get("JARVIS_PTY_SCROLLBACK_BYTES", str(256 * 1024)))
+MAX_SESSIONS_PER_CLIENT = int(os.environ.get("JARVIS_PTY_MAX_SESSIONS", "8"))
+REAP_INTERVAL = 60
+READ_SIZE = 64 * 1024
+
+FRAME_PTY = 0x01
+_HEADER = struct.Struct(">BI")
+
+def pty_frame(session_id: int, data: bytes) -> BinaryFrame:
+    return BinaryFrame(_HEADER.pack(FRAME_PTY, session_id) + data, type="pty_data")
+
+def parse_pty_frame(frame: bytes):
+    """(session id, data) from a client binary frame; raises ValueError if it isn't one"""
+    if len(frame) < _HEADER.size or frame[0] != FRAME_PTY:
+        raise ValueError("Not a terminal frame")
+    _, session_id = _HEADER.unpack_from(frame)
+    return session_id, frame[_HEADER.size:]
+
+def check_winsize(rows: int, cols: int):
+    """Raise ValueError unless rows and cols fit the kernel's unsigned short winsize fields"""
+    if not (1 <= rows <= 65535 and 1 <= cols <= 65535):
+        raise ValueError(f"Terminal size must be 1..65535 rows and columns, got {rows}x{cols}")
+
+def _set_winsize(fd: int, rows: int, cols: int):
+    check_winsize(rows, cols)
+    fcntl.ioctl(fd, termios.TIOCSWINSZ, struct.pack("HHHH", rows, cols, 0, 0))
+
+class PtySession:
+    """One shell on a pseudo-terminal, optionally attached to a WebSocket"""
+
+    def __init__(self, session_id: int, manager: ConnectionManager, rows: int = 24, cols: int = 80,
+                 shell: str = PTY_SHELL):
+        check_winsize(rows, cols)
+        self.id = session_id
+        # Ids are sequential; re-attaching needs this instead, so nobody can take over another client's shell
+        self.token = secrets.token_urlsafe(24)
+        self.manager = manager
+        self.shell = shell
+        self.rows, self.cols = rows, cols
+        self.websocket: Optional[WebSocket] = None
+        self.owner: Optional[WebSocket] = None
+        self.last_activity = time.monotonic()
+        self.exit_code: Optional[int] = None
+        self._scrollback: Deque[bytes] = deque()
+        self._scrollback_bytes = 0
+        self._master: Optional[int] = None
+        self._process: Optional[subprocess.Popen] = None
+        self._reader: Optional[asyncio.Task] = None
+
+    @property
+    def alive(self) -> bool:
+        return self._process is not None and self._process.poll() is None
+
+    def start(self):
+        master, slave = os.openpty()
+        try:
+            _set_winsize(master, self.rows, self.cols)
+            env = {**os.environ, "TERM": "xterm-256color", "COLUMNS": str(self.cols), "LINES": str(self.rows)}
+            self._process = subprocess.Popen(
+                [self.shell, "-i"], stdin=slave, stdout=slave, stderr=slave,
+                cwd=os.path.expanduser("~"), env=env, close_fds=True,
+                # New session, with the pty as its controlling terminal so job control and ^C work
+                start_new_session=True,
+                preexec_fn=lambda: fcntl.ioctl(0, termios.TIOCSCTTY, 0))
+            os.set_blocking(master, False)
+        except BaseException:
+            os.close(master)
+            raise
+        finally:
+            os.close(slave)
+        self._master = master
+        self._reader = asyncio.create_task(self._read_loop())
+
+    async def _readable(self):
+        loop = asyncio.get_running_loop()
+        ready = loop.create_future()
+        loop.add_reader(self._master, ready.set_result, None)
+        try:
+            await ready
+        finally:
+            loop.remove_reader(self._master)
+
+    async def _read_loop(self):
+        try:
+            while True:
+                await self._readable()
+                try:
+                    data = os.read(self._master, READ_SIZE)
+                except BlockingIOError:
+                    continue
+                except OSError:
+                    data = b""  # EIO: the shell and everything on the pty has exited
+                if not data:
+                    break
+                self._remember(data)
+                if self.websocket is not None:
+                    # Waits while the client is behind; the pty buffer then fills and the shell blocks
+                    await self.manager.send_personal_message(pty_frame(self.id, data), self.websocket)
+        finally:
+            if self._process is not None:
+                self.exit_code = await asyncio.to_thread(self._process.wait)
+            if self.websocket is not None:
+                await self.manager.send_personal_message(encode_message({
+                    "type": "pty_exit",
+                    "data": {"session": self.id, "exit_code": self.exit_code}
+                }), self.websocket)
+
+    def _remember(self, data: bytes):
+        self._scrollback.append(data)
+        self._scrollback_bytes += len(data)
+        while self._scrollback_bytes > PTY_SCROLLBACK_BYTES and len(self._scrollback) > 1:
+            self._scrollback_bytes -= len(self._scrollback.popleft())
+
+    def scrollback(self) -> bytes:
+        return b"".join(self._scrollback)
+
+    def write(self, data: bytes):
+        """Keystrokes go straight to the pty; a full pty buffer is the shell's problem, not the loop's"""
+        self.last_activity = time.monotonic()
+        view = memoryview(data)
+        while view:
+            try:
+                written = os.write(self._master, view)
+            except BlockingIOError:
+                # The program isn't reading its input; drop the rest rather than block
+                print(f"pty {self.id}: input buffer full, dropped {len(view)} bytes")
+                return
+            view = view[written:]
+
+    def resize(self, rows: int, cols: int):
+        check_winsize(rows, cols)
+        self.rows, self.cols = rows, cols
+        self.last_activity = time.monotonic()
+        # The kernel sends SIGWINCH to the foreground process group
+        _set_winsize(self._master, rows, cols)
+
+    async def close(self):
+        if self.alive:
+            try:
+                os.killpg(self._process.pid, signal.SIGHUP)
+            except ProcessLookupError:
+                pass
+        if self._reader:
+            try:
+                await asyncio.wait_for(asyncio.shield(self._reader), timeout=2)
+            except asyncio.TimeoutError:
+                try:
+                    os.killpg(self._process.pid, signal.SIGKILL)
+                except ProcessLookupError:
+                    pass
+                self._reader.cancel()
+        if self._master is not None:
+            os.close(self._master)
+            self._master = None
+
+class PtySessionManager:
+    """All terminal sessions, keyed by id, with the WebSocket each is attached to"""
+
+    def __init__(self, manager: ConnectionManager):
+        self.manager = manager
+        self.sessions: Dict[int, PtySession] = {}
+        self._next_id = 1
+        self._reaper: Optional[asyncio.Task] = None
+
+    def _owned(self, websocket: WebSocket):
+        return [s for s in self.sessions.values() if s.owner is websocket]
+
+    def get(self, session_id: int, websocket: WebSocket) -> PtySession:
+        session = self.sessions.get(session_id)
+        if session is None or session.owner is not websocket:
+            raise KeyError(f"No terminal session {session_id}")
+        return session
+
+    async def open(self, websocket: WebSocket, rows: int = 24, cols: int = 80) -> PtySession:
+        if len(self._owned(websocket)) >= MAX_SESSIONS_PER_CLIENT:
+            raise ValueError(f"At most {MAX_SESSIONS_PER_CLIENT} terminal sessions per client")
+        session = PtySession(self._next_id, self.manager, rows, cols)
+        self._next_id += 1
+        session.start()
+        session.owner = session.websocket = websocket
+        self.sessions[session.id] = session
+        self.start_reaper()
+        return session
+
+    async def attach(self, websocket: WebSocket, session_id: int, token: str) -> PtySession:
+        """Take over a detached session (e.g. after a reconnect) and replay its scrollback"""
+        session = self.sessions.get(session_id)
+        if session is None or not secrets.compare_digest(str(token), session.token):
+            raise KeyError(f"No terminal session {session_id}")
+        if session.websocket is not None and session.websocket is not websocket:
+            raise ValueError(f"Terminal session {session_id} is attached to another client")
+        session.owner = session.websocket = websocket
+        session.last_activity = time.monotonic()
+        await self.manager.send_personal_message(pty_frame(session.id, session.scrollback()), websocket)
+        return session
+
+    def write(self, websocket: WebSocket, frame: bytes):
+        session_id, data = parse_pty_frame(frame)
+        self.get(session_id, websocket).write(data)
+
+    async def close(self, session_id: int):
+        session = self.sessions.pop(session_id, None)
+        if session:
+            await session.close()
+
+    def detach_all(self, websocket: WebSocket):
+        """The client went away: keep its shells running until they are re-attached or reaped"""
+        for session in self._owned(websocket):
+            session.websocket = None
+            session.owner = None
+            session.last_activity = time.monotonic()
+
+    def start_reaper(self):
+        if self._reaper is None or self._reaper.done():
+            self._reaper = asyncio.create_task(self._reap_loop())
+
+    async def _reap_loop(self):
+        while self.sessions:
+            await asyncio.sleep(REAP_INTERVAL)
+            now = time.monotonic()
+            for session in list(self.sessions.values()):
+                idle = session.websocket is None and now - session.last_activity > PTY_IDLE_TIMEOUT
+                if idle or not session.alive:
+                    print(f"Reaping terminal session {session.id} ({'idle' if idle else 'exited'})")
+                    await self.close(session.id)
+
+    async def close_all(self):
+        for session_id in list(self.sessions):
+            await self.close(session_id)
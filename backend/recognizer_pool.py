@@ -0,0 +1,51 @@
+# backend/recognizer_pool.py
+"""
+A small pool of ready-made speech recognizers sharing one loaded model.
+
+Creating a recognizer (and compiling its grammar, if it has one) costs
+time and memory, and a recognizer carries state from the audio it last
+heard. The pool builds a few up front, hands them out, and resets each one
+as it comes back so every utterance starts clean.
+"""
+import threading
+from collections import deque
+from typing import Callable, Deque
+
+class RecognizerPool:
+    """Up to size idle recognizers made by factory; extra ones are made on demand and not kept"""
+
+    def __init__(self, factory: Callable, size: int = 2, name: str = "recognizer"):
+        self.factory = factory
+        self.size = size
+        self.name = name
+        self._idle: Deque = deque()
+        self._lock = threading.Lock()
+        self.created = 0
+        self.in_use = 0
+
+    def fill(self):
+        """Build the idle recognizers now (e.g. in the model loading thread) rather than on first use"""
+        while len(self._idle) < self.size:
+            recognizer = self.factory()
+            with self._lock:
+                self.created += 1
+                self._idle.append(recognizer)
+
+    def acquire(self):
+        with self._lock:
+            self.in_use += 1
+            if self._idle:
+                return self._idle.popleft()
+            self.created += 1
+        return self.factory()
+
+    def release(self, recognizer):
+        if hasattr(recognizer, "Reset"):
+            recognizer.Reset()
+        with self._lock:
+            self.in_use -= 1
+            if len(self._idle) < self.size:
+                self._idle.append(recognizer)
+
+    def stats(self) -> dict:
+        return {"idle": len(self._idle), "in_use": self.in_use, "created": self.created, "size": self.size}
@@ -0,0 +1,85 @@
+# backend/scheduler.py
+"""
+Adaptive collection cadence for subscription topics.
+
+Each topic's collector gets an interval that moves between a floor and a
+ceiling: faster while its values are changing or a client asked for live
+mode, slower when values are flat or the host is busy. The 1 s metrics
+sampler is not scheduled here; history needs its fixed cadence.
+"""
+import os
+from typing import Callable, Optional
+
+# Configuration
+# A collection may use at most this fraction of its interval
+BUDGET_FRACTION = float(os.environ.get("JARVIS_SCHEDULER_BUDGET", "0.05"))
+# Host CPU% above which collectors back off
+HEAVY_LOAD_CPU = float(os.environ.get("JARVIS_HEAVY_LOAD_CPU", "85"))
+
+# Change scores are 0..1, as returned by a topic's publish function
+FAST_CHANGE = 0.2
+FLAT_CHANGE = 0.02
+SPEED_UP = 0.5
+SLOW_DOWN = 1.25
+LOAD_BACKOFF = 2.0
+
+class AdaptiveInterval:
+    """Picks a collector's next interval within [min_interval, max_interval].
+
+    - Values changing quickly, or a client in live mode: speed up.
+    - Flat values or a heavily loaded host: slow down.
+    - A collection that took longer than its budget pushes the interval
+      out so collecting stays a small fraction of wall time, even in live mode.
+    - Errors back off exponentially.
+    """
+
+    def __init__(self, base: float, min_interval: float, max_interval: float,
+                 load: Optional[Callable[[], float]] = None, budget_fraction: float = BUDGET_FRACTION):
+        self.base = base
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.load = load
+        self.budget_fraction = budget_fraction
+        self.current = base
+        self.live = False
+
+    def _clamp(self, interval: float) -> float:
+        return min(self.max_interval, max(self.min_interval, interval))
+
+    def update(self, change: Optional[float], duration: float) -> float:
+        """Fold in the last collection's change score and duration; return the next interval"""
+        if self.live:
+            interval = self.min_interval
+        else:
+            interval = self.current
+            if change is None:
+                # Nothing to judge by: drift back towards the configured cadence
+                interval = (interval + self.base) / 2
+            elif change >= FAST_CHANGE:
+                interval *= SPEED_UP
+            elif change <= FLAT_CHANGE:
+                interval *= SLOW_DOWN
+            if self.load is not None and self.load() >= HEAVY_LOAD_CPU:
+                interval *= LOAD_BACKOFF
+        interval = max(interval, duration / self.budget_fraction)
+        self.current = self._clamp(interval)
+        return self.current
+
+    def failed(self) -> float:
+        """Back off after an error"""
+        self.current = self._clamp(max(self.current, self.base) * 2)
+        return self.current
+
+def set_change(prev: Optional[set], cur: set) -> Optional[float]:
+    """Fraction of items that appeared or disappeared between two collections"""
+    if prev is None:
+        return None
+    union = prev | cur
+    return len(prev ^ cur) / len(union) if union else 0.0
+
+def scalar_change(prev: Optional[dict], cur: dict, keys, scale: float) -> Optional[float]:
+    """Largest absolute move across keys, as a fraction of scale (capped at 1)"""
+    if prev is None:
+        return None
+    moved = max((abs((cur.get(key) or 0) - (prev.get(key) or 0)) for key in keys), default=0.0)
+    return min(1.0, moved / scale)
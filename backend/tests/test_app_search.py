@@ -0,0 +1,17 @@
+# backend/tests/test_app_search.py
+import asyncio
+import json
+
+from app_search import LaunchCounts
+
+def test_launch_counts_are_saved_and_reloaded(tmp_path):
+    path = str(tmp_path / "jarvis" / "launches.json")
+    counts = LaunchCounts(path)
+
+    async def launch():
+        await asyncio.gather(counts.record("firefox"), counts.record("firefox"), counts.record("code"))
+
+    asyncio.run(launch())
+    with open(path, encoding="utf-8") as f:
+        assert json.load(f) == {"firefox": 2, "code": 1}
+    assert LaunchCounts(path).counts == {"firefox": 2, "code": 1}
@@ -0,0 +1,35 @@
+# backend/tests/test_log_follower.py
+import asyncio
+
+import log_follower
+from log_follower import LogFollower
+
+def test_empty_journal_exit_is_reprobed_not_abandoned(monkeypatch):
+    monkeypatch.setattr(log_follower, "RESTART_BACKOFF", 0)
+    follower = LogFollower()
+    calls = []
+
+    async def journal_available():
+        calls.append("probe")
+        return True
+
+    async def follow_journal():
+        calls.append("journal")
+        if calls.count("journal") == 3:
+            raise asyncio.CancelledError
+        # The first run ends without output, as when journald restarts
+        return calls.count("journal") > 1
+
+    async def follow_syslog():
+        calls.append("syslog")
+        raise asyncio.CancelledError
+
+    monkeypatch.setattr(follower, "_journal_available", journal_available)
+    monkeypatch.setattr(follower, "_follow_journal", follow_journal)
+    monkeypatch.setattr(follower, "_follow_syslog", follow_syslog)
+    try:
+        asyncio.run(follower._run())
+    except asyncio.CancelledError:
+        pass
+
+    assert calls == ["probe", "journal", "probe", "journal", "probe", "journal"]
@@ -0,0 +1,17 @@
+# backend/tests/test_log_store.py
+from log_follower import make_entry
+from log_store import LogStore
+
+def test_prefix_query_returns_each_line_once_and_pages():
+    store = LogStore(capacity=16)
+    store.add([make_entry(1000.0, "sshd ssh_key accepted"), make_entry(1001.0, "sshd only")])
+
+    page = store.search("ssh*")
+    assert [entry["seq"] for entry in page["logs"]] == [1, 0]
+    assert page["next_cursor"] is None
+
+    first = store.search("ssh*", limit=1)
+    assert [entry["seq"] for entry in first["logs"]] == [1]
+    second = store.search("ssh*", cursor=first["next_cursor"], limit=1)
+    assert [entry["seq"] for entry in second["logs"]] == [0]
+    assert second["next_cursor"] is None
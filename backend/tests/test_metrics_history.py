@@ -0,0 +1,16 @@
+# backend/tests/test_metrics_history.py
+from metrics_history import MetricsHistory
+
+def test_absorb_puts_replayed_samples_before_live_ones():
+    live = MetricsHistory()
+    for t in (1000.0, 1002.0):
+        live.add(t, (float(t), 0.0, 0.0, 0.0, 0.0))
+    restored = MetricsHistory()
+    for t in (900.0, 902.0, 1000.0):
+        restored.add(t, (float(t), 0.0, 0.0, 0.0, 0.0))
+
+    live.absorb(restored)
+
+    result = live.query(200, end=1002.0)
+    assert result["timestamps"] == [900.0, 902.0, 1000.0, 1002.0]
+    assert result["metrics"]["cpu"]["avg"] == [900.0, 902.0, 1000.0, 1002.0]
@@ -0,0 +1,20 @@
+# backend/tests/test_process_table.py
+import asyncio
+
+from process_table import ProcessTable
+
+def test_resubscribing_while_stopping_keeps_a_loop_running():
+    async def scenario():
+        table = ProcessTable()
+        table.start()
+        await asyncio.sleep(0.1)
+        stopping = asyncio.create_task(table.stop())
+        await asyncio.sleep(0)
+        # A client subscribes again before stop() has finished waiting for the old loop
+        table.start()
+        await stopping
+        running = table._task is not None and not table._task.done()
+        await table.stop()
+        return running
+
+    assert asyncio.run(scenario())
@@ -0,0 +1,45 @@
+# backend/tests/test_voice_gate.py
+import json
+
+from voice_gate import FEED, FRAME_MS, WAKE, VoiceGate
+
+class AlwaysSpeech:
+    """A VAD for a speaker who never pauses (the energy VAD would adapt to a steady test tone)"""
+
+    def update(self, frame):
+        return True
+
+class OneShotSpotter:
+    """Hears the wake word once, 20 frames into the first segment it is given"""
+
+    def __init__(self):
+        self.frames = 0
+
+    def AcceptWaveform(self, frame):
+        self.frames += 1
+        return self.frames == 20
+
+    def Result(self):
+        return json.dumps({"text": "jarvis"})
+
+    def PartialResult(self):
+        return json.dumps({"partial": ""})
+
+    def Reset(self):
+        pass
+
+def test_continuous_speech_after_the_wake_word_is_gated_again():
+    gate = VoiceGate(vad=AlwaysSpeech(), spotter=OneShotSpotter(), wake_word="jarvis", wake_window=8)
+    frames_per_second = 1000 // FRAME_MS
+    speech = b"\1\0" * (gate.frame_bytes // 2)
+
+    steps = []
+    for _ in range(20):
+        # Twenty seconds without a pause long enough to end the segment
+        steps.append(gate.process(speech * frames_per_second))
+
+    assert [action for second in steps for action, _ in second].count(WAKE) == 1
+    assert any(action == FEED for action, _ in steps[0])
+    # The window ran out mid-sentence and nothing in the speech re-armed it
+    assert not any(action == FEED for second in steps[10:] for action, _ in second)
+    assert not gate.armed
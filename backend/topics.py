@@ -0,0 +1,163 @@
+# backend/topics.py
+"""
+Subscription topics for /ws clients.
+
+Each topic wraps one collector. The collector loop runs only while the
+topic has at least one subscriber. Its tick interval comes from an
+AdaptiveInterval scheduler, and on each tick it publishes only to the
+subscribers whose own requested cadence is due.
+
+A topic without a publish function is push-only: it just tracks who is
+subscribed, and its producer sends to topic.subscribers as data arrives.
+A push-only topic may still have a scheduler; the producer then owns it and
+the topic only feeds it the subscribers' live mode.
+"""
+import asyncio
+import time
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from fastapi import WebSocket
+
+from scheduler import AdaptiveInterval
+
+@dataclass
+class Subscription:
+    interval: float
+    live: bool = False
+    last_sent: float = 0.0
+
+class Topic:
+    def __init__(self, name: str,
+                 publish: Optional[Callable[[List[WebSocket]], Awaitable[Optional[float]]]],
+                 scheduler: Optional[AdaptiveInterval] = None,
+                 on_subscribe: Optional[Callable[[WebSocket], Awaitable[bool]]] = None,
+                 on_start: Optional[Callable[[], None]] = None,
+                 on_stop: Optional[Callable[[], Awaitable[None]]] = None):
+        """publish(targets) collects once, sends to targets and returns a 0..1
+        change score (or None) that the scheduler uses to pick the next interval.
+
+        on_subscribe may send a cached value to a new subscriber and return
+        True, so it doesn't have to wait for the next tick.
+        """
+        self.name = name
+        self.publish = publish
+        self.scheduler = scheduler
+        self.on_subscribe = on_subscribe
+        self.on_start = on_start
+        self.on_stop = on_stop
+        self.subscribers: Dict[WebSocket, Subscription] = {}
+        self.active = False
+        self._task: Optional[asyncio.Task] = None
+        self._wakeup = asyncio.Event()
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def clamp(self, interval: Optional[float]) -> float:
+        """A subscriber's cadence; without one it takes whatever the scheduler picks"""
+        floor = self.scheduler.min_interval if self.scheduler else 0.0
+        if interval is None:
+            return floor
+        return max(floor, float(interval))
+
+    def update_live(self):
+        if self.scheduler:
+            self.scheduler.live = any(sub.live for sub in self.subscribers.values())
+
+    def due(self, now: float) -> List[WebSocket]:
+        """Subscribers whose requested cadence has elapsed"""
+        return [ws for ws, sub in self.subscribers.items() if now - sub.last_sent >= sub.interval - 0.05]
+
+    def mark_sent(self, websockets: List[WebSocket], now: float):
+        for ws in websockets:
+            if ws in self.subscribers:
+                self.subscribers[ws].last_sent = now
+
+    def _next_due(self, now: float) -> float:
+        return min(sub.last_sent + sub.interval for sub in self.subscribers.values()) - now
+
+    async def _run(self):
+        print(f"Topic '{self.name}' started")
+        try:
+            while self.subscribers:
+                now = time.monotonic()
+                due = self.due(now)
+                delay = self.scheduler.current
+                if due:
+                    try:
+                        change = await self.publish(due)
+                        self.mark_sent(due, now)
+                        delay = self.scheduler.update(change, time.monotonic() - now)
+                    except Exception as e:
+                        delay = self.scheduler.failed()
+                        print(f"Error in topic '{self.name}': {e}; retrying in {delay:.1f}s")
+                if self.subscribers:
+                    delay = max(delay, self._next_due(time.monotonic()))
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=delay)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            print(f"Topic '{self.name}' stopped")
+
+class TopicRegistry:
+    """Per-topic subscriber sets; a topic's collector runs while its refcount is non-zero"""
+
+    def __init__(self):
+        self.topics: Dict[str, Topic] = {}
+
+    def register(self, topic: Topic):
+        self.topics[topic.name] = topic
+
+    def refcount(self, name: str) -> int:
+        return len(self.topics[name].subscribers)
+
+    def subscriptions(self, websocket: WebSocket) -> Dict[str, dict]:
+        return {name: {"interval": topic.subscribers[websocket].interval,
+                       "live": topic.subscribers[websocket].live,
+                       "effective_interval": round(topic.scheduler.current, 2) if topic.scheduler else None}
+                for name, topic in self.topics.items() if websocket in topic.subscribers}
+
+    async def subscribe(self, websocket: WebSocket, name: str, interval: Optional[float] = None,
+                        live: bool = False):
+        topic = self.topics.get(name)
+        if topic is None:
+            raise KeyError(f"Unknown topic '{name}', expected one of {', '.join(self.topics)}")
+        existing = topic.subscribers.get(websocket)
+        topic.subscribers[websocket] = Subscription(topic.clamp(interval), bool(live),
+                                                    existing.last_sent if existing else 0.0)
+        topic.update_live()
+        if existing is None and topic.on_subscribe and await topic.on_subscribe(websocket):
+            if websocket in topic.subscribers:
+                topic.subscribers[websocket].last_sent = time.monotonic()
+        if not topic.active:
+            topic.active = True
+            if topic.on_start:
+                topic.on_start()
+        if topic.publish is None:
+            return
+        if not topic.running:
+            topic._task = asyncio.create_task(topic._run())
+        else:
+            # Re-plan the sleep in case this subscriber wants a faster cadence
+            topic._wakeup.set()
+
+    async def unsubscribe(self, websocket: WebSocket, name: str):
+        topic = self.topics.get(name)
+        if topic is None or topic.subscribers.pop(websocket, None) is None:
+            return
+        topic.update_live()
+        if not topic.subscribers:
+            topic.active = False
+            if topic._task:
+                topic._task.cancel()
+                topic._task = None
+            if topic.on_stop:
+                await topic.on_stop()
+
+    async def unsubscribe_all(self, websocket: WebSocket):
+        for name in list(self.topics):
+            await self.unsubscribe(websocket, name)
@@ -0,0 +1,205 @@
+# backend/voice_gate.py
+"""
+Voice activity and wake-word gating in front of the speech recognizer.
+
+Full recognition is by far the most expensive thing the backend does, and
+a kiosk spends most of the day hearing silence, hum and people talking to
+each other. The gate splits the microphone stream into 30 ms frames and
+only lets audio through to the recognizer while someone is speaking:
+
+- EnergyVAD compares each frame's RMS energy with an adaptive noise floor
+  (and asks WebRTC's VAD as well, if webrtcvad is installed), needs a few
+  loud frames in a row to open and stays open through short pauses.
+- Optionally, a cheap keyword spotter (a recognizer restricted to the wake
+  word) must hear "jarvis" in a speech segment before that segment and the
+  next WAKE_WINDOW seconds of speech reach the full recognizer.
+
+When a segment ends the gate asks for a flush, so the recognizer finalizes
+straight away instead of waiting to hear enough trailing silence.
+"""
+import json
+import os
+from array import array
+from collections import deque
+from typing import Deque, List, Optional, Tuple
+
+# WebRTC's VAD, if available
+try:
+    import webrtcvad
+    WEBRTC_VAD_AVAILABLE = True
+except ImportError:
+    WEBRTC_VAD_AVAILABLE = False
+
+# Configuration
+VAD_ENABLED = os.environ.get("JARVIS_VOICE_VAD", "1").lower() not in ("0", "false", "no")
+WAKE_WORD = os.environ.get("JARVIS_WAKE_WORD", "").strip().lower()
+FRAME_MS = 30
+# A frame is loud when its RMS is this many times the noise floor, and above an absolute minimum
+VAD_RATIO = float(os.environ.get("JARVIS_VAD_RATIO", "3.0"))
+VAD_MIN_RMS = float(os.environ.get("JARVIS_VAD_MIN_RMS", "300"))
+# Loud frames in a row that open a segment (clicks and knocks are shorter), and quiet frames that close it
+VAD_ONSET_FRAMES = 4
+VAD_HANGOVER_FRAMES = 17
+# Audio kept from before a segment opens, so the first syllable isn't clipped
+PREROLL_MS = 300
+# Speech held back while listening for the wake word, so the command said with it isn't clipped
+WAKE_HOLD_MS = 10000
+# After the wake word, or a forwarded segment ending, speech is passed through without it for this long
+WAKE_WINDOW = float(os.environ.get("JARVIS_WAKE_WINDOW", "8"))
+# 0-3, how aggressively WebRTC's VAD filters out non-speech
+WEBRTC_MODE = 2
+
+# What VoiceGate.process() asks of the recognizer
+FEED = "feed"     # Decode this audio
+FLUSH = "flush"   # The segment is over: finalize now
+WAKE = "wake"     # The wake word was heard
+
+def frame_rms(frame: bytes) -> float:
+    samples = array('h', frame)
+    if not samples:
+        return 0.0
+    return (sum(s * s for s in samples) / len(samples)) ** 0.5
+
+class EnergyVAD:
+    """Frame-by-frame speech/non-speech with onset and hangover smoothing"""
+
+    def __init__(self, sample_rate: int = 16000, ratio: float = VAD_RATIO, min_rms: float = VAD_MIN_RMS,
+                 onset_frames: int = VAD_ONSET_FRAMES, hangover_frames: int = VAD_HANGOVER_FRAMES,
+                 use_webrtc: bool = WEBRTC_VAD_AVAILABLE):
+        self.sample_rate = sample_rate
+        self.ratio = ratio
+        self.min_rms = min_rms
+        self.onset_frames = onset_frames
+        self.hangover_frames = hangover_frames
+        self.webrtc = webrtcvad.Vad(WEBRTC_MODE) if use_webrtc and WEBRTC_VAD_AVAILABLE else None
+        self.noise_floor: Optional[float] = None
+        self.active = False
+        self._loud_run = 0
+        self._quiet_run = 0
+
+    def is_loud(self, frame: bytes) -> bool:
+        """The raw per-frame decision; also tracks the noise floor"""
+        rms = frame_rms(frame)
+        if self.noise_floor is None:
+            self.noise_floor = rms
+        loud = rms > max(self.noise_floor * self.ratio, self.min_rms)
+        if rms < self.noise_floor:
+            self.noise_floor = rms  # Drop to a quieter room straight away
+        else:
+            # Rise slowly, and slower still while it sounds like speech, so hum and fans fade out
+            self.noise_floor += (rms - self.noise_floor) * (0.002 if loud else 0.05)
+        if loud and self.webrtc is not None:
+            loud = self.webrtc.is_speech(frame, self.sample_rate)
+        return loud
+
+    def update(self, frame: bytes) -> bool:
+        """Whether we are inside a speech segment after this frame"""
+        if self.is_loud(frame):
+            self._loud_run += 1
+            self._quiet_run = 0
+            if self._loud_run >= self.onset_frames:
+                self.active = True
+        else:
+            self._loud_run = 0
+            self._quiet_run += 1
+            if self._quiet_run >= self.hangover_frames:
+                self.active = False
+        return self.active
+
+class VoiceGate:
+    """Turns raw audio into the (action, audio) steps the recognizer should take"""
+
+    def __init__(self, sample_rate: int = 16000, vad: Optional[EnergyVAD] = None,
+                 spotter=None, wake_word: str = WAKE_WORD, wake_window: float = WAKE_WINDOW):
+        self.sample_rate = sample_rate
+        self.frame_bytes = sample_rate * FRAME_MS // 1000 * 2
+        self.vad = vad or EnergyVAD(sample_rate)
+        # A recognizer limited to the wake word; without one (or a wake word) every segment goes through
+        self.spotter = spotter if wake_word else None
+        self.wake_word = wake_word
+        self.wake_window = wake_window
+        self._pending = b""
+        self._preroll: Deque[bytes] = deque(maxlen=PREROLL_MS // FRAME_MS)
+        # The current segment's audio not yet forwarded: preroll, then speech until the wake word
+        self._segment: Deque[bytes] = deque(maxlen=WAKE_HOLD_MS // FRAME_MS)
+        self._in_segment = False
+        self._forwarded = False
+        self._clock = 0.0           # Seconds of audio seen, so behaviour doesn't depend on wall time
+        self._armed_until = 0.0
+        # Counters for measuring the gate
+        self.frames = 0
+        self.frames_forwarded = 0
+        self.segments = 0
+        self.wakes = 0
+
+    @property
+    def armed(self) -> bool:
+        return self.spotter is None or self._clock < self._armed_until
+
+    def _heard_wake_word(self, frame: bytes) -> bool:
+        if self.spotter.AcceptWaveform(frame):
+            text = json.loads(self.spotter.Result()).get("text", "")
+        else:
+            text = json.loads(self.spotter.PartialResult()).get("partial", "")
+        return self.wake_word in text.split()
+
+    def process(self, audio: bytes) -> List[Tuple[str, bytes]]:
+        steps: List[Tuple[str, bytes]] = []
+        data = self._pending + audio
+        usable = len(data) - len(data) % self.frame_bytes
+        self._pending = data[usable:]
+        for start in range(0, usable, self.frame_bytes):
+            frame = data[start:start + self.frame_bytes]
+            self.frames += 1
+            self._clock += FRAME_MS / 1000
+            speech = self.vad.update(frame)
+            if not self._in_segment:
+                if not speech:
+                    self._preroll.append(frame)
+                    continue
+                self._in_segment = True
+                self._forwarded = False
+                self.segments += 1
+                self._segment.clear()
+                self._segment.extend(self._preroll)
+                self._preroll.clear()
+            if not self.armed:
+                # Hold the segment back until the wake word is heard in it (or it ends)
+                self._segment.append(frame)
+                if self._heard_wake_word(frame):
+                    self.wakes += 1
+                    self._armed_until = self._clock + self.wake_window
+                    steps.append((WAKE, b""))
+                    # Let the recognizer hear the whole sentence, wake word included
+                    frame = b"".join(self._segment)
+                    self._segment.clear()
+                else:
+                    frame = b""
+            elif self._segment:
+                frame = b"".join(self._segment) + frame
+                self._segment.clear()
+            if frame:
+                self.frames_forwarded += len(frame) // self.frame_bytes
+                self._forwarded = True
+                steps.append((FEED, frame))
+            if not speech:
+                self._in_segment = False
+                self._segment.clear()
+                if self._forwarded:
+                    steps.append((FLUSH, b""))
+                    if self.spotter is not None:
+                        # A finished command keeps the window open for a follow-up; talking on and on doesn't
+                        self._armed_until = self._clock + self.wake_window
+                if self.spotter is not None:
+                    self.spotter.Reset()
+        return _coalesce(steps)
+
+def _coalesce(steps: List[Tuple[str, bytes]]) -> List[Tuple[str, bytes]]:
+    """Merge runs of FEED so the recognizer gets one call per run rather than per frame"""
+    merged: List[Tuple[str, bytes]] = []
+    for action, audio in steps:
+        if action == FEED and merged and merged[-1][0] == FEED:
+            merged[-1] = (FEED, merged[-1][1] + audio)
+        else:
+            merged.append((action, audio))
+    return merged
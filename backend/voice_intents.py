@@ -0,0 +1,54 @@
+# backend/voice_intents.py
+"""
+The voice commands Jarvis understands, and matching speech against them.
+
+match_intent() is for a final transcript and keeps the original behaviour:
+the first intent with a phrase anywhere in the text wins. match_early() is
+for partial transcripts while the user is still talking; it only commits
+when exactly one intent matches on whole words and that intent is safe to
+act on before the sentence is finished.
+"""
+import re
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+
+@dataclass(frozen=True)
+class Intent:
+    name: str
+    phrases: Tuple[str, ...]
+    # Whether a partial transcript may trigger it; off for greetings, which usually lead into
+    # another command, and for anything that shouldn't fire on a misheard half-sentence
+    early: bool = True
+
+# In priority order, like the original if/elif chain
+INTENTS = (
+    Intent("greet", ("hello jarvis", "hey jarvis"), early=False),
+    Intent("status", ("what is your status", "system status")),
+    Intent("open_terminal", ("open terminal",)),
+    Intent("show_processes", ("show processes",)),
+    Intent("time", ("what time is it", "current time")),
+    Intent("shutdown", ("shutdown", "power off"), early=False),
+    Intent("thanks", ("thank you",)),
+)
+
+_WHOLE_WORDS = {phrase: re.compile(rf"\b{re.escape(phrase)}\b") for intent in INTENTS for phrase in intent.phrases}
+
+def phrases() -> List[str]:
+    """Every phrase any intent listens for"""
+    return [phrase for intent in INTENTS for phrase in intent.phrases]
+
+def match_intent(text: str) -> Optional[str]:
+    text = text.lower()
+    for intent in INTENTS:
+        if any(phrase in text for phrase in intent.phrases):
+            return intent.name
+    return None
+
+def match_early(partial: str) -> Optional[str]:
+    """The intent a partial transcript already commits to, if it's unambiguous"""
+    partial = partial.lower()
+    matched = [intent for intent in INTENTS
+               if any(_WHOLE_WORDS[phrase].search(partial) for phrase in intent.phrases)]
+    if len(matched) == 1 and matched[0].early:
+        return matched[0].name
+    return None
@@ -3,7 +3,13 @@ import os
 import json
 import asyncio
 import threading
-from typing import Optional
+import time
+from typing import Awaitable, Callable, Optional
+
+from audio_ring import AudioRing
+from recognizer_pool import RecognizerPool
+from voice_gate import FEED, FLUSH, VAD_ENABLED, WAKE, WAKE_WORD, VoiceGate
+from voice_intents import phrases
 
 # Option 1: Vosk (Offline)
 try:
@@ -31,21 +37,53 @@ except ImportError:
     TTS_AVAILABLE = False
 
 # Configuration
-MODEL_PATH = "model/vosk-model-en-us-0.22-lgraph"
+MODEL_PATH = os.environ.get("JARVIS_VOSK_MODEL", "model/vosk-model-en-us-0.22-lgraph")
 USE_GOOGLE_ONLINE = True  # Set to True to use Google's online API
+SAMPLE_RATE = 16000
+# Recognizers kept ready on the shared model
+RECOGNIZER_POOL_SIZE = int(os.environ.get("JARVIS_VOICE_RECOGNIZERS", "2"))
+# Restrict Vosk to the phrases Jarvis understands: faster, more accurate and smaller than open vocabulary.
+# Needs a model with a dynamic graph (the lgraph models); others ignore the grammar.
+USE_GRAMMAR = os.environ.get("JARVIS_VOICE_GRAMMAR", "1").lower() not in ("0", "false", "no")
+# Microphone reads of 100 ms; the recognizer is fed whatever has arrived, up to DECODE_SECONDS at a time
+CAPTURE_FRAMES = int(os.environ.get("JARVIS_VOICE_CAPTURE_FRAMES", "1600"))
+DECODE_SECONDS = 0.2
+RING_SECONDS = float(os.environ.get("JARVIS_VOICE_RING_SECONDS", "10"))
+# Give up on an utterance after this long without any speech
+SILENCE_TIMEOUT = float(os.environ.get("JARVIS_VOICE_SILENCE_TIMEOUT", "12.5"))
+# Recognized phrases older than this are stale by the time someone asks for one
+RESULT_MAX_AGE = 2.0
+# After acting on a partial transcript, the rest of that utterance is dropped: up to its final
+# result, or until this long passes without any more words
+EARLY_COMMIT_TAIL = 1.0
+# Seconds of silence that end a phrase for Google recognition (speech_recognition's default is 0.8)
+GOOGLE_PAUSE_THRESHOLD = float(os.environ.get("JARVIS_VOICE_PAUSE_THRESHOLD", "0.5"))
+
+# Called with each partial transcript; returning True commits it as the phrase
+PartialCallback = Callable[[str], Awaitable[bool]]
+
+# Voice service states, as reported by voice_status
+STATE_IDLE = "idle"
+STATE_LOADING = "loading"
+STATE_READY = "ready"
+STATE_UNAVAILABLE = "unavailable"
 
 # Global variables
 vosk_model = None
-vosk_recognizer = None
+command_recognizers: Optional[RecognizerPool] = None
+wake_spotters: Optional[RecognizerPool] = None
+voice_status = {"state": STATE_IDLE, "engine": None, "load_seconds": None}
+_voice_loaded = asyncio.Event()
 pyaudio_instance = None
 audio_stream = None
 tts_engine = None
 google_recognizer = None
 google_microphone = None
+vosk_stream = None
 
 def initialize_voice_service():
     """Initialize the voice recognition and TTS services"""
-    global vosk_model, vosk_recognizer, pyaudio_instance, audio_stream
+    global vosk_model, command_recognizers, wake_spotters, pyaudio_instance, audio_stream
     global tts_engine, google_recognizer, google_microphone
     
     print("Initializing voice service...")
@@ -66,6 +104,8 @@ def initialize_voice_service():
     if USE_GOOGLE_ONLINE and GOOGLE_SR_AVAILABLE:
         try:
             google_recognizer = sr.Recognizer()
+            google_recognizer.pause_threshold = GOOGLE_PAUSE_THRESHOLD
+            google_recognizer.non_speaking_duration = min(google_recognizer.non_speaking_duration, GOOGLE_PAUSE_THRESHOLD)
             google_microphone = sr.Microphone()
             
             with google_microphone as source:
@@ -73,6 +113,7 @@ def initialize_voice_service():
                 google_recognizer.adjust_for_ambient_noise(source, duration=1)
             
             print("✓ Google Speech Recognition initialized (Online)")
+            voice_status["engine"] = "google"
             return True
         except Exception as e:
             print(f"✗ Error initializing Google Speech Recognition: {e}")
@@ -87,10 +128,16 @@ def initialize_voice_service():
         
         try:
             vosk_model = vosk.Model(MODEL_PATH)
-            vosk_recognizer = vosk.KaldiRecognizer(vosk_model, 16000)
+            grammar = command_grammar() if USE_GRAMMAR else None
+            command_recognizers = RecognizerPool(lambda: _vosk_recognizer(grammar), RECOGNIZER_POOL_SIZE, "command")
+            command_recognizers.fill()
+            if WAKE_WORD:
+                wake_spotters = RecognizerPool(lambda: _vosk_recognizer([WAKE_WORD, "[unk]"]), 1, "wake word")
+                wake_spotters.fill()
             pyaudio_instance = pyaudio.PyAudio()
             
-            print("✓ Vosk speech recognition initialized (Offline)")
+            print(f"✓ Vosk speech recognition initialized (Offline, {'grammar' if grammar else 'open vocabulary'})")
+            voice_status["engine"] = "vosk"
             return True
         except Exception as e:
             print(f"✗ Error initializing Vosk: {e}")
@@ -99,12 +146,54 @@ def initialize_voice_service():
         print("✗ No speech recognition service available")
         return False
 
-async def recognize_speech_from_mic() -> Optional[str]:
-    """Recognize speech from microphone using either Google (online) or Vosk (offline)"""
+def command_grammar() -> list:
+    """Every phrase process_voice_command acts on (and the wake word), plus [unk] for anything else"""
+    words = phrases() + ([WAKE_WORD] if WAKE_WORD else [])
+    return list(dict.fromkeys(words)) + ["[unk]"]
+
+def _vosk_recognizer(grammar: Optional[list] = None):
+    if grammar:
+        return vosk.KaldiRecognizer(vosk_model, SAMPLE_RATE, json.dumps(grammar))
+    return vosk.KaldiRecognizer(vosk_model, SAMPLE_RATE)
+
+async def start_voice_service():
+    """Load models in a worker thread so startup isn't held up; voice_status says when it's ready"""
+    if voice_status["state"] != STATE_IDLE:
+        return
+    voice_status["state"] = STATE_LOADING
+    started = time.perf_counter()
+    try:
+        ready = await asyncio.to_thread(initialize_voice_service)
+    except Exception as e:
+        print(f"✗ Error initializing voice service: {e}")
+        ready = False
+    voice_status["state"] = STATE_READY if ready else STATE_UNAVAILABLE
+    voice_status["load_seconds"] = round(time.perf_counter() - started, 2)
+    _voice_loaded.set()
+
+def get_voice_status() -> dict:
+    status = dict(voice_status)
+    if command_recognizers is not None:
+        status["recognizers"] = command_recognizers.stats()
+    return status
+
+async def wait_until_ready() -> bool:
+    """Wait for a load in progress; whether recognition is available"""
+    if voice_status["state"] == STATE_LOADING:
+        await _voice_loaded.wait()
+    return voice_status["state"] == STATE_READY
+
+async def recognize_speech_from_mic(on_partial: Optional[PartialCallback] = None) -> Optional[str]:
+    """Recognize speech from microphone using either Google (online) or Vosk (offline).
+
+    Vosk reports partial transcripts to on_partial as they change; Google only has final ones.
+    Waits for the models if they are still loading.
+    """
+    await wait_until_ready()
     if USE_GOOGLE_ONLINE and google_recognizer and google_microphone:
         return await _recognize_with_google()
-    elif vosk_recognizer and pyaudio_instance:
-        return await _recognize_with_vosk()
+    elif command_recognizers and pyaudio_instance:
+        return await _recognize_with_vosk(on_partial)
     else:
         print("No speech recognition service initialized")
         return None
@@ -141,6 +230,10 @@ async def _recognize_with_google() -> Optional[str]:
             return None
         elif result == "ERROR":
             return None
+        elif WAKE_WORD and WAKE_WORD not in result.lower().split():
+            # listen() already waits for speech energy; the wake word is checked on the transcript
+            print(f"Ignoring speech without the wake word: {result}")
+            return None
         else:
             print(f"Google recognized: {result}")
             return result
@@ -149,65 +242,245 @@ async def _recognize_with_google() -> Optional[str]:
         print(f"Error in Google speech recognition: {e}")
         return None
 
-async def _recognize_with_vosk() -> Optional[str]:
-    """Recognize speech using Vosk offline model"""
-    try:
-        print("Listening with Vosk...")
-        
-        stream = pyaudio_instance.open(
-            format=pyaudio.paInt16,
-            channels=1,
-            rate=16000,
-            input=True,
-            frames_per_buffer=8000
-        )
-        
-        stream.start_stream()
-        
-        silence_count = 0
-        max_silence = 50
-        
-        while True:
-            data = stream.read(4000, exception_on_overflow=False)
-            
-            if len(data) == 0:
-                break
-                
-            if vosk_recognizer.AcceptWaveform(data):
-                result = json.loads(vosk_recognizer.Result())
-                text = result.get('text', '').strip()
-                
-                if text:
-                    stream.stop_stream()
-                    stream.close()
-                    print(f"Vosk recognized: {text}")
-                    return text
-            else:
-                partial = json.loads(vosk_recognizer.PartialResult())
-                if not partial.get('partial', '').strip():
-                    silence_count += 1
-                else:
-                    silence_count = 0
-                
-                if silence_count > max_silence:
+def _open_microphone():
+    """A PyAudio input stream with the read(frames) / close() interface VoskStream expects"""
+    stream = pyaudio_instance.open(
+        format=pyaudio.paInt16,
+        channels=1,
+        rate=SAMPLE_RATE,
+        input=True,
+        frames_per_buffer=CAPTURE_FRAMES
+    )
+
+    class Microphone:
+        def read(self, frames: int) -> bytes:
+            return stream.read(frames, exception_on_overflow=False)
+
+        def close(self):
+            stream.stop_stream()
+            stream.close()
+
+    return Microphone()
+
+class VoskStream:
+    """One long-lived microphone stream, decoded by Vosk off the event loop.
+
+    A capture thread reads the device into an AudioRing; a decoder thread
+    passes the ring through the optional VoiceGate to the recognizer (whose
+    C calls release the GIL) and hands ("partial" | "final" | "wake" |
+    "error" | "end", text, time, utterance) events to the loop through an
+    asyncio queue.
+    """
+
+    def __init__(self, recognizer, open_source: Callable = None, sample_rate: int = SAMPLE_RATE,
+                 gate: Optional[VoiceGate] = None):
+        self.recognizer = recognizer
+        self.gate = gate
+        self.open_source = open_source or _open_microphone
+        self.sample_rate = sample_rate
+        self.ring = AudioRing(int(RING_SECONDS * sample_rate) * 2)
+        self.events: Optional[asyncio.Queue] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._running = False
+        self._threads = []
+        self._reset_requested = False
+        # Bumped by the decoder on every reset, so results decoded before one can be told apart
+        self._utterance = 0
+        self._wanted_utterance = 0
+        self._tail_since: Optional[float] = None
+
+    @property
+    def running(self) -> bool:
+        return self._running
+
+    def start(self):
+        if self._running:
+            return
+        self._loop = asyncio.get_running_loop()
+        self.events = asyncio.Queue()
+        self.ring = AudioRing(self.ring.capacity)
+        if hasattr(self.recognizer, "Reset"):
+            self.recognizer.Reset()  # Drop anything left from an earlier stream
+        self._running = True
+        self._threads = [threading.Thread(target=self._capture, name="voice-capture", daemon=True),
+                         threading.Thread(target=self._decode, name="voice-decode", daemon=True)]
+        for thread in self._threads:
+            thread.start()
+
+    def _emit(self, kind: str, text: str):
+        if self._loop is not None:
+            try:
+                self._loop.call_soon_threadsafe(self.events.put_nowait,
+                                                (kind, text, time.monotonic(), self._utterance))
+            except RuntimeError:
+                pass  # The loop is closed; nobody is listening any more
+
+    def _capture(self):
+        try:
+            source = self.open_source()
+        except Exception as e:
+            self._emit("error", f"Could not open microphone: {e}")
+            self._running = False
+            self.ring.close()
+            return
+        try:
+            while self._running:
+                data = source.read(CAPTURE_FRAMES)
+                if not data:
                     break
-            
-            await asyncio.sleep(0.01)
-        
-        stream.stop_stream()
-        stream.close()
+                self.ring.write(data)
+        except Exception as e:
+            self._emit("error", f"Microphone read failed: {e}")
+        finally:
+            self.ring.close()
+            try:
+                source.close()
+            except Exception:
+                pass
+
+    def _finalize(self):
+        """Ask the recognizer for whatever it has so far, ending the utterance"""
+        text = json.loads(self.recognizer.FinalResult()).get('text', '').strip()
+        self._last_partial = ""
+        if text and self._running:
+            self._emit("final", text)
+
+    def _feed(self, data: bytes):
+        if self.recognizer.AcceptWaveform(data):
+            text = json.loads(self.recognizer.Result()).get('text', '').strip()
+            self._last_partial = ""
+            if text:
+                self._emit("final", text)
+        else:
+            partial = json.loads(self.recognizer.PartialResult()).get('partial', '').strip()
+            if partial != self._last_partial:
+                self._last_partial = partial
+                self._emit("partial", partial)
+
+    def _decode(self):
+        decode_bytes = int(DECODE_SECONDS * self.sample_rate) * 2
+        self._last_partial = ""
+        try:
+            while self._running:
+                data = self.ring.read(decode_bytes, timeout=0.1)
+                if not data:
+                    if self.ring.closed:
+                        # The source ran dry (or failed): flush whatever was still being decoded
+                        self._finalize()
+                        break
+                    continue
+                if self._reset_requested:
+                    # The loop acted on a partial; start the next utterance from scratch
+                    self._reset_requested = False
+                    if hasattr(self.recognizer, "Reset"):
+                        self.recognizer.Reset()
+                    self._utterance += 1
+                    self._last_partial = ""
+                if self.gate is None:
+                    self._feed(data)
+                    continue
+                # Only speech (and, if configured, speech after the wake word) reaches the recognizer
+                for action, audio in self.gate.process(data):
+                    if action == FEED:
+                        self._feed(audio)
+                    elif action == FLUSH:
+                        self._finalize()
+                    elif action == WAKE:
+                        self._emit("wake", self.gate.wake_word)
+        except Exception as e:
+            self._emit("error", f"Recognizer failed: {e}")
+        finally:
+            self._running = False
+            self._emit("end", "")
+
+    def stop(self):
+        """Stop capture and decoding; blocks until both threads are gone"""
+        self._running = False
+        self.ring.close()
+        for thread in self._threads:
+            thread.join(timeout=2)
+        self._threads = []
+        self._loop = None
+
+    async def next_phrase(self, silence_timeout: float = SILENCE_TIMEOUT,
+                          on_partial: Optional[PartialCallback] = None) -> Optional[str]:
+        """The next recognized phrase, or None after silence_timeout without hearing anything.
+
+        If on_partial accepts a partial transcript, that becomes the phrase and the rest of
+        the utterance is dropped rather than recognized as another one.
+        """
+        while True:
+            try:
+                kind, text, at, utterance = await asyncio.wait_for(self.events.get(), timeout=silence_timeout)
+            except asyncio.TimeoutError:
+                return None
+            if kind == "error":
+                print(f"Error in Vosk speech recognition: {text}")
+                return None
+            if kind == "end":
+                return None
+            if kind == "wake":
+                print(f"Wake word '{text}' heard")
+                continue
+            if utterance < self._wanted_utterance:
+                continue  # Decoded before the reset that followed an early commit
+            if self._tail_since is not None:
+                if at - self._tail_since <= EARLY_COMMIT_TAIL:
+                    # Still the end of the committed sentence ("open terminal *please*")
+                    if kind == "final":
+                        self._tail_since = None
+                    elif text:
+                        self._tail_since = at
+                    continue
+                self._tail_since = None
+            if kind == "final" and time.monotonic() - at <= RESULT_MAX_AGE:
+                return text
+            if kind == "partial" and text and on_partial is not None and await on_partial(text):
+                self._wanted_utterance = self._utterance + 1
+                self._reset_requested = True
+                self._tail_since = time.monotonic()
+                return text
+            # Otherwise someone is still talking, which restarts the silence timeout
+
+def _make_gate() -> Optional[VoiceGate]:
+    """The VAD gate, with a wake-word spotter on the same model if a wake word is set"""
+    if not VAD_ENABLED:
         return None
-        
+    spotter = wake_spotters.acquire() if wake_spotters is not None else None
+    return VoiceGate(SAMPLE_RATE, spotter=spotter)
+
+async def _recognize_with_vosk(on_partial: Optional[PartialCallback] = None) -> Optional[str]:
+    """Recognize speech using Vosk offline model"""
+    global vosk_stream
+    try:
+        if vosk_stream is None or not vosk_stream.running:
+            if vosk_stream is not None:
+                await asyncio.to_thread(_close_stream, vosk_stream)
+            print("Listening with Vosk...")
+            vosk_stream = VoskStream(command_recognizers.acquire(), gate=_make_gate())
+            vosk_stream.start()
+        text = await vosk_stream.next_phrase(on_partial=on_partial)
+        if text:
+            print(f"Vosk recognized: {text}")
+        return text
     except Exception as e:
         print(f"Error in Vosk speech recognition: {e}")
-        if 'stream' in locals():
-            try:
-                stream.stop_stream()
-                stream.close()
-            except:
-                pass
         return None
 
+async def stop_listening():
+    """Release the microphone once nobody wants recognition any more"""
+    global vosk_stream
+    if vosk_stream is not None:
+        stream, vosk_stream = vosk_stream, None
+        await asyncio.to_thread(_close_stream, stream)
+
+def _close_stream(stream: VoskStream):
+    """Stop a stream and give its recognizers back to their pools"""
+    stream.stop()
+    command_recognizers.release(stream.recognizer)
+    if stream.gate is not None and stream.gate.spotter is not None:
+        wake_spotters.release(stream.gate.spotter)
+
 async def speak_text(text: str):
     """Convert text to speech and play it"""
     if not tts_engine:
@@ -231,9 +504,13 @@ async def speak_text(text: str):
 
 def cleanup_voice_service():
     """Clean up voice service resources"""
-    global audio_stream, pyaudio_instance, tts_engine
+    global audio_stream, pyaudio_instance, tts_engine, vosk_stream
     
     try:
+        if vosk_stream:
+            _close_stream(vosk_stream)
+            vosk_stream = None
+
         if audio_stream:
             audio_stream.stop_stream()
             audio_stream.close()
@@ -0,0 +1,110 @@
+# backend/voice_sessions.py
+"""
+One shared voice session for every client that wants to talk to Jarvis.
+
+There is one microphone, so there is one recognition loop. Clients
+subscribe and unsubscribe (jarvis_activate, or by disconnecting); the loop
+starts with the first subscriber, stops with the last, and everything it
+hears and answers goes to all current subscribers. Toggling voice in one
+browser no longer affects the others, and however often clients toggle,
+there is never more than one loop on the device.
+"""
+import asyncio
+from datetime import datetime
+from typing import Awaitable, Callable, Optional, Set
+
+from fastapi import WebSocket
+
+from connection_manager import ConnectionManager
+from message_codec import encode_message
+from voice_intents import match_early, match_intent
+from voice_service import recognize_speech_from_mic, stop_listening
+
+# Acts on a recognized phrase: (text, intent or None)
+PhraseHandler = Callable[[str, Optional[str]], Awaitable[None]]
+
+class VoiceSessionManager:
+    """The clients listening for voice commands, and the single loop serving them"""
+
+    def __init__(self, manager: ConnectionManager, on_phrase: PhraseHandler):
+        self.manager = manager
+        self.on_phrase = on_phrase
+        self.subscribers: Set[WebSocket] = set()
+        self._task: Optional[asyncio.Task] = None
+        # A loop that was cancelled and may still be closing the microphone
+        self._stopping: Optional[asyncio.Task] = None
+
+    @property
+    def listening(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def is_subscribed(self, websocket: WebSocket) -> bool:
+        return websocket in self.subscribers
+
+    async def broadcast(self, message_type: str, data: dict):
+        if self.subscribers:
+            await self.manager.broadcast(encode_message({"type": message_type, "data": data}), list(self.subscribers))
+
+    async def notify(self, title: str, message: str, kind: str = "info"):
+        await self.broadcast("notification", {
+            "title": title,
+            "message": message,
+            "type": kind,
+            "timestamp": datetime.now().isoformat()
+        })
+
+    async def subscribe(self, websocket: WebSocket):
+        self.subscribers.add(websocket)
+        if self._task is not None and self._task.done():
+            self._task = None
+        if self._task is not None:
+            return
+        if self._stopping is not None and not self._stopping.done():
+            # Let the old loop release the device before a new one opens it
+            await asyncio.wait([self._stopping])
+        if self._task is None and websocket in self.subscribers:
+            self._task = asyncio.create_task(self._run())
+
+    async def unsubscribe(self, websocket: WebSocket):
+        self.subscribers.discard(websocket)
+        if not self.subscribers and self._task is not None:
+            # Nobody is listening: release the microphone now rather than after the next phrase
+            task, self._task = self._task, None
+            self._stopping = task
+            task.cancel()
+            await asyncio.wait([task])
+
+    async def _run(self):
+        print("Starting voice recognition loop...")
+        await self.broadcast("jarvis_status", {"listening": True, "speaking": True})
+        await self.notify("Voice Service", "Listening for commands...")
+        try:
+            while self.subscribers:
+                await self.broadcast("jarvis_status", {"listening": True, "speaking": False})
+                early_intent = None
+
+                async def on_partial(partial: str) -> bool:
+                    # Show what is being heard, and act as soon as it names a command unambiguously
+                    nonlocal early_intent
+                    await self.broadcast("voice_partial", {"text": partial, "final": False})
+                    early_intent = match_early(partial)
+                    return early_intent is not None
+
+                text = await recognize_speech_from_mic(on_partial)
+                if text:
+                    print(f"Recognized: {text}" + (f" (early: {early_intent})" if early_intent else ""))
+                    await self.broadcast("voice_partial", {"text": text, "final": True,
+                                                           "intent": early_intent or match_intent(text)})
+                    await self.notify("Voice Input", f"Heard: '{text}'")
+                    await self.on_phrase(text, early_intent)
+                await asyncio.sleep(0.1)
+        except Exception as e:
+            print(f"Error in voice recognition loop: {e}")
+            await self.broadcast("jarvis_status", {"listening": False, "speaking": False})
+            self.subscribers.clear()
+        finally:
+            print("Voice recognition loop stopped")
+            await stop_listening()
+
+    def stats(self) -> dict:
+        return {"subscribers": len(self.subscribers), "listening": self.listening}
@@ -133,6 +133,15 @@ const HoloFace = ({ sendMessage }) => {
       >
         {state.jarvisStatus?.listening ? 'LISTENING...' : 'VOICE COMMAND'}
       </motion.button>
+
+      {/* Live Transcript */}
+      {state.jarvisStatus?.listening && state.jarvisStatus?.transcript && (
+        <div className={`absolute -bottom-24 left-1/2 transform -translate-x-1/2 whitespace-nowrap text-xs font-mono ${
+          state.jarvisStatus.transcriptFinal ? 'text-neon-green' : 'text-neon-cyan/60'
+        }`}>
+          {state.jarvisStatus.transcript}
+        </div>
+      )}
     </motion.div>
   );
 };
@@ -16,7 +16,7 @@ import SystemLogsWidget from './SystemLogsWidget';
 
 const JarvisDesktop = ({ onLogout }) => { // Accept onLogout prop
   const { state, dispatch } = useApp();
-  const { lastMessage, sendMessage, readyState } = useWebSocket('ws://localhost:8000/ws');
+  const { lastMessage, sendMessage, readyState } = useWebSocket('ws://localhost:8000/ws?encoding=json-binary');
 
   const [widgets, setWidgets] = useState([
   {
@@ -88,6 +88,13 @@ const JarvisDesktop = ({ onLogout }) => { // Accept onLogout prop
             payload: lastMessage.data
           });
           break;
+        case 'voice_partial':
+          // What the recognizer hears so far; final once the phrase is settled
+          dispatch({
+            type: 'UPDATE_JARVIS_STATUS',
+            payload: { transcript: lastMessage.data.text, transcriptFinal: lastMessage.data.final }
+          });
+          break;
         case 'command_response':
           // Handle command responses for terminal
           dispatch({
@@ -99,11 +106,13 @@ const JarvisDesktop = ({ onLogout }) => { // Accept onLogout prop
           });
           break;
         case 'terminal_output': // New message type for backend terminal output
+          // Frames are raw chunks of stdout/stderr, possibly many lines each
+          if (!lastMessage.data.output) break;
           dispatch({
             type: 'ADD_TERMINAL_OUTPUT',
             payload: {
-              type: 'output',
-              content: lastMessage.data.output
+              type: lastMessage.data.stream === 'stderr' || lastMessage.data.exit_code ? 'error' : 'output',
+              content: lastMessage.data.output.replace(/\r?\n$/, '').replace(/\r?\n/g, '\r\n')
             }
           });
           break;
@@ -142,6 +151,9 @@ const JarvisDesktop = ({ onLogout }) => { // Accept onLogout prop
           });
           console.log('Received Network Connections:', lastMessage.data);
           break;
+        case 'app_search_results':
+          // Handled by the Launcher widget
+          break;
         default:
           console.log('Unknown message type:', lastMessage.type);
       }
@@ -227,7 +239,7 @@ const JarvisDesktop = ({ onLogout }) => { // Accept onLogout prop
             onPositionChange={updateWidgetPosition}
             onSizeChange={updateWidgetSize} // Pass new prop
           >
-            <widget.component sendMessage={sendMessage} />
+            <widget.component sendMessage={sendMessage} lastMessage={lastMessage} readyState={readyState} />
           </DraggableWidget>
         ))}
       </AnimatePresence>
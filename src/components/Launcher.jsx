@@ -1,4 +1,4 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState, useEffect, useRef } from 'react';
 import {
   Grid3X3,
   Search,
@@ -6,12 +6,7 @@ import {
   Terminal as TerminalIcon,
   Shield,
   Globe,
-  Code,
-  Database,
   Wifi,
-  Lock,
-  Eye,
-  Zap,
   X, // For closing the app frame
 } from 'lucide-react';
 import { motion, AnimatePresence } from 'framer-motion';
@@ -66,11 +61,22 @@ const CustomAppFrame = ({ app, onClose }) => {
 };
 
 
-const Launcher = ({ sendMessage }) => { // Accept sendMessage prop
+// Results carry a .desktop Icon name; until those are resolved, show one per category
+const CATEGORY_ICONS = {
+  security: { icon: Shield, color: 'text-red-400' },
+  network: { icon: Globe, color: 'text-neon-green' },
+  system: { icon: TerminalIcon, color: 'text-neon-cyan' },
+};
+
+const SEARCH_LIMIT = 30;
+
+const Launcher = ({ sendMessage, lastMessage, readyState }) => { // Accept sendMessage prop
   const [activeCategory, setActiveCategory] = useState('all');
   const [searchTerm, setSearchTerm] = useState('');
-  const [installedApps, setInstalledApps] = useState([]); // State for dynamically loaded apps
+  const [installedApps, setInstalledApps] = useState([]); // Top matches for searchTerm, ranked by the backend
   const [activeApp, setActiveApp] = useState(null); // State for app opened in custom frame
+  // Sequence number of the latest search_apps query; replies to older ones are dropped
+  const searchSeqRef = useRef(0);
 
   const categories = [
     { id: 'all', name: 'All', icon: Grid3X3 },
@@ -79,49 +85,41 @@ const Launcher = ({ sendMessage }) => { // Accept sendMessage prop
     { id: 'system', name: 'System', icon: Settings }
   ];
 
-  // Simulate fetching installed apps from backend
+  // The backend searches and ranks the installed apps; ask it again on every keystroke
   useEffect(() => {
-    const fetchApps = async () => {
-      // In a real scenario, you'd make a WebSocket or REST call to your backend
-      // sendMessage({ type: 'get_installed_apps' });
-      // For now, simulate with a delay
-      await new Promise(resolve => setTimeout(resolve, 1000));
-      setInstalledApps([
-        { name: 'Terminal', icon: TerminalIcon, color: 'text-neon-cyan', category: 'system', executable: 'xterm' },
-        { name: 'Nmap Scanner', icon: Globe, color: 'text-neon-green', category: 'network', executable: 'nmap' },
-        { name: 'Metasploit', icon: Shield, color: 'text-red-400', category: 'security', executable: 'msfconsole' },
-        { name: 'Wireshark', icon: Eye, color: 'text-blue-400', category: 'network', executable: 'wireshark' },
-        { name: 'Burp Suite', icon: Lock, color: 'text-orange-400', category: 'security', executable: 'burpsuite' },
-        { name: 'SQLMap', icon: Database, color: 'text-purple-400', category: 'security', executable: 'sqlmap' },
-        { name: 'Aircrack-ng', icon: Wifi, color: 'text-yellow-400', category: 'network', executable: 'aircrack-ng' },
-        { name: 'John the Ripper', icon: Zap, color: 'text-red-500', category: 'security', executable: 'john' },
-        { name: 'Hydra', icon: Code, color: 'text-green-400', category: 'security', executable: 'hydra' },
-        { name: 'VS Code', icon: Code, color: 'text-blue-500', category: 'system', executable: 'code' },
-        { name: 'Firefox', icon: Globe, color: 'text-orange-500', category: 'system', executable: 'firefox' },
-      ]);
-    };
-    fetchApps();
-  }, []);
-
-  const filteredApps = installedApps.filter(app => {
-    const matchesCategory = activeCategory === 'all' || app.category === activeCategory;
-    const matchesSearch = app.name.toLowerCase().includes(searchTerm.toLowerCase());
-    return matchesCategory && matchesSearch;
-  });
+    if (!sendMessage || readyState !== 1) return;
+    searchSeqRef.current += 1;
+    sendMessage({
+      type: 'search_apps',
+      data: { query: searchTerm, limit: SEARCH_LIMIT, seq: searchSeqRef.current }
+    });
+  }, [searchTerm, readyState]);
+
+  useEffect(() => {
+    if (lastMessage?.type !== 'app_search_results') return;
+    // Answers can overtake each other; only the one for the latest query counts
+    if (lastMessage.data.seq !== searchSeqRef.current) return;
+    setInstalledApps((lastMessage.data.results || []).map(app => ({
+      ...app,
+      ...(CATEGORY_ICONS[app.category] || CATEGORY_ICONS.system),
+    })));
+  }, [lastMessage]);
+
+  const filteredApps = installedApps.filter(app =>
+    activeCategory === 'all' || app.category === activeCategory
+  );
 
   const handleAppClick = (app) => {
-    // In a real system, you'd send a command to the backend to launch the app
-    // For now, we'll simulate opening it in a custom frame.
-    console.log(`Attempting to launch: ${app.name} (executable: ${app.executable})`);
+    // The backend looks the app up by its desktop file ID and runs the command parsed from it
+    console.log(`Attempting to launch: ${app.name} (id: ${app.id})`);
     setActiveApp(app); // Set the app to be displayed in the custom frame
 
-    // If you wanted to launch it natively via backend:
-    // if (sendMessage) {
-    //   sendMessage({
-    //     type: 'launch_application',
-    //     data: { executable: app.executable }
-    //   });
-    // }
+    if (sendMessage) {
+      sendMessage({
+        type: 'launch_application',
+        data: { id: app.id }
+      });
+    }
   };
 
   return (
@@ -166,7 +164,7 @@ const Launcher = ({ sendMessage }) => { // Accept sendMessage prop
         <div className="grid grid-cols-3 gap-3">
           {filteredApps.map((app, index) => (
             <motion.div
-              key={app.name}
+              key={app.id}
               initial={{ opacity: 0, scale: 0.8 }}
               animate={{ opacity: 1, scale: 1 }}
               transition={{ delay: index * 0.05 }} // Reduced delay for faster appearance
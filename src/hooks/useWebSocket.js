@@ -1,16 +1,25 @@
 // src/hooks/useWebSocket.js
 import { useState, useEffect, useRef } from 'react';
 
+const textDecoder = new TextDecoder();
+
+// Binary frames starting with this byte carry raw terminal data:
+// 0x01 | session id (uint32 big-endian) | bytes
+const FRAME_PTY = 0x01;
+
 export const useWebSocket = (url) => {
   const [socket, setSocket] = useState(null);
   const [lastMessage, setLastMessage] = useState(null);
   const [readyState, setReadyState] = useState(0);
   const reconnectTimeoutRef = useRef(null);
+  const ptyListenersRef = useRef(new Set());
 
   useEffect(() => {
     const connectWebSocket = () => {
       try {
         const ws = new WebSocket(url);
+        // The backend may send JSON as binary frames (?encoding=json-binary)
+        ws.binaryType = 'arraybuffer';
         
         ws.onopen = () => {
           console.log('WebSocket connected');
@@ -19,7 +28,14 @@ export const useWebSocket = (url) => {
         };
         
         ws.onmessage = (event) => {
-          const data = JSON.parse(event.data);
+          if (typeof event.data !== 'string' && new Uint8Array(event.data, 0, 1)[0] === FRAME_PTY) {
+            const sessionId = new DataView(event.data).getUint32(1);
+            const bytes = new Uint8Array(event.data, 5);
+            ptyListenersRef.current.forEach((listener) => listener(sessionId, bytes));
+            return;
+          }
+          const text = typeof event.data === 'string' ? event.data : textDecoder.decode(event.data);
+          const data = JSON.parse(text);
           setLastMessage(data);
         };
         
@@ -63,10 +79,30 @@ export const useWebSocket = (url) => {
     }
   };
 
+  // Send keystrokes (string or Uint8Array) to a terminal session as a binary frame
+  const sendPtyInput = (sessionId, data) => {
+    if (socket && readyState === 1) {
+      const bytes = typeof data === 'string' ? new TextEncoder().encode(data) : data;
+      const frame = new Uint8Array(5 + bytes.length);
+      frame[0] = FRAME_PTY;
+      new DataView(frame.buffer).setUint32(1, sessionId);
+      frame.set(bytes, 5);
+      socket.send(frame);
+    }
+  };
+
+  // Register listener(sessionId, Uint8Array) for terminal output; returns an unsubscribe function
+  const addPtyListener = (listener) => {
+    ptyListenersRef.current.add(listener);
+    return () => ptyListenersRef.current.delete(listener);
+  };
+
   return {
     socket,
     lastMessage,
     readyState,
-    sendMessage
+    sendMessage,
+    sendPtyInput,
+    addPtyListener
   };
 };